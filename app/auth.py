@@ -1,5 +1,11 @@
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, FrozenSet, Tuple, Callable, Deque
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
@@ -43,6 +49,113 @@ def get_password_hash(password):
     """Generate a password hash"""
     return pwd_context.hash(password)
 
+# Password hashing pool
+# bcrypt costs 100-300ms of CPU per call, so it runs on a small dedicated pool
+# instead of the event loop. At most PASSWORD_HASH_MAX_PENDING jobs may be
+# running or queued; further attempts are rejected instead of piling up.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+_password_executor = ThreadPoolExecutor(
+    max_workers=PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash"
+)
+_password_slots = threading.BoundedSemaphore(PASSWORD_HASH_MAX_PENDING)
+
+async def _run_password_job(func: Callable[..., Any], *args: Any) -> Any:
+    """Run a password hashing function on the hashing pool"""
+    if not _password_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login attempts in progress, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_password_executor, func, *args)
+    finally:
+        _password_slots.release()
+
+async def verify_password_async(plain_password, hashed_password) -> bool:
+    """Verify a password against a hash without blocking the event loop"""
+    return await _run_password_job(verify_password, plain_password, hashed_password)
+
+async def get_password_hash_async(password) -> str:
+    """Generate a password hash without blocking the event loop"""
+    return await _run_password_job(get_password_hash, password)
+
+class LoginRateLimiter:
+    """
+    Sliding-window limit on failed logins per key
+    
+    Only failures are recorded, and a successful login clears its key, so
+    users who log in correctly are never throttled. Keys come from
+    login_rate_limit_key().
+    """
+    
+    # Sweep idle keys once this many are being tracked
+    MAX_TRACKED_KEYS = 10000
+    
+    def __init__(self, max_attempts: int, window_seconds: int):
+        self.max_attempts = max_attempts
+        self.window_seconds = window_seconds
+        self._attempts: Dict[str, Deque[float]] = {}
+        self._lock = threading.Lock()
+    
+    def check(self, key: str) -> None:
+        """Raise 429 when key has max_attempts failures within the window"""
+        now = time.monotonic()
+        cutoff = now - self.window_seconds
+        with self._lock:
+            attempts = self._attempts.get(key)
+            if not attempts:
+                return
+            while attempts and attempts[0] <= cutoff:
+                attempts.popleft()
+            
+            if len(attempts) >= self.max_attempts:
+                retry_after = int(attempts[0] - cutoff) + 1
+                raise HTTPException(
+                    status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                    detail="Too many login attempts, please retry later",
+                    headers={"Retry-After": str(retry_after)},
+                )
+    
+    def record_failure(self, key: str) -> None:
+        """Record a failed login for key"""
+        now = time.monotonic()
+        with self._lock:
+            if len(self._attempts) > self.MAX_TRACKED_KEYS:
+                self._sweep(now - self.window_seconds)
+            self._attempts.setdefault(key, deque()).append(now)
+    
+    def reset(self, key: Optional[str] = None) -> None:
+        """Forget recorded failures for key, or for every key if None"""
+        with self._lock:
+            if key is None:
+                self._attempts.clear()
+            else:
+                self._attempts.pop(key, None)
+    
+    def _sweep(self, cutoff: float) -> None:
+        for key in [k for k, attempts in self._attempts.items() if not attempts or attempts[-1] <= cutoff]:
+            del self._attempts[key]
+
+def login_rate_limit_key(client_host: Optional[str], username: str) -> str:
+    """
+    Rate limit key for a login: the client address together with the username
+    
+    Keying on the pair means users behind one proxy or NAT address do not
+    share a budget. Behind a reverse proxy, run uvicorn with
+    --forwarded-allow-ips set to the proxy's address so that the client
+    address is taken from X-Forwarded-For rather than being the proxy's.
+    """
+    return f"{client_host or 'unknown'}|{username.strip().lower()}"
+
+login_rate_limiter = LoginRateLimiter(
+    max_attempts=int(os.getenv("LOGIN_RATE_LIMIT_ATTEMPTS", "10")),
+    window_seconds=int(os.getenv("LOGIN_RATE_LIMIT_WINDOW", "60"))
+)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token"""
     to_encode = data.copy()
@@ -61,6 +174,73 @@ def get_user(db: Session, email: str) -> Optional[User]:
     statement = select(User).where(User.email == email)
     return db.exec(statement).first()
 
+# Token-to-user resolution cache keyed by the raw token string, holding
+# (expiry, user snapshot). Bounded in size and never outlives the token itself.
+TOKEN_CACHE_TTL = 60  # seconds
+TOKEN_CACHE_MAX_SIZE = 1024
+_token_cache: "OrderedDict[str, Tuple[float, User]]" = OrderedDict()
+_token_cache_lock = threading.Lock()
+
+def _snapshot_user(user: User) -> User:
+    """Copy a user's column values into a detached instance that can be shared between requests"""
+    return User(**{column.name: getattr(user, column.name) for column in User.__table__.columns})
+
+def resolve_user_from_token(db: Session, token: str) -> Optional[User]:
+    """
+    Resolve a JWT to the user it was issued for
+    
+    Cache hits skip both the JWT decode and the user lookup. Returns None
+    if the token is invalid or the user no longer exists.
+    """
+    now = time.time()
+    entry = _token_cache.get(token)
+    if entry is not None and entry[0] > now:
+        with _token_cache_lock:
+            if token in _token_cache:
+                _token_cache.move_to_end(token)
+        return entry[1]
+    
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    email: str = payload.get("sub")
+    if email is None:
+        return None
+    
+    user = get_user(db, email=email)
+    if user is None:
+        return None
+    
+    snapshot = _snapshot_user(user)
+    expiry = min(now + TOKEN_CACHE_TTL, payload.get("exp", now + TOKEN_CACHE_TTL))
+    with _token_cache_lock:
+        _token_cache[token] = (expiry, snapshot)
+        _token_cache.move_to_end(token)
+        while len(_token_cache) > TOKEN_CACHE_MAX_SIZE:
+            _token_cache.popitem(last=False)
+    return snapshot
+
+def invalidate_token_cache(user_id: Optional[int] = None, token: Optional[str] = None) -> None:
+    """
+    Drop cached token resolutions
+    
+    Args:
+        user_id: Drop every cached token of this user
+        token: Drop this token only
+    
+    With neither argument the whole cache is cleared.
+    """
+    with _token_cache_lock:
+        if token is not None:
+            _token_cache.pop(token, None)
+        if user_id is not None:
+            stale = [key for key, (_, user) in _token_cache.items() if user.id == user_id]
+            for key in stale:
+                del _token_cache[key]
+        if token is None and user_id is None:
+            _token_cache.clear()
+
 def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
     """Authenticate a user with email and password"""
     user = get_user(db, email)
@@ -70,6 +250,15 @@ def authenticate_user(db: Session, email: str, password: str) -> Optional[User]:
         return None
     return user
 
+async def authenticate_user_async(db: Session, email: str, password: str) -> Optional[User]:
+    """Authenticate a user with email and password, verifying the hash off the event loop"""
+    user = get_user(db, email)
+    if not user:
+        return None
+    if not await verify_password_async(password, user.hashed_password):
+        return None
+    return user
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme), 
     db: Session = Depends(get_session)
@@ -81,16 +270,7 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-        token_data = TokenData(email=email)
-    except JWTError:
-        raise credentials_exception
-        
-    user = get_user(db, email=token_data.email)
+    user = resolve_user_from_token(db, token)
     if user is None:
         raise credentials_exception
         
@@ -107,43 +287,64 @@ def create_token_from_google_user(user_info: dict) -> str:
     return create_access_token(data)
 
 # Permission utilities
-def get_user_permissions(db: Session, user: User) -> List[str]:
-    """Get all permissions for a user based on their roles"""
+# Resolved permission sets cached per user id as (expiry, permissions).
+# Entries are dropped by the role/permission mutation endpoints; the TTL only
+# bounds staleness across worker processes that did not see the mutation.
+PERMISSION_CACHE_TTL = 300  # seconds
+_permission_cache: Dict[int, Tuple[float, FrozenSet[str]]] = {}
+_permission_cache_lock = threading.Lock()
+
+def _load_user_permissions(db: Session, user: User) -> FrozenSet[str]:
+    """Resolve a user's permission names with a single query"""
     if user.is_superuser:
         # Superuser has all permissions
-        statement = select(Permission)
-        permissions = db.exec(statement).all()
-        return [p.name for p in permissions]
-    
-    # Query for UserRole to get roles
-    statement = select(UserRole).where(UserRole.user_id == user.id)
-    user_roles = db.exec(statement).all()
-    role_ids = [ur.role_id for ur in user_roles]
-    
-    if not role_ids:
-        return []
-    
-    # Query for RolePermission to get permissions
-    statement = select(RolePermission).where(RolePermission.role_id.in_(role_ids))
-    role_permissions = db.exec(statement).all()
-    permission_ids = [rp.permission_id for rp in role_permissions]
-    
-    if not permission_ids:
-        return []
+        statement = select(Permission.name)
+    else:
+        statement = (
+            select(Permission.name)
+            .join(RolePermission, RolePermission.permission_id == Permission.id)
+            .join(UserRole, UserRole.role_id == RolePermission.role_id)
+            .where(UserRole.user_id == user.id)
+            .distinct()
+        )
+    return frozenset(db.exec(statement).all())
+
+def get_cached_user_permissions(db: Session, user: User) -> FrozenSet[str]:
+    """Get the user's permission set, resolving it only on a cache miss"""
+    now = time.monotonic()
+    entry = _permission_cache.get(user.id)
+    if entry is not None and entry[0] > now:
+        return entry[1]
     
-    # Get actual permission names
-    statement = select(Permission).where(Permission.id.in_(permission_ids))
-    permissions = db.exec(statement).all()
+    permissions = _load_user_permissions(db, user)
+    with _permission_cache_lock:
+        _permission_cache[user.id] = (now + PERMISSION_CACHE_TTL, permissions)
+    return permissions
+
+def invalidate_permission_cache(user_id: Optional[int] = None) -> None:
+    """
+    Drop cached permission sets
     
-    return [p.name for p in permissions]
+    Args:
+        user_id: Only drop this user's entry; drop every entry if None
+            (role and role-permission changes can affect any user)
+    """
+    with _permission_cache_lock:
+        if user_id is None:
+            _permission_cache.clear()
+        else:
+            _permission_cache.pop(user_id, None)
+
+def get_user_permissions(db: Session, user: User) -> List[str]:
+    """Get all permissions for a user based on their roles"""
+    return sorted(get_cached_user_permissions(db, user))
 
 def user_has_permission(db: Session, user: User, permission_name: str) -> bool:
     """Check if a user has a specific permission"""
     if user.is_superuser:
         return True
     
-    user_permissions = get_user_permissions(db, user)
-    return permission_name in user_permissions
+    return permission_name in get_cached_user_permissions(db, user)
 
 def require_permission(permission_name: str):
     """Dependency to require a specific permission"""
@@ -1,10 +1,14 @@
 from sqlmodel import Session, select, func
-from typing import List, Optional, Type, TypeVar, Dict, Any
+from typing import Iterator, List, Optional, Type, TypeVar, Dict, Any
 from app.models import Client, Deal, Invoice, InvoiceItem, Task, Feedback, User
 from app.utils import format_money, format_date, truncate_text
+from app.utils.analytics_queries import client_totals, stage_totals
 
 T = TypeVar('T')
 
+# Rows fetched per round trip when streaming exports
+EXPORT_BATCH_SIZE = 1000
+
 # Generic CRUD operations
 def get_by_id(db: Session, model: Type[T], id: int) -> Optional[T]:
     """Get a record by ID"""
@@ -97,67 +101,120 @@ def delete(db: Session, model: Type[T], id: int) -> bool:
         raise
 
 # Specific operations
+def iter_clients_with_export_data(
+    db: Session,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    user_id: Optional[int] = None
+) -> Iterator[dict]:
+    """
+    Stream clients formatted for export, fetching batch_size rows at a time
+    
+    Passing user_id limits the rows to that user's clients. The caller
+    must finish iterating before the session is closed.
+    """
+    # Select only the exported columns so no Client objects are hydrated
+    statement = select(
+        Client.id,
+        Client.name,
+        Client.email,
+        Client.phone,
+        Client.notes,
+        Client.created_at
+    ).order_by(Client.id)
+    if user_id is not None:
+        statement = statement.where(Client.user_id == user_id)
+    rows = db.exec(statement.execution_options(yield_per=batch_size))
+    
+    for client_id, name, email, phone, notes, created_at in rows:
+        yield {
+            "id": client_id,
+            "name": name,
+            "email": email or "",
+            "phone": phone or "",
+            "notes": notes or "",
+            "created_at": created_at.isoformat() if created_at else ""
+        }
+
 def get_clients_with_export_data(db: Session) -> List[dict]:
     """Get clients with data formatted for CSV export"""
-    statement = select(Client)
-    clients = db.exec(statement).all()
+    return list(iter_clients_with_export_data(db))
+
+def iter_invoices_with_export_data(
+    db: Session,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    user_id: Optional[int] = None
+) -> Iterator[dict]:
+    """
+    Stream invoices formatted for export, fetching batch_size rows at a time
     
-    # Convert clients to dict for CSV export
-    result = []
-    for client in clients:
-        client_dict = {
-            "id": client.id,
-            "name": client.name, 
-            "email": client.email or "",
-            "phone": client.phone or "",
-            "notes": client.notes or "",
-            "created_at": client.created_at.isoformat() if client.created_at else ""
-        }
-        result.append(client_dict)
+    Passing user_id limits the rows to that user's clients. The caller
+    must finish iterating before the session is closed.
+    """
+    # Join the client name in the same query instead of lazy-loading
+    # invoice.client once per row
+    statement = select(
+        Invoice.id,
+        Client.name,
+        Invoice.number,
+        Invoice.total,
+        Invoice.status,
+        Invoice.due_date
+    ).outerjoin(Client, Invoice.client_id == Client.id).order_by(Invoice.id)
+    if user_id is not None:
+        statement = statement.where(Client.user_id == user_id)
+    rows = db.exec(statement.execution_options(yield_per=batch_size))
     
-    return result
+    for invoice_id, client_name, number, total, status, due_date in rows:
+        yield {
+            "id": invoice_id,
+            "client_name": client_name or "",
+            "invoice_number": number,
+            "total": total / 100,  # Convert cents to dollars/euros
+            "status": status,
+            "due_date": due_date.isoformat() if due_date else ""
+        }
 
 def get_invoices_with_export_data(db: Session) -> List[dict]:
     """Get invoices with data formatted for CSV export"""
-    statement = select(Invoice)
-    invoices = db.exec(statement).all()
+    return list(iter_invoices_with_export_data(db))
+
+def iter_deals_with_export_data(
+    db: Session,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    user_id: Optional[int] = None
+) -> Iterator[dict]:
+    """
+    Stream deals formatted for export, fetching batch_size rows at a time
     
-    # Convert invoices to dict for CSV export
-    result = []
-    for invoice in invoices:
-        client = invoice.client
-        invoice_dict = {
-            "id": invoice.id,
-            "client_name": client.name if client else "",
-            "invoice_number": invoice.number,
-            "total": invoice.total / 100,  # Convert cents to dollars/euros
-            "status": invoice.status,
-            "due_date": invoice.due_date.isoformat() if invoice.due_date else ""
-        }
-        result.append(invoice_dict)
+    Passing user_id limits the rows to that user's clients. The caller
+    must finish iterating before the session is closed.
+    """
+    # Join the client name in the same query instead of lazy-loading
+    # deal.client once per row
+    statement = select(
+        Deal.id,
+        Client.name,
+        Deal.stage,
+        Deal.value,
+        Deal.updated_at
+    ).outerjoin(Client, Deal.client_id == Client.id).order_by(Deal.id)
+    if user_id is not None:
+        statement = statement.where(Client.user_id == user_id)
+    rows = db.exec(statement.execution_options(yield_per=batch_size))
     
-    return result
+    for deal_id, client_name, stage, value, updated_at in rows:
+        yield {
+            "id": deal_id,
+            "client_name": client_name or "",
+            "stage": stage,
+            "value": value / 100,  # Convert cents to dollars/euros
+            "value_formatted": format_money(value),
+            "updated_at": format_date(updated_at) if updated_at else ""
+        }
 
 def get_deals_with_export_data(db: Session) -> List[dict]:
     """Get deals with data formatted for CSV export"""
-    statement = select(Deal)
-    deals = db.exec(statement).all()
-    
-    # Convert deals to dict for CSV export
-    result = []
-    for deal in deals:
-        client = deal.client
-        deal_dict = {
-            "id": deal.id,
-            "client_name": client.name if client else "",
-            "stage": deal.stage,
-            "value": deal.value / 100,  # Convert cents to dollars/euros
-            "value_formatted": format_money(deal.value),
-            "updated_at": format_date(deal.updated_at) if deal.updated_at else ""
-        }
-        result.append(deal_dict)
-    
-    return result
+    return list(iter_deals_with_export_data(db))
 
 def get_deals_by_stage(db: Session) -> Dict[str, List[Dict[str, Any]]]:
     """Get all deals organized by stage with client information"""
@@ -193,13 +250,14 @@ def get_deals_by_stage(db: Session) -> Dict[str, List[Dict[str, Any]]]:
         # Return empty structure on error
         return {"lead": [], "proposed": [], "won": []}
 
-def calculate_pipeline_value(db: Session) -> Dict[str, int]:
+def calculate_pipeline_value(db: Session, user_id: Optional[int] = None) -> Dict[str, int]:
     """Calculate the total value of deals in each stage"""
     try:
-        # More efficient: use SQL aggregation instead of Python iteration
-        lead_value = db.query(func.sum(Deal.value)).filter(Deal.stage == "lead").scalar() or 0
-        proposed_value = db.query(func.sum(Deal.value)).filter(Deal.stage == "proposed").scalar() or 0
-        won_value = db.query(func.sum(Deal.value)).filter(Deal.stage == "won").scalar() or 0
+        # All stages in a single GROUP BY
+        totals = stage_totals(db, user_id=user_id)
+        lead_value = totals["lead"]["value"]
+        proposed_value = totals["proposed"]["value"]
+        won_value = totals["won"]["value"]
         
         # Return dictionary with values
         total = lead_value + proposed_value + won_value
@@ -221,41 +279,14 @@ def get_user_by_email(db: Session, email: str) -> Optional[User]:
     statement = select(User).where(User.email == email)
     return db.exec(statement).first()
 
-def get_client_distribution(db: Session) -> List[Dict[str, Any]]:
+def get_client_distribution(db: Session, user_id: Optional[int] = None, limit: Optional[int] = None) -> List[Dict[str, Any]]:
     """Get client distribution for reporting"""
     try:
-        # Get all deals with client information
-        statement = select(Deal, Client).join(Client, Deal.client_id == Client.id)
-        results = db.exec(statement).all()
-        
-        # Organize data by client
-        client_data = {}
-        for deal, client in results:
-            if client.id not in client_data:
-                client_data[client.id] = {
-                    "name": client.name,
-                    "deal_count": 0,
-                    "total_value": 0
-                }
-            
-            client_data[client.id]["deal_count"] += 1
-            client_data[client.id]["total_value"] += deal.value
-        
-        # Convert to list and sort by total value
-        clients_list = [
-            {
-                "id": client_id,
-                "name": data["name"],
-                "deal_count": data["deal_count"],
-                "total_value": data["total_value"],
-                "total_value_formatted": format_money(data["total_value"])
-            }
-            for client_id, data in client_data.items()
+        # Deal count and value per client, aggregated by the database
+        return [
+            {**client, "total_value_formatted": format_money(client["total_value"])}
+            for client in client_totals(db, user_id=user_id, limit=limit)
         ]
-        
-        clients_list.sort(key=lambda x: x["total_value"], reverse=True)
-        
-        return clients_list
     except Exception as e:
         # Log the error for debugging
         print(f"Error getting client distribution: {str(e)}")
@@ -0,0 +1,58 @@
+"""
+Deferred imports for heavy optional-path libraries.
+
+pandas, matplotlib, reportlab, weasyprint and httpx together take seconds to
+import but are only needed by exports, charts, PDFs and OAuth. Modules bind
+them through lazy_module() so the real import happens on first attribute
+access instead of when the app starts:
+
+    pd = lazy_module("pandas")
+    pd.DataFrame(rows)  # pandas is imported here
+"""
+
+import importlib
+import threading
+import types
+from typing import Any, Optional
+
+
+class LazyModule(types.ModuleType):
+    """Module stand-in that imports the real module on first attribute access"""
+
+    def __init__(self, name: str):
+        super().__init__(name)
+        self._lazy_module: Optional[types.ModuleType] = None
+        self._lazy_lock = threading.Lock()
+
+    def _load(self) -> types.ModuleType:
+        module = self._lazy_module
+        if module is None:
+            with self._lazy_lock:
+                if self._lazy_module is None:
+                    self._lazy_module = importlib.import_module(self.__name__)
+                module = self._lazy_module
+        return module
+
+    def __getattr__(self, attr: str) -> Any:
+        # Only called for names not set on the stand-in itself
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = "loaded" if self._lazy_module is not None else "not loaded"
+        return f"<lazy module {self.__name__!r} ({state})>"
+
+
+def lazy_module(name: str) -> LazyModule:
+    """
+    Return a stand-in for a module that is imported on first use
+
+    Args:
+        name: Dotted module name, e.g. "pandas" or "reportlab.lib.colors"
+
+    Returns:
+        Object forwarding attribute access to the imported module
+    """
+    return LazyModule(name)
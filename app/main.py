@@ -1,44 +1,79 @@
-from fastapi import FastAPI, Depends, HTTPException, Request, status, Body, Cookie
+from fastapi import FastAPI, BackgroundTasks, Depends, HTTPException, Query, Request, status, Body, Cookie
 from fastapi.security import OAuth2AuthorizationCodeBearer, OAuth2PasswordRequestForm
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse, FileResponse, Response, RedirectResponse, JSONResponse
-import httpx
+from fastapi.concurrency import run_in_threadpool
+import asyncio
 import json
 import os
 from pathlib import Path
 from datetime import datetime, timedelta
-import csv
-from io import StringIO
 from sqlmodel import Session, select, col, or_
 from typing import List, Optional, Dict, Any
-import jwt
-import pandas as pd
 import base64
-from io import BytesIO
-import matplotlib.pyplot as plt
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend
 
-from app.database import create_db_and_tables, get_session, create_demo_data
+from app.database import create_db_and_tables, get_session
 from app.models import Client, Deal, Invoice, InvoiceItem, Task, Feedback, ClientCreate, ClientRead, ClientUpdate, User
 from app.models import DealCreate, DealRead, DealUpdate, DealMoveUpdate, DealStage
 from app import crud
-from app.utils import format_money, format_date, generate_pipeline_summary_pdf, generate_client_distribution_pdf, generate_dashboard_pdf
-from app.utils.excel_exports import generate_pipeline_excel, generate_clients_excel, generate_deals_excel
+from app.lazy_imports import lazy_module
+from app.utils import format_money, format_date
 from app.auth import (
-    authenticate_user, 
+    authenticate_user_async,
+    login_rate_limiter,
+    login_rate_limit_key,
     create_access_token, 
     get_current_user, 
     create_token_from_google_user,
     Token,
-    SECRET_KEY,
-    ALGORITHM,
     get_password_hash,
-    require_permission
+    require_permission,
+    invalidate_permission_cache,
+    invalidate_token_cache,
+    resolve_user_from_token
 )
 from app.models import NotificationType, Notification, Permission, Role, RolePermission, UserRole
+from app.models import PermissionRead, RoleCreate, RoleRead, RoleUpdate
+from app.models import ReportJob, ReportJobCreate, ReportJobRead, ReportJobStatus
 from app.utils.background_tasks import create_notification_with_email
+from app.utils.unit_of_work import UnitOfWork, get_unit_of_work
+from app.utils.time_series import format_dates
+from app.utils.analytics_queries import stage_totals
+from app.utils.charts import (
+    CHART_MEDIA_TYPES,
+    chart_renderer_stats,
+    chart_response,
+    deals_by_stage_series,
+    pipeline_value_series,
+    render_chart,
+    start_chart_renderer,
+    stop_chart_renderer
+)
+from app.utils.metrics import latency_snapshot
+from app.utils.reports import build_dashboard_pdf
+from app.utils.report_jobs import (
+    get_report_type,
+    get_user_report_job,
+    load_report,
+    report_cache_key,
+    run_report_maintenance,
+    stop_report_workers,
+    submit_report_job
+)
+from app.utils.artifact_cache import get_artifact_cache
+from app.utils.downloads import ranged_file_response
+from app.utils.csv_exports import csv_response
+from app.utils.columnar_exports import columnar_response
+from app.middleware import add_compression_middleware
+from app.utils.ndjson import ndjson_response, wants_ndjson
+from app.utils.serializers import CLIENT_READ, DEAL_READ, NOTIFICATION_READ, ORJSONResponse
+from app.utils.notifications import mark_all_read, mark_read, unread_count
+from app.utils.outbox import OUTBOX_DISPATCH_IN_APP, run_outbox_dispatcher
+from app.utils.stage_history import record_stage_change, stage_value_series
+
+# Only the OAuth callback makes outbound HTTP calls
+httpx = lazy_module("httpx")
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -62,6 +97,9 @@ app = FastAPI(
     ]
 )
 
+# Compress text responses, flushing each chunk of streamed exports
+add_compression_middleware(app, minimum_size=1024)
+
 # Set up templates and static files
 templates = Jinja2Templates(directory="app/templates")
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
@@ -84,10 +122,60 @@ def on_startup():
     run_migrations()
     
     create_db_and_tables()
-    create_demo_data()
+    
+    # Indexes added to existing tables are not created by create_all
+    from migrations.ensure_indexes import run_ensure_indexes
+    run_ensure_indexes()
+    
+    # Seed stage history for deals that predate the event table (once, by one worker)
+    from migrations.backfill_stage_history import run_backfill
+    run_backfill()
+    
+    # Count unread notifications that predate the counter table (once, by one worker)
+    from migrations.backfill_notification_counters import run_backfill as run_counter_backfill
+    run_counter_backfill()
     
     print("App started successfully!")
 
+@app.on_event("startup")
+async def start_background_jobs():
+    # Precompute every user's pipeline forecast once a day
+    from app.utils.predictive_analytics import run_nightly_forecasts
+    app.state.forecast_job = asyncio.create_task(run_nightly_forecasts())
+    
+    # Spawn the chart render workers now so the first chart request is warm
+    start_chart_renderer()
+    
+    # Pick up report jobs interrupted by the last shutdown and expire old reports
+    from app.database import engine
+    app.state.report_maintenance = asyncio.create_task(run_report_maintenance(engine))
+    
+    # Deliver queued emails, unless scripts/run_outbox_dispatcher.py does
+    if OUTBOX_DISPATCH_IN_APP:
+        app.state.outbox_dispatcher = asyncio.create_task(run_outbox_dispatcher(engine))
+
+@app.on_event("shutdown")
+async def stop_background_jobs():
+    for task_name in ("forecast_job", "report_maintenance", "outbox_dispatcher"):
+        task = getattr(app.state, task_name, None)
+        if task:
+            task.cancel()
+    stop_chart_renderer()
+    stop_report_workers()
+
+# Auth middleware to get current user from cookie
+async def get_current_user_from_cookie(
+    request: Request,
+    access_token: str = Cookie(None),
+    db: Session = Depends(get_session)
+) -> Optional[User]:
+    """Get current user from cookie for templates"""
+    if not access_token:
+        return None
+    
+    token = access_token.replace("Bearer ", "")
+    return resolve_user_from_token(db, token)
+
 # Routes
 @app.get("/", response_class=HTMLResponse)
 async def root(
@@ -201,14 +289,19 @@ def create_client(*, session: Session = Depends(get_session), client: ClientCrea
     return db_client
 
 @app.get("/api/clients/", response_model=List[ClientRead], tags=["clients"])
-def read_clients(*, session: Session = Depends(get_session)):
+def read_clients(*, request: Request, session: Session = Depends(get_session)):
     """
     Get all clients
     
-    Returns a list of all clients
+    Returns a list of all clients, streamed one per line when the client
+    accepts application/x-ndjson
     """
-    clients = session.exec(select(Client)).all()
-    return clients
+    query = select(Client)
+    if wants_ndjson(request):
+        return ndjson_response(session, query, CLIENT_READ)
+    
+    rows = session.execute(CLIENT_READ.select(query)).all()
+    return ORJSONResponse(CLIENT_READ.dumps(rows))
 
 @app.get("/api/clients/{client_id}", response_model=ClientRead)
 def read_client(*, session: Session = Depends(get_session), client_id: int):
@@ -254,6 +347,18 @@ def create_deal(*, session: Session = Depends(get_session), deal: DealCreate):
     """
     db_deal = Deal.from_orm(deal)
     session.add(db_deal)
+    session.flush()
+    
+    # Record the deal entering its first stage in the same transaction
+    owner_id = session.exec(select(Client.user_id).where(Client.id == db_deal.client_id)).first()
+    if owner_id is not None:
+        record_stage_change(
+            session, owner_id, db_deal.id,
+            from_stage=None, from_value=0,
+            to_stage=db_deal.stage, to_value=db_deal.value,
+            at=db_deal.created_at
+        )
+    
     session.commit()
     session.refresh(db_deal)
     return db_deal
@@ -261,6 +366,7 @@ def create_deal(*, session: Session = Depends(get_session), deal: DealCreate):
 @app.get("/api/deals/", response_model=List[DealRead], tags=["deals"])
 def read_deals(
     *,
+    request: Request,
     session: Session = Depends(get_session),
     stage: str = None,
     client_id: int = None,
@@ -272,7 +378,9 @@ def read_deals(
     """
     Get all deals with advanced filtering
     
-    Returns a list of all deals, optionally filtered by various parameters
+    Returns a list of all deals, optionally filtered by various parameters.
+    Clients that accept application/x-ndjson get one deal per line, streamed
+    as the rows are read.
     
     Parameters:
     - **stage**: Filter by deal stage (lead, proposed, won)
@@ -325,8 +433,11 @@ def read_deals(
         # Default sort: most recently updated first
         query = query.order_by(Deal.updated_at.desc())
     
-    deals = session.exec(query).all()
-    return deals
+    if wants_ndjson(request):
+        return ndjson_response(session, query, DEAL_READ)
+    
+    rows = session.execute(DEAL_READ.select(query)).all()
+    return ORJSONResponse(DEAL_READ.dumps(rows))
 
 @app.get("/api/deals/{deal_id}", response_model=DealRead)
 def read_deal(*, session: Session = Depends(get_session), deal_id: int):
@@ -338,41 +449,46 @@ def read_deal(*, session: Session = Depends(get_session), deal_id: int):
 @app.patch("/api/deals/{deal_id}", response_model=DealRead)
 def update_deal(
     *, 
-    session: Session = Depends(get_session), 
+    uow: UnitOfWork = Depends(get_unit_of_work), 
     deal_id: int, 
     deal: DealUpdate,
-    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user)
 ):
     """Update a deal"""
-    # Get the deal
-    statement = select(Deal).where(Deal.id == deal_id)
-    db_deal = session.exec(statement).first()
-    if not db_deal:
+    # Get the deal together with its client name and owner in one query
+    statement = (
+        select(Deal, Client.name, Client.user_id)
+        .outerjoin(Client, Deal.client_id == Client.id)
+        .where(Deal.id == deal_id)
+    )
+    row = uow.session.exec(statement).first()
+    if not row:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Deal with ID {deal_id} not found"
         )
+    db_deal, client_name, owner_id = row
+    client_name = client_name or "Unknown Client"
     
     # Check if stage is being updated
     stage_changed = deal.stage is not None and deal.stage != db_deal.stage
+    old_stage, old_value = db_deal.stage, db_deal.value
     
     # Update deal attributes
     for key, value in deal.dict(exclude_unset=True).items():
         setattr(db_deal, key, value)
     
-    session.add(db_deal)
-    session.commit()
-    session.refresh(db_deal)
+    uow.add(db_deal)
+    if owner_id is not None:
+        record_stage_change(
+            uow.session, owner_id, deal_id,
+            from_stage=old_stage, from_value=old_value,
+            to_stage=db_deal.stage, to_value=db_deal.value
+        )
     
     # Create notification
     notification_type = NotificationType.DEAL_STAGE_CHANGED if stage_changed else NotificationType.DEAL_UPDATED
     
-    # Get client info for notification
-    statement = select(Client).where(Client.id == db_deal.client_id)
-    client = session.exec(statement).first()
-    client_name = client.name if client else "Unknown Client"
-    
     # Create title and message based on notification type
     if stage_changed:
         title = f"Deal stage changed to {db_deal.stage}"
@@ -381,27 +497,30 @@ def update_deal(
         title = "Deal updated"
         message = f"Deal with {client_name} has been updated"
     
-    # Create notification and send email
+    # Stage notification and email alongside the deal change
     create_notification_with_email(
-        background_tasks=background_tasks,
-        db=session,
-        user_id=current_user.id,
+        uow=uow,
+        user=current_user,
         notification_type=notification_type,
         title=title,
         message=message,
         entity_type="deal",
-        entity_id=deal_id
+        entity_id=deal_id,
+        deal=db_deal,
+        client_name=client_name
     )
     
+    # Deal update and notification are written in a single commit
+    uow.commit()
+    
     return db_deal
 
 @app.patch("/api/deals/{deal_id}/move", response_model=DealRead, tags=["deals"])
 def move_deal(
     *, 
-    session: Session = Depends(get_session), 
+    uow: UnitOfWork = Depends(get_unit_of_work), 
     deal_id: int, 
     move: DealMoveUpdate,
-    background_tasks: BackgroundTasks,
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -412,13 +531,17 @@ def move_deal(
     Parameters:
     - **new_stage**: The new stage to move the deal to (lead, proposed, won)
     """
-    db_deal = session.get(Deal, deal_id)
-    if not db_deal:
+    # Get the deal, the client name for the notification and the owner in one query
+    statement = (
+        select(Deal, Client.name, Client.user_id)
+        .outerjoin(Client, Deal.client_id == Client.id)
+        .where(Deal.id == deal_id)
+    )
+    row = uow.session.exec(statement).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Deal not found")
-    
-    # Get the client name for the notification
-    client = session.get(Client, db_deal.client_id)
-    client_name = client.name if client else "Unknown Client"
+    db_deal, client_name, owner_id = row
+    client_name = client_name or "Unknown Client"
     
     # Save the old stage for the notification
     old_stage = db_deal.stage
@@ -427,9 +550,14 @@ def move_deal(
     db_deal.stage = move.new_stage
     db_deal.updated_at = datetime.utcnow()
     
-    session.add(db_deal)
-    session.commit()
-    session.refresh(db_deal)
+    uow.add(db_deal)
+    if owner_id is not None:
+        record_stage_change(
+            uow.session, owner_id, deal_id,
+            from_stage=old_stage, from_value=db_deal.value,
+            to_stage=db_deal.stage, to_value=db_deal.value,
+            at=db_deal.updated_at
+        )
     
     # Create a notification for the stage change
     stage_labels = {
@@ -444,25 +572,43 @@ def move_deal(
     notification_title = f"Deal Moved: {client_name}"
     notification_message = f"Deal with {client_name} moved from {old_stage_label} to {new_stage_label}"
     
-    # Create notification and send email
+    # Stage notification and email alongside the deal change
     create_notification_with_email(
-        background_tasks=background_tasks,
-        db=session,
-        user_id=current_user.id,
+        uow=uow,
+        user=current_user,
         notification_type=NotificationType.DEAL_STAGE_CHANGED,
         title=notification_title,
         message=notification_message,
         entity_type="deal",
-        entity_id=deal_id
+        entity_id=deal_id,
+        deal=db_deal,
+        client_name=client_name
     )
     
+    # Deal move and notification are written in a single commit
+    uow.commit()
+    
     return db_deal
 
 @app.delete("/api/deals/{deal_id}")
 def delete_deal(*, session: Session = Depends(get_session), deal_id: int):
-    deal = session.get(Deal, deal_id)
-    if not deal:
+    statement = (
+        select(Deal, Client.user_id)
+        .outerjoin(Client, Deal.client_id == Client.id)
+        .where(Deal.id == deal_id)
+    )
+    row = session.exec(statement).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Deal not found")
+    deal, owner_id = row
+    
+    # Record the deal leaving the pipeline alongside the delete
+    if owner_id is not None:
+        record_stage_change(
+            session, owner_id, deal_id,
+            from_stage=deal.stage, from_value=deal.value,
+            to_stage=None, to_value=0
+        )
     
     session.delete(deal)
     session.commit()
@@ -476,18 +622,18 @@ def get_pipeline_summary(db: Session = Depends(get_session)):
     
     Returns counts and values for deals in each stage and the total pipeline value
     """
-    # Get all deals
-    deals = crud.get_all(db, Deal)
+    # Count and value of deals by stage in one aggregate query
+    totals = stage_totals(db)
     
     # Calculate total value by stage
-    lead_value = sum(deal.value for deal in deals if deal.stage == "lead")
-    proposed_value = sum(deal.value for deal in deals if deal.stage == "proposed")
-    won_value = sum(deal.value for deal in deals if deal.stage == "won")
+    lead_value = totals["lead"]["value"]
+    proposed_value = totals["proposed"]["value"]
+    won_value = totals["won"]["value"]
     
     # Count deals by stage
-    lead_count = sum(1 for deal in deals if deal.stage == "lead")
-    proposed_count = sum(1 for deal in deals if deal.stage == "proposed")
-    won_count = sum(1 for deal in deals if deal.stage == "won")
+    lead_count = totals["lead"]["count"]
+    proposed_count = totals["proposed"]["count"]
+    won_count = totals["won"]["count"]
     
     # Total pipeline value
     total_pipeline = lead_value + proposed_value + won_value
@@ -519,56 +665,58 @@ def get_pipeline_summary(db: Session = Depends(get_session)):
 
 # CSV Export endpoint
 @app.get("/export/csv", tags=["export"])
-async def export_csv(db: Session = Depends(get_session)):
+def export_csv(
+    db: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
     """
     Export clients data to CSV
     
-    Returns a downloadable CSV file with client information
+    Returns a downloadable CSV file with the current user's clients
     """
-    # Get client data from database
-    clients = crud.get_clients_with_export_data(db)
-    
-    # If no clients exist yet, provide sample data
-    if not clients:
-        clients = [
-            {"id": 1, "name": "Acme Corp", "email": "contact@acme.com", "phone": "123-456-7890"},
-            {"id": 2, "name": "Globex", "email": "info@globex.com", "phone": "555-123-4567"},
-            {"id": 3, "name": "Initech", "email": "hello@initech.com", "phone": "987-654-3210"},
-        ]
-    
-    # Create CSV
-    output = StringIO()
-    if clients:
-        fieldnames = clients[0].keys()
-        writer = csv.DictWriter(output, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(clients)
-    
-    # Return as downloadable file
-    csv_content = output.getvalue()
+    return csv_response(db, "clients", current_user.id)
+
+@app.get("/export/csv/{entity}", tags=["export"])
+def export_entity_csv(
+    entity: str,
+    db: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Export the current user's clients, deals or invoices to CSV
     
-    response = Response(content=csv_content, media_type="text/csv")
-    response.headers["Content-Disposition"] = "attachment; filename=clients.csv"
-    return response
+    The file is streamed in chunks as rows are read, so the download starts
+    immediately regardless of table size.
+    """
+    return csv_response(db, entity, current_user.id)
 
 @app.post("/token", response_model=Token, tags=["auth"])
 async def login_for_access_token(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_session)
 ):
     """
     Login with username/password for JWT token
     
-    Returns an access token and user information upon successful authentication
+    Returns an access token and user information upon successful authentication.
+    Failed attempts are throttled per client address and username, and
+    password verification runs on a bounded hashing pool so it never blocks
+    other requests.
     """
-    user = authenticate_user(db, form_data.username, form_data.password)
+    rate_limit_key = login_rate_limit_key(request.client.host if request.client else None, form_data.username)
+    login_rate_limiter.check(rate_limit_key)
+    
+    user = await authenticate_user_async(db, form_data.username, form_data.password)
     if not user:
+        login_rate_limiter.record_failure(rate_limit_key)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
     
+    login_rate_limiter.reset(rate_limit_key)
     access_token = create_access_token(data={"sub": user.email})
     
     # Return the token and user info
@@ -598,66 +746,76 @@ async def read_users_me(
     }
 
 @app.get("/logout", tags=["auth"])
-async def logout():
+async def logout(access_token: str = Cookie(None)):
     """
     Logout the current user
     
     Clears the authentication cookie and redirects to the login page
     """
+    if access_token:
+        invalidate_token_cache(token=access_token.replace("Bearer ", ""))
+    
     response = RedirectResponse(url="/login")
     response.delete_cookie("access_token")
     return response
 
-# Auth middleware to get current user from cookie
-async def get_current_user_from_cookie(
-    request: Request,
-    access_token: str = Cookie(None),
-    db: Session = Depends(get_session)
-) -> Optional[User]:
-    """Get current user from cookie for templates"""
-    if not access_token:
-        return None
-    
-    try:
-        token = access_token.replace("Bearer ", "")
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            return None
-        
-        statement = select(User).where(User.email == email)
-        user = db.exec(statement).first()
-        return user
-    except:
-        return None
-
 # Add notification endpoints
 @app.get("/api/notifications/", tags=["notifications"])
 def get_notifications(
     *,
+    request: Request,
     session: Session = Depends(get_session),
     current_user: User = Depends(get_current_user),
     unread_only: bool = False,
-    limit: int = 10
+    limit: int = 10,
+    before_id: Optional[int] = None
 ):
     """
     Get user notifications
     
-    Returns a list of notifications for the current user
+    Returns a page of notifications for the current user, newest first,
+    streamed one per line when the client accepts application/x-ndjson.
+    When the page is full, the X-Next-Cursor header holds the `before_id`
+    for the next page.
     
     Parameters:
     - **unread_only**: If true, returns only unread notifications
     - **limit**: Maximum number of notifications to return
+    - **before_id**: Only return notifications older than this one
     """
     query = select(Notification).where(Notification.user_id == current_user.id)
     
     if unread_only:
         query = query.where(Notification.is_read == False)
     
-    query = query.order_by(Notification.created_at.desc()).limit(limit)
+    # Keyset pagination over the (user_id, [is_read,] id) indexes
+    if before_id is not None:
+        query = query.where(Notification.id < before_id)
+    
+    query = query.order_by(Notification.id.desc()).limit(limit)
+    
+    if wants_ndjson(request):
+        return ndjson_response(session, query, NOTIFICATION_READ)
+    
+    rows = session.execute(NOTIFICATION_READ.select(query)).all()
+    response = ORJSONResponse(NOTIFICATION_READ.dumps(rows))
+    if rows and len(rows) == limit:
+        response.headers["X-Next-Cursor"] = str(rows[-1].id)
+    return response
+
+@app.get("/api/notifications/unread-count", tags=["notifications"])
+def get_unread_notification_count(
+    *,
+    session: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get the number of unread notifications
     
-    notifications = session.exec(query).all()
-    return notifications
+    Read from the user's unread counter, which is kept up to date as
+    notifications are created and read
+    """
+    return {"unread": unread_count(session, current_user.id)}
 
 @app.patch("/api/notifications/{notification_id}/read", tags=["notifications"])
 def mark_notification_read(
@@ -679,8 +837,7 @@ def mark_notification_read(
     if notification.user_id != current_user.id:
         raise HTTPException(status_code=403, detail="Not authorized to access this notification")
     
-    notification.is_read = True
-    session.add(notification)
+    mark_read(session, notification)
     session.commit()
     
     return {"success": True}
@@ -696,20 +853,10 @@ def mark_all_notifications_read(
     
     Updates all notifications for the current user to mark them as read
     """
-    query = select(Notification).where(
-        Notification.user_id == current_user.id,
-        Notification.is_read == False
-    )
-    
-    unread_notifications = session.exec(query).all()
-    
-    for notification in unread_notifications:
-        notification.is_read = True
-        session.add(notification)
-    
+    count = mark_all_read(session, current_user.id)
     session.commit()
     
-    return {"success": True, "count": len(unread_notifications)}
+    return {"success": True, "count": count}
 
 # Add dashboard page
 @app.get("/dashboard", response_class=HTMLResponse)
@@ -762,19 +909,11 @@ def get_pipeline_trends(
     # Calculate the start date
     start_date = datetime.utcnow() - timedelta(days=days)
     
-    # Get all deals updated within the date range
-    statement = select(Deal).where(Deal.updated_at >= start_date)
-    deals = db.exec(statement).all()
+    # Pipeline value per stage for every day in the range, in cents,
+    # read from the daily stage rollups
+    dates, totals = stage_value_series(db, start_date.date(), user_id=current_user.id)
     
-    # Convert to DataFrame for easier analysis
-    deals_data = [{
-        'id': deal.id,
-        'value': deal.value,
-        'stage': deal.stage,
-        'updated_at': deal.updated_at.date()
-    } for deal in deals]
-    
-    if not deals_data:
+    if not totals.any():
         return {
             "dates": [],
             "lead_values": [],
@@ -782,32 +921,10 @@ def get_pipeline_trends(
             "won_values": []
         }
     
-    df = pd.DataFrame(deals_data)
-    
-    # Get unique dates in the range
-    date_range = pd.date_range(start=start_date.date(), end=datetime.utcnow().date())
-    date_strings = [d.strftime('%Y-%m-%d') for d in date_range]
-    
-    # Initialize results
-    lead_values = []
-    proposed_values = []
-    won_values = []
-    
-    # For each date, calculate the pipeline value
-    for date in date_range:
-        date_deals = df[df['updated_at'] <= date]
-        
-        # Sum values by stage
-        lead_value = date_deals[date_deals['stage'] == 'lead']['value'].sum() / 100
-        proposed_value = date_deals[date_deals['stage'] == 'proposed']['value'].sum() / 100
-        won_value = date_deals[date_deals['stage'] == 'won']['value'].sum() / 100
-        
-        lead_values.append(float(lead_value))
-        proposed_values.append(float(proposed_value))
-        won_values.append(float(won_value))
+    lead_values, proposed_values, won_values = (totals / 100).tolist()
     
     return {
-        "dates": date_strings,
+        "dates": format_dates(dates),
         "lead_values": lead_values,
         "proposed_values": proposed_values,
         "won_values": won_values
@@ -823,13 +940,11 @@ def get_conversion_rates(
     
     Returns conversion rates between deal stages
     """
-    # Get all deals
-    deals = db.exec(select(Deal)).all()
-    
     # Count deals in each stage
-    lead_count = sum(1 for deal in deals if deal.stage == 'lead')
-    proposed_count = sum(1 for deal in deals if deal.stage == 'proposed')
-    won_count = sum(1 for deal in deals if deal.stage == 'won')
+    totals = stage_totals(db, user_id=current_user.id)
+    lead_count = totals['lead']['count']
+    proposed_count = totals['proposed']['count']
+    won_count = totals['won']['count']
     
     # Calculate conversion rates
     lead_to_proposed = 0
@@ -894,6 +1009,20 @@ def get_client_distribution(
     # Take top 10 clients only
     return clients_list[:10]
 
+def _deals_by_stage_counts(db: Session, user_id: int) -> List[int]:
+    """Lead, proposed and won deal counts plotted by the deals-by-stage chart"""
+    return deals_by_stage_series(stage_totals(db, user_id=user_id))
+
+def _pipeline_values(db: Session, user_id: int) -> List[float]:
+    """Lead, proposed, won and total pipeline value in dollars plotted by the pipeline-value chart"""
+    return pipeline_value_series(stage_totals(db, user_id=user_id))
+
+def _chart_format(fmt: str) -> str:
+    """Validate the image format of a chart route"""
+    if fmt not in CHART_MEDIA_TYPES:
+        raise HTTPException(status_code=404, detail=f"Unsupported chart format: {fmt}")
+    return fmt
+
 @app.get("/api/analytics/deals-by-stage-chart", tags=["analytics"])
 def get_deals_by_stage_chart(
     db: Session = Depends(get_session),
@@ -902,40 +1031,40 @@ def get_deals_by_stage_chart(
     """
     Get a chart of deals by stage
     
-    Returns a base64-encoded PNG image of a pie chart showing deal distribution by stage
+    Returns a base64-encoded PNG image of a pie chart showing deal distribution by stage.
+    Prefer /api/analytics/deals-by-stage-chart.png, which serves the image directly.
     """
-    # Get all deals
-    deals = db.exec(select(Deal)).all()
-    
-    # Count deals in each stage
-    lead_count = sum(1 for deal in deals if deal.stage == 'lead')
-    proposed_count = sum(1 for deal in deals if deal.stage == 'proposed')
-    won_count = sum(1 for deal in deals if deal.stage == 'won')
-    
-    # Create pie chart
-    labels = ['Lead', 'Proposed', 'Won']
-    sizes = [lead_count, proposed_count, won_count]
-    colors = ['#3498db', '#f39c12', '#2ecc71']
+    counts = _deals_by_stage_counts(db, current_user.id)
     
     # Skip empty data
-    if sum(sizes) == 0:
+    if sum(counts) == 0:
         return {"error": "No deals data available"}
     
-    fig, ax = plt.subplots(figsize=(8, 6))
-    ax.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90)
-    ax.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle
-    plt.title('Deals by Stage')
+    image, _ = render_chart("deals-by-stage", counts)
+    img_base64 = base64.b64encode(image).decode('utf-8')
     
-    # Save to a BytesIO object
-    buf = BytesIO()
-    plt.savefig(buf, format='png', bbox_inches='tight')
-    plt.close(fig)
+    return {"image": f"data:image/png;base64,{img_base64}"}
+
+@app.get("/api/analytics/deals-by-stage-chart.{fmt}", tags=["analytics"])
+def get_deals_by_stage_chart_image(
+    fmt: str,
+    request: Request,
+    db: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get a chart of deals by stage as a PNG or SVG image
     
-    # Encode to base64
-    buf.seek(0)
-    img_base64 = base64.b64encode(buf.getvalue()).decode('utf-8')
+    Responses carry an ETag; send it back in If-None-Match to get a 304
+    while the deal counts are unchanged.
+    """
+    fmt = _chart_format(fmt)
+    counts = _deals_by_stage_counts(db, current_user.id)
     
-    return {"image": f"data:image/png;base64,{img_base64}"}
+    if sum(counts) == 0:
+        raise HTTPException(status_code=404, detail="No deals data available")
+    
+    return chart_response(request, "deals-by-stage", counts, fmt)
 
 @app.get("/api/analytics/pipeline-value-chart", tags=["analytics"])
 def get_pipeline_value_chart(
@@ -945,54 +1074,51 @@ def get_pipeline_value_chart(
     """
     Get a chart of pipeline value by stage
     
-    Returns a base64-encoded PNG image of a bar chart showing pipeline value by stage
+    Returns a base64-encoded PNG image of a bar chart showing pipeline value by stage.
+    Prefer /api/analytics/pipeline-value-chart.png, which serves the image directly.
     """
-    # Get pipeline summary
-    pipeline = crud.calculate_pipeline_value(db)
+    image, _ = render_chart("pipeline-value", _pipeline_values(db, current_user.id))
+    img_base64 = base64.b64encode(image).decode('utf-8')
     
-    # Create bar chart
-    labels = ['Lead', 'Proposed', 'Won', 'Total']
-    values = [
-        pipeline['lead'] / 100,
-        pipeline['proposed'] / 100,
-        pipeline['won'] / 100,
-        pipeline['total'] / 100
-    ]
-    colors = ['#3498db', '#f39c12', '#2ecc71', '#9b59b6']
-    
-    fig, ax = plt.subplots(figsize=(10, 6))
-    bars = ax.bar(labels, values, color=colors)
-    
-    # Add data labels on top of bars
-    for bar in bars:
-        height = bar.get_height()
-        ax.annotate(f'${height:,.2f}',
-                   xy=(bar.get_x() + bar.get_width() / 2, height),
-                   xytext=(0, 3),  # 3 points vertical offset
-                   textcoords="offset points",
-                   ha='center', va='bottom')
-    
-    plt.title('Pipeline Value by Stage')
-    plt.xlabel('Stage')
-    plt.ylabel('Value ($)')
-    
-    # Save to a BytesIO object
-    buf = BytesIO()
-    plt.savefig(buf, format='png', bbox_inches='tight')
-    plt.close(fig)
+    return {"image": f"data:image/png;base64,{img_base64}"}
+
+@app.get("/api/analytics/pipeline-value-chart.{fmt}", tags=["analytics"])
+def get_pipeline_value_chart_image(
+    fmt: str,
+    request: Request,
+    db: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Get a chart of pipeline value by stage as a PNG or SVG image
     
-    # Encode to base64
-    buf.seek(0)
-    img_base64 = base64.b64encode(buf.getvalue()).decode('utf-8')
+    Responses carry an ETag; send it back in If-None-Match to get a 304
+    while the pipeline values are unchanged.
+    """
+    fmt = _chart_format(fmt)
+    return chart_response(request, "pipeline-value", _pipeline_values(db, current_user.id), fmt)
+
+@app.get("/api/metrics", tags=["system"])
+def get_metrics(current_user: User = Depends(require_permission("manage_users"))):
+    """
+    Get in-process performance metrics
     
-    return {"image": f"data:image/png;base64,{img_base64}"}
+    Returns chart cache, render pool and report artifact cache statistics
+    and latency percentiles for every recorded operation in this worker
+    process
+    """
+    return {
+        "charts": chart_renderer_stats(),
+        "artifacts": get_artifact_cache().stats(),
+        "latency": latency_snapshot()
+    }
 
 # Add advanced analytics endpoints
 @app.get("/api/analytics/forecast", tags=["analytics"])
 def get_pipeline_forecast(
     db: Session = Depends(get_session),
-    days_history: int = 90,
-    days_forecast: int = 30,
+    days_history: int = Query(90, ge=1, le=730),
+    days_forecast: int = Query(30, ge=1, le=365),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -1009,7 +1135,8 @@ def get_pipeline_forecast(
     forecast = PredictiveAnalytics.forecast_pipeline_value(
         db, 
         days_history=days_history, 
-        days_forecast=days_forecast
+        days_forecast=days_forecast,
+        user_id=current_user.id
     )
     
     return forecast
@@ -1032,24 +1159,39 @@ def get_sales_velocity(
     
     velocity_metrics = PredictiveAnalytics.analyze_sales_velocity(
         db, 
-        days=days
+        days=days,
+        user_id=current_user.id
     )
     
     return velocity_metrics
 
 @app.get("/api/analytics/churn-risk", tags=["analytics"])
 def get_churn_risk(
+    response: Response,
     db: Session = Depends(get_session),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000),
     current_user: User = Depends(get_current_user)
 ):
     """
     Get client churn risk analysis
     
-    Returns a list of clients with churn risk scores
+    Returns a page of clients with churn risk scores, highest risk first.
+    The total number of scored clients is sent in the X-Total-Count header.
+    
+    Parameters:
+    - **skip**: Number of clients to skip
+    - **limit**: Maximum number of clients to return (1-1000)
     """
     from app.utils.predictive_analytics import PredictiveAnalytics
     
-    client_risks = PredictiveAnalytics.predict_churn_risk(db)
+    client_risks, total = PredictiveAnalytics.predict_churn_risk(
+        db,
+        user_id=current_user.id,
+        skip=skip,
+        limit=limit
+    )
+    response.headers["X-Total-Count"] = str(total)
     
     return client_risks
 
@@ -1071,14 +1213,31 @@ def get_deal_predictions(
     
     deal_predictions = PredictiveAnalytics.forecast_deal_outcomes(
         db, 
-        stage=stage
+        stage=stage,
+        user_id=current_user.id
     )
     
     return deal_predictions
 
+def _report_response(request: Request, db: Session, user: User, report_type: str) -> Response:
+    """Return a report as a download, from the artifact cache when its data is unchanged"""
+    report = get_report_type(report_type)
+    artifact = load_report(db, user, report_type)
+    if artifact.path:
+        try:
+            return ranged_file_response(request, artifact.path, report.media_type, report.filename, f'"{artifact.key}"')
+        except FileNotFoundError:
+            # Evicted by another process since the lookup
+            artifact.data = report.build(db, user, {})
+    response = Response(content=artifact.data, media_type=report.media_type)
+    response.headers["Content-Disposition"] = f"attachment; filename={report.filename}"
+    response.headers["ETag"] = f'"{artifact.key}"'
+    return response
+
 # Add PDF export endpoints
 @app.get("/api/export/pipeline-summary-pdf", tags=["export"])
 def export_pipeline_summary_pdf(
+    request: Request,
     db: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
@@ -1087,48 +1246,11 @@ def export_pipeline_summary_pdf(
     
     Returns a downloadable PDF file with pipeline summary information
     """
-    # Get pipeline summary
-    pipeline_summary = crud.calculate_pipeline_value(db)
-    
-    # Format for the PDF generator
-    pipeline_stats = {
-        "stages": {
-            "lead": {
-                "count": sum(1 for deal in crud.get_all(db, Deal) if deal.stage == "lead"),
-                "value": pipeline_summary["lead"],
-                "value_formatted": format_money(pipeline_summary["lead"])
-            },
-            "proposed": {
-                "count": sum(1 for deal in crud.get_all(db, Deal) if deal.stage == "proposed"),
-                "value": pipeline_summary["proposed"],
-                "value_formatted": format_money(pipeline_summary["proposed"])
-            },
-            "won": {
-                "count": sum(1 for deal in crud.get_all(db, Deal) if deal.stage == "won"),
-                "value": pipeline_summary["won"],
-                "value_formatted": format_money(pipeline_summary["won"])
-            }
-        },
-        "total": {
-            "count": len(crud.get_all(db, Deal)),
-            "value": pipeline_summary["total"],
-            "value_formatted": format_money(pipeline_summary["total"])
-        }
-    }
-    
-    # Company name (could be user's name or organization)
-    company_name = f"{current_user.full_name}'s FreelanceFlow"
-    
-    # Generate PDF
-    pdf_data = generate_pipeline_summary_pdf(pipeline_stats, company_name)
-    
-    # Return as downloadable file
-    response = Response(content=pdf_data, media_type="application/pdf")
-    response.headers["Content-Disposition"] = "attachment; filename=pipeline_summary.pdf"
-    return response
+    return _report_response(request, db, current_user, "pipeline-summary-pdf")
 
 @app.get("/api/export/client-distribution-pdf", tags=["export"])
 def export_client_distribution_pdf(
+    request: Request,
     db: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
@@ -1137,89 +1259,47 @@ def export_client_distribution_pdf(
     
     Returns a downloadable PDF file with client distribution information
     """
-    # Get client distribution
-    client_distribution = crud.get_client_distribution(db)
-    
-    # Company name
-    company_name = f"{current_user.full_name}'s FreelanceFlow"
-    
-    # Generate PDF
-    pdf_data = generate_client_distribution_pdf(client_distribution, company_name)
-    
-    # Return as downloadable file
-    response = Response(content=pdf_data, media_type="application/pdf")
-    response.headers["Content-Disposition"] = "attachment; filename=client_distribution.pdf"
-    return response
+    return _report_response(request, db, current_user, "client-distribution-pdf")
 
 @app.get("/api/export/dashboard-pdf", tags=["export"])
 async def export_dashboard_pdf(
+    request: Request,
     db: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
     """
     Export complete dashboard as PDF
     
-    Returns a downloadable PDF file with comprehensive dashboard information
+    Returns a downloadable PDF file with comprehensive dashboard information.
+    An unchanged pipeline is served from the artifact cache; otherwise the
+    Server-Timing header reports how long the snapshot, chart and document
+    phases took.
     """
-    # Get pipeline summary
-    pipeline_summary = crud.calculate_pipeline_value(db)
-    
-    # Format for the PDF generator
-    pipeline_stats = {
-        "stages": {
-            "lead": {
-                "count": sum(1 for deal in crud.get_all(db, Deal) if deal.stage == "lead"),
-                "value": pipeline_summary["lead"],
-                "value_formatted": format_money(pipeline_summary["lead"])
-            },
-            "proposed": {
-                "count": sum(1 for deal in crud.get_all(db, Deal) if deal.stage == "proposed"),
-                "value": pipeline_summary["proposed"],
-                "value_formatted": format_money(pipeline_summary["proposed"])
-            },
-            "won": {
-                "count": sum(1 for deal in crud.get_all(db, Deal) if deal.stage == "won"),
-                "value": pipeline_summary["won"],
-                "value_formatted": format_money(pipeline_summary["won"])
-            }
-        },
-        "total": {
-            "count": len(crud.get_all(db, Deal)),
-            "value": pipeline_summary["total"],
-            "value_formatted": format_money(pipeline_summary["total"])
-        }
-    }
-    
-    # Get client distribution
-    client_distribution = crud.get_client_distribution(db)
-    
-    # Get chart images
-    deals_chart_response = await get_deals_by_stage_chart(db, current_user)
-    pipeline_chart_response = await get_pipeline_value_chart(db, current_user)
-    
-    deals_chart_url = deals_chart_response.get("image") if isinstance(deals_chart_response, dict) else None
-    pipeline_chart_url = pipeline_chart_response.get("image") if isinstance(pipeline_chart_response, dict) else None
+    report = get_report_type("dashboard-pdf")
+    key = await run_in_threadpool(report_cache_key, db, current_user, "dashboard-pdf")
+    cache = get_artifact_cache()
+    path = cache.lookup(key, report.extension)
+    if path:
+        try:
+            return ranged_file_response(request, path, report.media_type, report.filename, f'"{key}"')
+        except FileNotFoundError:
+            pass
     
-    # Company name
     company_name = f"{current_user.full_name}'s FreelanceFlow"
-    
-    # Generate PDF
-    pdf_data = generate_dashboard_pdf(
-        pipeline_stats, 
-        client_distribution, 
-        deals_chart_url, 
-        pipeline_chart_url,
-        company_name
-    )
+    pdf_data, timer = await build_dashboard_pdf(db, current_user.id, company_name)
+    await run_in_threadpool(cache.store, key, report.extension, pdf_data)
     
     # Return as downloadable file
     response = Response(content=pdf_data, media_type="application/pdf")
     response.headers["Content-Disposition"] = "attachment; filename=dashboard_report.pdf"
+    response.headers["ETag"] = f'"{key}"'
+    response.headers["Server-Timing"] = timer.server_timing()
     return response
 
 # Add Excel export endpoints
 @app.get("/api/export/pipeline-summary-excel", tags=["export"])
 def export_pipeline_summary_excel(
+    request: Request,
     db: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
@@ -1228,31 +1308,11 @@ def export_pipeline_summary_excel(
     
     Returns a downloadable Excel file with pipeline summary information
     """
-    # Get pipeline summary
-    pipeline_summary = crud.calculate_pipeline_value(db)
-    
-    # Format for the Excel generator
-    pipeline_data = {
-        'lead_count': sum(1 for deal in crud.get_all(db, Deal) if deal.stage == "lead"),
-        'proposed_count': sum(1 for deal in crud.get_all(db, Deal) if deal.stage == "proposed"),
-        'won_count': sum(1 for deal in crud.get_all(db, Deal) if deal.stage == "won"),
-        'lead_value': pipeline_summary["lead"],
-        'proposed_value': pipeline_summary["proposed"],
-        'won_value': pipeline_summary["won"],
-        'total_count': len(crud.get_all(db, Deal)),
-        'total_value': pipeline_summary["total"]
-    }
-    
-    # Generate Excel
-    excel_data = generate_pipeline_excel(pipeline_data)
-    
-    # Return as downloadable file
-    response = Response(content=excel_data, media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-    response.headers["Content-Disposition"] = "attachment; filename=pipeline_summary.xlsx"
-    return response
+    return _report_response(request, db, current_user, "pipeline-summary-excel")
 
 @app.get("/api/export/client-distribution-excel", tags=["export"])
 def export_client_distribution_excel(
+    request: Request,
     db: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
@@ -1261,19 +1321,11 @@ def export_client_distribution_excel(
     
     Returns a downloadable Excel file with client distribution information
     """
-    # Get client distribution
-    client_distribution = crud.get_client_distribution(db)
-    
-    # Generate Excel
-    excel_data = generate_clients_excel(client_distribution)
-    
-    # Return as downloadable file
-    response = Response(content=excel_data, media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-    response.headers["Content-Disposition"] = "attachment; filename=client_distribution.xlsx"
-    return response
+    return _report_response(request, db, current_user, "client-distribution-excel")
 
 @app.get("/api/export/deals-excel", tags=["export"])
 def export_deals_excel(
+    request: Request,
     db: Session = Depends(get_session),
     current_user: User = Depends(get_current_user)
 ):
@@ -1282,16 +1334,81 @@ def export_deals_excel(
     
     Returns a downloadable Excel file with all deals information
     """
-    # Get deals data
-    deals_data = crud.get_deals_with_export_data(db)
+    return _report_response(request, db, current_user, "deals-excel")
+
+@app.get("/api/export/{entity}.{fmt}", tags=["export"])
+def export_columnar(
+    entity: str,
+    fmt: str,
+    db: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Export the current user's clients, deals or invoices for analytics tools
+
+    `fmt` is "parquet" for a Parquet file or "arrows" for an Arrow IPC
+    stream. Money columns are integer cents and dates keep their types.
+    """
+    return columnar_response(db, entity, fmt, current_user.id)
+
+# Background report jobs
+def _report_job_read(job: ReportJob) -> ReportJobRead:
+    download_url = f"/api/reports/{job.id}/download" if job.status == ReportJobStatus.SUCCEEDED else None
+    return ReportJobRead(**job.model_dump(), download_url=download_url)
+
+@app.post("/api/reports", response_model=ReportJobRead, status_code=status.HTTP_202_ACCEPTED, tags=["export"])
+def create_report_job(
+    job_in: ReportJobCreate,
+    response: Response,
+    db: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Generate a report in the background
     
-    # Generate Excel
-    excel_data = generate_deals_excel(deals_data)
+    Accepts any report served under /api/export (e.g. "dashboard-pdf" or
+    "deals-excel") and returns the job immediately. Poll the Location URL
+    until the status is "succeeded", then fetch download_url.
+    """
+    job = submit_report_job(db, current_user, job_in.report_type, job_in.params)
+    response.headers["Location"] = f"/api/reports/{job.id}"
+    return _report_job_read(job)
+
+@app.get("/api/reports/{job_id}", response_model=ReportJobRead, tags=["export"])
+def get_report_job(
+    job_id: str,
+    db: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """Get the status of a report job"""
+    return _report_job_read(get_user_report_job(db, current_user, job_id))
+
+@app.get("/api/reports/{job_id}/download", tags=["export"])
+def download_report(
+    job_id: str,
+    request: Request,
+    db: Session = Depends(get_session),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Download a finished report
     
-    # Return as downloadable file
-    response = Response(content=excel_data, media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
-    response.headers["Content-Disposition"] = "attachment; filename=deals.xlsx"
-    return response
+    Supports Range requests so an interrupted download can be resumed.
+    Returns 409 while the job is still queued or running, or if it failed,
+    and 410 once the report has expired.
+    """
+    job = get_user_report_job(db, current_user, job_id)
+    if job.status == ReportJobStatus.EXPIRED:
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="Report has expired, please generate it again")
+    if job.status != ReportJobStatus.SUCCEEDED:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Report is not ready (status: {job.status})"
+        )
+    if not job.file_path or not os.path.exists(job.file_path):
+        raise HTTPException(status_code=status.HTTP_410_GONE, detail="Report file is no longer available")
+    report = get_report_type(job.report_type)
+    return ranged_file_response(request, job.file_path, report.media_type, report.filename)
 
 # Role and Permission API endpoints
 @app.get("/api/permissions/", response_model=List[PermissionRead], tags=["permissions"])
@@ -1330,6 +1447,9 @@ def create_permission(
     db.commit()
     db.refresh(permission)
     
+    # Superusers implicitly hold every permission, so their cached sets are stale
+    invalidate_permission_cache()
+    
     return permission
 
 @app.get("/api/roles/", response_model=List[RoleRead], tags=["roles"])
@@ -1491,6 +1611,9 @@ def update_role(
     db.commit()
     db.refresh(role)
     
+    # Any user holding this role may have gained or lost permissions
+    invalidate_permission_cache()
+    
     # Get permissions for response
     permissions = []
     statement = select(RolePermission).where(RolePermission.role_id == role_id)
@@ -1548,6 +1671,8 @@ def delete_role(
     db.delete(role)
     db.commit()
     
+    invalidate_permission_cache()
+    
     return None
 
 @app.get("/api/users/{user_id}/roles", tags=["users", "roles"])
@@ -1618,6 +1743,9 @@ def assign_role_to_user(
     db.add(user_role)
     db.commit()
     
+    invalidate_permission_cache(user_id)
+    invalidate_token_cache(user_id=user_id)
+    
     return {"message": f"Role '{role.name}' assigned to user"}
 
 @app.delete("/api/users/{user_id}/roles/{role_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["users", "roles"])
@@ -1660,6 +1788,9 @@ def remove_role_from_user(
     db.delete(user_role)
     db.commit()
     
+    invalidate_permission_cache(user_id)
+    invalidate_token_cache(user_id=user_id)
+    
     return None
 
 # Email notification settings endpoints
@@ -1717,6 +1848,9 @@ def update_email_preferences(
     db.commit()
     db.refresh(user)
     
+    # Cached snapshots still carry the old preferences
+    invalidate_token_cache(user_id=user.id)
+    
     return {
         "email_notifications_enabled": user.email_notifications_enabled,
         "notify_on_deal_created": user.notify_on_deal_created,
@@ -4,6 +4,6 @@ FastAPI Middleware
 This package contains middleware components for the FreelanceFlow application.
 """
 
-from app.middleware.compression import add_compression_middleware, GzipMiddleware
+from app.middleware.compression import add_compression_middleware, StreamingGZipMiddleware
 
-__all__ = ["add_compression_middleware", "GzipMiddleware"] 
\ No newline at end of file
+__all__ = ["add_compression_middleware", "StreamingGZipMiddleware"] 
\ No newline at end of file
@@ -1,132 +1,143 @@
 """
-Response Compression Middleware
+Gzip compression for text responses, including streamed ones.
 
-This module provides middleware for compressing HTTP responses
-to reduce bandwidth usage and improve page load times.
+Starlette's GZipMiddleware leaves streamed chunks inside the compressor until
+it has enough output to emit, so a client can wait a long time for the
+first rows of a CSV export. This middleware sync-flushes after every chunk:
+each chunk reaches the client as soon as the app sends it, at a small cost
+in compression ratio.
+
+Only text-like content types are compressed. Images, PDFs and workbooks are
+already compressed. Range and conditional responses are passed through
+untouched so byte offsets keep referring to the file on disk. The start of
+a response that will not be compressed is forwarded right away; only a
+compressible one waits for its first body chunk. Files sent with the ASGI
+pathsend extension are never compressed.
 """
 
-import gzip
-from typing import Callable, List, Optional, Set
-
-from fastapi import FastAPI, Request, Response
-from fastapi.middleware.base import BaseHTTPMiddleware
-from fastapi.responses import JSONResponse, Response
-from starlette.types import ASGIApp, Receive, Scope, Send
-
-
-class GzipMiddleware(BaseHTTPMiddleware):
-    """Middleware for compressing responses with gzip."""
-
-    def __init__(
-        self,
-        app: ASGIApp,
-        minimum_size: int = 500,
-        compression_level: int = 6,
-        exclude_paths: Optional[List[str]] = None,
-        exclude_content_types: Optional[List[str]] = None
-    ):
-        """
-        Initialize the compression middleware.
-        
-        Args:
-            app: The ASGI application
-            minimum_size: Minimum response size in bytes to apply compression
-            compression_level: Gzip compression level (1-9)
-            exclude_paths: List of paths to exclude from compression
-            exclude_content_types: List of content types to exclude from compression
-        """
-        super().__init__(app)
+import zlib
+from typing import Tuple
+
+from fastapi import FastAPI
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+COMPRESSIBLE_CONTENT_TYPES: Tuple[str, ...] = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "image/svg+xml",
+)
+
+# Excluded even though they are text: each event must reach the client as is
+EXCLUDED_CONTENT_TYPES: Tuple[str, ...] = ("text/event-stream",)
+
+
+class StreamingGZipMiddleware:
+    """
+    Gzip responses for clients that accept it
+
+    Args:
+        app: ASGI application to wrap
+        minimum_size: Single-body responses smaller than this are sent as is
+        compresslevel: zlib compression level
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 500, compresslevel: int = 6) -> None:
+        self.app = app
         self.minimum_size = minimum_size
-        self.compression_level = min(max(compression_level, 1), 9)  # Ensure it's between 1-9
-        self.exclude_paths = set(exclude_paths or [])
-        self.exclude_content_types = set(exclude_content_types or [])
-        
-        # Default content types to exclude (e.g. already compressed formats)
-        self.exclude_content_types.update([
-            "image/jpeg", "image/png", "image/gif", "image/webp",
-            "audio/mpeg", "video/mp4", "application/zip", "application/gzip",
-            "application/x-gzip", "application/pdf"
-        ])
-
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        """Process the request and compress the response if applicable."""
-        # Check if path should be excluded
-        path = request.url.path
-        if any(path.startswith(excluded) for excluded in self.exclude_paths):
-            return await call_next(request)
-        
-        # Check if client accepts gzip encoding
-        accept_encoding = request.headers.get("Accept-Encoding", "").lower()
-        if "gzip" not in accept_encoding:
-            return await call_next(request)
-        
-        # Get the original response
-        response = await call_next(request)
-        
-        # Check if we should compress the response
-        content_type = response.headers.get("Content-Type", "").lower()
-        content_encoding = response.headers.get("Content-Encoding", "").lower()
-        
-        # Skip compression if any of these conditions apply
-        if (
-            # Already compressed
-            content_encoding and content_encoding != "identity"
-            # Excluded content type
-            or any(excluded in content_type for excluded in self.exclude_content_types)
-            # Response body is a streaming response
-            or hasattr(response, "body_iterator")
-        ):
-            return response
-        
-        # Get response body
-        response_body = b""
-        if hasattr(response, "body"):
-            response_body = response.body
-        
-        # Skip compression if response is too small
-        if len(response_body) < self.minimum_size:
-            return response
-        
-        # Compress the response
-        compressed_body = gzip.compress(response_body, compresslevel=self.compression_level)
-        
-        # Create a new response with compressed body
-        new_response = Response(
-            content=compressed_body,
-            status_code=response.status_code,
-            headers=dict(response.headers),
-            media_type=response.media_type
-        )
-        
-        # Add Content-Encoding header
-        new_response.headers["Content-Encoding"] = "gzip"
-        new_response.headers["Content-Length"] = str(len(compressed_body))
-        new_response.headers["Vary"] = "Accept-Encoding"
-        
-        return new_response
-
-
-def add_compression_middleware(
-    app: FastAPI,
-    minimum_size: int = 500,
-    compression_level: int = 6,
-    exclude_paths: Optional[List[str]] = None,
-    exclude_content_types: Optional[List[str]] = None
-) -> None:
+        self.compresslevel = compresslevel
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or "gzip" not in Headers(scope=scope).get("accept-encoding", ""):
+            await self.app(scope, receive, send)
+            return
+        await _GZipResponder(self.minimum_size, self.compresslevel, send).run(self.app, scope, receive)
+
+
+def _is_compressible(headers: Headers, status_code: int) -> bool:
+    content_type = headers.get("content-type", "")
+    return (
+        status_code == 200
+        and "content-encoding" not in headers
+        and content_type.startswith(COMPRESSIBLE_CONTENT_TYPES)
+        and not content_type.startswith(EXCLUDED_CONTENT_TYPES)
+    )
+
+
+class _GZipResponder:
+    """Compresses one response"""
+
+    def __init__(self, minimum_size: int, compresslevel: int, send: Send) -> None:
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+        self.send = send
+        self.start_message: Message = {}
+        self.started = False
+        self.compress = False
+        self.compressor = None
+
+    async def run(self, app: ASGIApp, scope: Scope, receive: Receive) -> None:
+        await app(scope, receive, self.send_compressed)
+
+    async def send_compressed(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.compress = _is_compressible(Headers(raw=message["headers"]), message["status"])
+            if not self.compress:
+                self.started = True
+                await self.send(message)
+                return
+            # Held back until the first body chunk shows whether to compress
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body":
+            # E.g. http.response.pathsend: the file goes out as is, after its start
+            if not self.started:
+                self.started = True
+                await self.send(self.start_message)
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if not self.started:
+            self.started = True
+            if self.compress and (more_body or len(body) >= self.minimum_size):
+                headers = MutableHeaders(raw=self.start_message["headers"])
+                headers["Content-Encoding"] = "gzip"
+                headers.add_vary_header("Accept-Encoding")
+                if "content-length" in headers:
+                    del headers["Content-Length"]
+                # wbits 31 selects the gzip container
+                self.compressor = zlib.compressobj(self.compresslevel, zlib.DEFLATED, 31)
+                if not more_body:
+                    body = self.compressor.compress(body) + self.compressor.flush()
+                    headers["Content-Length"] = str(len(body))
+                    await self.send(self.start_message)
+                    await self.send({"type": "http.response.body", "body": body})
+                    return
+            await self.send(self.start_message)
+
+        if self.compressor is None:
+            await self.send(message)
+            return
+
+        if more_body:
+            body = self.compressor.compress(body) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+        else:
+            body = self.compressor.compress(body) + self.compressor.flush()
+        await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+
+def add_compression_middleware(app: FastAPI, minimum_size: int = 500, compresslevel: int = 6) -> None:
     """
-    Add the compression middleware to the FastAPI application.
-    
+    Add the compression middleware to the FastAPI application
+
     Args:
         app: The FastAPI application
-        minimum_size: Minimum response size in bytes to apply compression
-        compression_level: Gzip compression level (1-9)
-        exclude_paths: List of paths to exclude from compression
-        exclude_content_types: List of content types to exclude from compression
+        minimum_size: Single-body responses smaller than this are sent as is
+        compresslevel: zlib compression level
     """
-    app.add_middleware(
-        GzipMiddleware,
-        minimum_size=minimum_size,
-        compression_level=compression_level,
-        exclude_paths=exclude_paths,
-        exclude_content_types=exclude_content_types
-    ) 
\ No newline at end of file
+    app.add_middleware(StreamingGZipMiddleware, minimum_size=minimum_size, compresslevel=compresslevel)
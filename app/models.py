@@ -1,7 +1,9 @@
+from sqlalchemy import Index
 from sqlmodel import SQLModel, Field, Relationship
-from typing import List, Optional, Dict
+from typing import Any, List, Optional, Dict
 from datetime import datetime, date
 from enum import Enum
+from uuid import uuid4
 
 class Permission(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
@@ -131,7 +133,7 @@ class ClientBase(SQLModel):
 class Client(ClientBase, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow, sa_column_kwargs={"onupdate": datetime.utcnow})
     name: str = Field(index=True)
     user_id: int = Field(foreign_key="user.id", index=True)
     
@@ -167,9 +169,12 @@ class DealBase(SQLModel):
     value: int  # Stored in cents
 
 class Deal(DealBase, table=True):
+    # Covers per-client stage counts (win rates, churn) without touching the table
+    __table_args__ = (Index("ix_deal_client_id_stage", "client_id", "stage"),)
+    
     id: Optional[int] = Field(default=None, primary_key=True)
     created_at: datetime = Field(default_factory=datetime.utcnow)
-    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow, sa_column_kwargs={"onupdate": datetime.utcnow})
     stage: str = Field(index=True)
     client_id: int = Field(foreign_key="client.id", index=True)
     
@@ -192,6 +197,29 @@ class DealUpdate(SQLModel):
 class DealMoveUpdate(SQLModel):
     new_stage: str
 
+class DealStageEvent(SQLModel, table=True):
+    """Append-only record of a deal entering, leaving or changing stage"""
+    __tablename__ = "deal_stage_event"
+    
+    id: Optional[int] = Field(default=None, primary_key=True)
+    deal_id: int = Field(index=True)  # No foreign key so history outlives deleted deals
+    user_id: int = Field(foreign_key="user.id", index=True)
+    from_stage: Optional[str] = None  # None when the deal was created
+    to_stage: Optional[str] = None  # None when the deal was deleted
+    from_value: int = 0  # cents
+    to_value: int = 0  # cents
+    created_at: datetime = Field(default_factory=datetime.utcnow, index=True)
+
+class DealStageDailyRollup(SQLModel, table=True):
+    """Net change in deal count and value per user, day and stage"""
+    __tablename__ = "deal_stage_daily_rollup"
+    
+    user_id: int = Field(foreign_key="user.id", primary_key=True)
+    day: date = Field(primary_key=True)
+    stage: str = Field(primary_key=True)
+    net_count: int = 0
+    net_value: int = 0  # cents
+
 class Invoice(SQLModel, table=True):
     id: Optional[int] = Field(default=None, primary_key=True)
     client_id: int = Field(foreign_key="client.id", index=True)
@@ -243,6 +271,12 @@ class NotificationType(str, Enum):
     TASK_COMPLETED = "task_completed"
 
 class Notification(SQLModel, table=True):
+    # Newest-first pages of a user's notifications, all or unread only, walk these in order
+    __table_args__ = (
+        Index("ix_notification_user_id_id", "user_id", "id"),
+        Index("ix_notification_user_id_is_read_id", "user_id", "is_read", "id"),
+    )
+    
     id: Optional[int] = Field(default=None, primary_key=True)
     user_id: int = Field(foreign_key="user.id", index=True)
     type: str = Field(index=True)  # Use NotificationType values
@@ -254,4 +288,91 @@ class Notification(SQLModel, table=True):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     
     # Relationships
-    user: User = Relationship(back_populates="notifications") 
\ No newline at end of file
+    user: User = Relationship(back_populates="notifications")
+
+class NotificationCounter(SQLModel, table=True):
+    """Unread notification count per user, kept in step with the notification table"""
+    __tablename__ = "notification_counter"
+    
+    user_id: int = Field(foreign_key="user.id", primary_key=True)
+    unread: int = 0
+
+class NotificationRead(SQLModel):
+    id: int
+    user_id: int
+    type: str
+    title: str
+    message: str
+    entity_type: str
+    entity_id: int
+    is_read: bool
+    created_at: datetime
+
+class OutboxStatus(str, Enum):
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+
+class OutboxMessage(SQLModel, table=True):
+    """A side effect (such as an email) recorded in the transaction that caused it"""
+    __tablename__ = "outbox_message"
+    # The dispatcher claims due messages in id order
+    __table_args__ = (Index("ix_outbox_message_status_available_at", "status", "available_at"),)
+    
+    id: Optional[int] = Field(default=None, primary_key=True)
+    kind: str  # Key of OUTBOX_HANDLERS
+    payload: str = "{}"  # JSON-encoded handler arguments
+    status: str = Field(default=OutboxStatus.PENDING)
+    attempts: int = 0
+    available_at: datetime = Field(default_factory=datetime.utcnow)  # Not retried before this
+    claim_token: Optional[str] = None
+    claimed_at: Optional[datetime] = None
+    sent_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+class ReportJobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    EXPIRED = "expired"  # The report file was removed after REPORT_RETENTION_HOURS
+
+class ReportJob(SQLModel, table=True):
+    """A report generated in the background and kept on disk for download"""
+    __tablename__ = "report_job"
+    
+    id: str = Field(default_factory=lambda: uuid4().hex, primary_key=True)
+    user_id: int = Field(foreign_key="user.id", index=True)
+    report_type: str
+    params: str = "{}"  # JSON-encoded report parameters
+    status: str = Field(default=ReportJobStatus.QUEUED, index=True)
+    error: Optional[str] = None
+    file_path: Optional[str] = None
+    size_bytes: Optional[int] = None
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+class ReportJobCreate(SQLModel):
+    report_type: str
+    params: Dict[str, Any] = {}
+
+class ReportJobRead(SQLModel):
+    id: str
+    report_type: str
+    status: str
+    error: Optional[str] = None
+    size_bytes: Optional[int] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    download_url: Optional[str] = None
+
+class DataMigration(SQLModel, table=True):
+    """A one-off data migration that has been applied (see migrations/data_migrations.py)"""
+    __tablename__ = "data_migration"
+    
+    name: str = Field(primary_key=True)
+    applied_at: datetime = Field(default_factory=datetime.utcnow)
@@ -0,0 +1,352 @@
+"""
+Utility functions for the FreelanceFlow application.
+"""
+
+import locale
+from datetime import datetime
+import io
+import base64
+
+from app.lazy_imports import lazy_module
+
+# Imported on first use; reportlab is imported inside the PDF generators
+pd = lazy_module("pandas")
+weasyprint = lazy_module("weasyprint")
+
+def format_money(cents, currency="USD"):
+    """
+    Format money values from cents to dollars/euros with proper currency symbol.
+    
+    Args:
+        cents (int): Value in cents
+        currency (str): Currency code (default: USD)
+    
+    Returns:
+        str: Formatted currency string
+    """
+    # Convert cents to dollars/euros
+    dollars = cents / 100.0
+    
+    # Format based on currency
+    if currency == "USD":
+        return f"${dollars:.2f}"
+    elif currency == "EUR":
+        return f"€{dollars:.2f}"
+    else:
+        return f"{dollars:.2f} {currency}"
+
+def format_date(date_obj, format_str="%Y-%m-%d"):
+    """
+    Format date objects consistently.
+    
+    Args:
+        date_obj (datetime): Date to format
+        format_str (str): Format string (default: YYYY-MM-DD)
+    
+    Returns:
+        str: Formatted date string or empty string if None
+    """
+    if date_obj is None:
+        return ""
+    
+    return date_obj.strftime(format_str)
+
+def truncate_text(text, max_length=50):
+    """
+    Truncate text with ellipsis if it exceeds max_length.
+    
+    Args:
+        text (str): Text to truncate
+        max_length (int): Maximum length before truncation
+    
+    Returns:
+        str: Truncated text with ellipsis or original text
+    """
+    if not text or len(text) <= max_length:
+        return text
+    
+    return text[:max_length - 3] + "..."
+
+# PDF generation utilities
+# The shared building blocks import reportlab, so they are loaded on first use
+def generate_pipeline_summary_pdf(pipeline_stats, company_name="FreelanceFlow"):
+    """Generate a PDF report for pipeline summary"""
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, Spacer
+    from app.utils.pdf_rendering import new_document, pipeline_table, report_header, report_styles
+    
+    buffer = io.BytesIO()
+    doc = new_document(buffer)
+    styles = report_styles()
+    subtitle_style = styles['Heading2']
+    normal_style = styles['Normal']
+    
+    # Company name, report title and date
+    elements = report_header(company_name, "Pipeline Summary Report")
+    
+    # Pipeline summary table
+    elements.append(pipeline_table(pipeline_stats))
+    elements.append(Spacer(1, 0.5*inch))
+    
+    # Add summary text
+    elements.append(Paragraph("Pipeline Analysis", subtitle_style))
+    elements.append(Spacer(1, 0.1*inch))
+    
+    total_value = pipeline_stats.get("total", {}).get("value", 0) / 100  # Convert cents to dollars
+    total_count = pipeline_stats.get("total", {}).get("count", 0)
+    avg_deal_size = total_value / total_count if total_count > 0 else 0
+    
+    elements.append(Paragraph(f"Your pipeline currently contains {total_count} deals with a total value of {format_money(total_value * 100)}.", normal_style))
+    elements.append(Spacer(1, 0.1*inch))
+    elements.append(Paragraph(f"Average deal size: {format_money(avg_deal_size * 100)}", normal_style))
+    
+    # Build the PDF
+    doc.build(elements)
+    return buffer.getvalue()
+
+def generate_client_distribution_pdf(client_distribution, company_name="FreelanceFlow"):
+    """Generate a PDF report for client distribution"""
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, Spacer
+    from app.utils.pdf_rendering import client_table, new_document, report_header, report_styles
+    
+    buffer = io.BytesIO()
+    doc = new_document(buffer)
+    styles = report_styles()
+    subtitle_style = styles['Heading2']
+    normal_style = styles['Normal']
+    
+    # Company name, report title and date
+    elements = report_header(company_name, "Top Clients Report")
+    
+    # Client distribution table
+    elements.append(client_table(client_distribution, limit=10))
+    elements.append(Spacer(1, 0.5*inch))
+    
+    # Add summary
+    elements.append(Paragraph("Client Distribution Analysis", subtitle_style))
+    elements.append(Spacer(1, 0.1*inch))
+    
+    if len(client_distribution) > 0:
+        total_deals = sum(client.get("deal_count", 0) for client in client_distribution)
+        top_client = client_distribution[0]
+        
+        elements.append(Paragraph(f"You currently have {total_deals} deals distributed across {len(client_distribution)} clients.", normal_style))
+        elements.append(Spacer(1, 0.1*inch))
+        elements.append(Paragraph(f"Your top client, {top_client.get('name')}, represents {top_client.get('deal_count')} deals with a total value of {top_client.get('total_value_formatted')}.", normal_style))
+    else:
+        elements.append(Paragraph("No client data available for analysis.", normal_style))
+    
+    # Build the PDF
+    doc.build(elements)
+    return buffer.getvalue()
+
+def _chart_png(chart):
+    """PNG bytes from raw bytes or a data:image/png;base64 URL, None for anything else"""
+    prefix = "data:image/png;base64,"
+    if isinstance(chart, bytes):
+        return chart
+    if chart and chart.startswith(prefix):
+        return base64.b64decode(chart[len(prefix):])
+    return None
+
+def generate_dashboard_pdf(pipeline_stats, client_distribution, deals_chart=None, pipeline_chart=None, company_name="FreelanceFlow"):
+    """Generate a comprehensive PDF report with charts
+    
+    Charts are PNG bytes or base64 data URLs; missing charts are left out.
+    """
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Paragraph, Spacer
+    from app.utils.pdf_rendering import (
+        client_table,
+        new_document,
+        pipeline_table,
+        png_image,
+        report_header,
+        report_styles
+    )
+    
+    buffer = io.BytesIO()
+    doc = new_document(buffer)
+    styles = report_styles()
+    subtitle_style = styles['Heading2']
+    normal_style = styles['Normal']
+    
+    # Company name, report title and date
+    elements = report_header(company_name, "Dashboard Report")
+    
+    # Pipeline summary section
+    elements.append(Paragraph("Pipeline Summary", subtitle_style))
+    elements.append(Spacer(1, 0.1*inch))
+    elements.append(pipeline_table(pipeline_stats))
+    elements.append(Spacer(1, 0.3*inch))
+    
+    # Add charts if available, embedded from memory
+    for title, chart in [("Deal Distribution by Stage", deals_chart), ("Pipeline Value by Stage", pipeline_chart)]:
+        png = _chart_png(chart)
+        if png:
+            elements.append(Paragraph(title, subtitle_style))
+            elements.append(Spacer(1, 0.1*inch))
+            elements.append(png_image(png))
+            elements.append(Spacer(1, 0.3*inch))
+    
+    # Top Clients section
+    elements.append(Paragraph("Top Clients", subtitle_style))
+    elements.append(Spacer(1, 0.1*inch))
+    elements.append(client_table(client_distribution, limit=5))
+    elements.append(Spacer(1, 0.3*inch))
+    
+    # Summary
+    elements.append(Paragraph("Summary", subtitle_style))
+    elements.append(Spacer(1, 0.1*inch))
+    
+    total_value = pipeline_stats.get("total", {}).get("value", 0) / 100  # Convert cents to dollars
+    total_count = pipeline_stats.get("total", {}).get("count", 0)
+    
+    if total_count > 0:
+        avg_deal_size = total_value / total_count
+        elements.append(Paragraph(f"Your pipeline contains {total_count} deals with a total value of {format_money(total_value * 100)}.", normal_style))
+        elements.append(Spacer(1, 0.1*inch))
+        elements.append(Paragraph(f"Average deal size: {format_money(avg_deal_size * 100)}", normal_style))
+        elements.append(Spacer(1, 0.1*inch))
+    else:
+        elements.append(Paragraph("No deals in your pipeline yet.", normal_style))
+    
+    if len(client_distribution) > 0:
+        top_client = client_distribution[0]
+        elements.append(Paragraph(f"Your top client is {top_client.get('name')} with {top_client.get('deal_count')} deals.", normal_style))
+    
+    # Build the PDF
+    doc.build(elements)
+    return buffer.getvalue()
+
+def html_to_pdf(html_content):
+    """Convert HTML to PDF using WeasyPrint"""
+    buffer = io.BytesIO()
+    weasyprint.HTML(string=html_content).write_pdf(buffer)
+    buffer.seek(0)
+    return buffer.getvalue()
+
+# Excel export utilities
+def generate_excel_file(data, sheet_name="Sheet1"):
+    """Convert data to Excel file format
+    
+    Args:
+        data (list): List of dictionaries with data to export
+        sheet_name (str): Name of the Excel sheet
+    
+    Returns:
+        bytes: Excel file content as bytes
+    """
+    buffer = io.BytesIO()
+    
+    # Convert data to DataFrame
+    df = pd.DataFrame(data)
+    
+    # Write to Excel
+    with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
+        df.to_excel(writer, sheet_name=sheet_name, index=False)
+        
+        # Get workbook and worksheet objects for formatting
+        workbook = writer.book
+        worksheet = writer.sheets[sheet_name]
+        
+        # Add formats
+        header_format = workbook.add_format({
+            'bold': True,
+            'bg_color': '#4285F4',
+            'font_color': 'white',
+            'border': 1
+        })
+        
+        # Format the header row
+        for col_num, value in enumerate(df.columns.values):
+            worksheet.write(0, col_num, value, header_format)
+            
+        # Adjust column widths
+        for idx, col in enumerate(df.columns):
+            max_len = max(df[col].astype(str).apply(len).max(), len(col)) + 2
+            worksheet.set_column(idx, idx, max_len)
+    
+    buffer.seek(0)
+    return buffer.getvalue()
+
+def generate_pipeline_excel(pipeline_stats):
+    """Generate Excel for pipeline summary data
+    
+    Args:
+        pipeline_stats (dict): Dictionary with pipeline statistics
+        
+    Returns:
+        bytes: Excel file content
+    """
+    # Create data structure for export
+    data = []
+    
+    # Add header row
+    data.append({
+        "Stage": "Lead",
+        "Count": pipeline_stats.get("stages", {}).get("lead", {}).get("count", 0),
+        "Value": pipeline_stats.get("stages", {}).get("lead", {}).get("value_formatted", "$0")
+    })
+    
+    data.append({
+        "Stage": "Proposed",
+        "Count": pipeline_stats.get("stages", {}).get("proposed", {}).get("count", 0),
+        "Value": pipeline_stats.get("stages", {}).get("proposed", {}).get("value_formatted", "$0")
+    })
+    
+    data.append({
+        "Stage": "Won",
+        "Count": pipeline_stats.get("stages", {}).get("won", {}).get("count", 0),
+        "Value": pipeline_stats.get("stages", {}).get("won", {}).get("value_formatted", "$0")
+    })
+    
+    data.append({
+        "Stage": "Total",
+        "Count": pipeline_stats.get("total", {}).get("count", 0),
+        "Value": pipeline_stats.get("total", {}).get("value_formatted", "$0")
+    })
+    
+    return generate_excel_file(data, "Pipeline Summary")
+
+def generate_clients_excel(client_distribution):
+    """Generate Excel for client distribution data
+    
+    Args:
+        client_distribution (list): List of clients with deal data
+        
+    Returns:
+        bytes: Excel file content
+    """
+    data = []
+    
+    for client in client_distribution:
+        data.append({
+            "Client": client.get("name", ""),
+            "Deal Count": client.get("deal_count", 0),
+            "Total Value": client.get("total_value_formatted", "$0")
+        })
+    
+    return generate_excel_file(data, "Client Distribution")
+
+def generate_deals_excel(deals):
+    """Generate Excel file with deals data
+    
+    Args:
+        deals (list): List of deals to export
+        
+    Returns:
+        bytes: Excel file content
+    """
+    data = []
+    
+    for deal in deals:
+        data.append({
+            "Client": deal.get("client_name", ""),
+            "Stage": deal.get("stage", ""),
+            "Value": deal.get("value_formatted", "$0"),
+            "Updated": deal.get("updated_at", "")
+        })
+    
+    return generate_excel_file(data, "Deals") 
\ No newline at end of file
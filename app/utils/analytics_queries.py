@@ -0,0 +1,142 @@
+"""
+Aggregate queries shared by the analytics endpoints.
+
+Every metric here is a single aggregate SELECT evaluated by the database and
+returned as plain numbers; no ORM objects are loaded. Passing a user id
+scopes the query to deals of that user's clients.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import case, func
+from sqlmodel import Session, select
+
+from app.models import Client, Deal
+from app.utils.time_series import STAGES
+
+
+def _scope_to_user(statement, user_id: Optional[int]):
+    """Restrict a deal query to the clients of one user"""
+    if user_id is None:
+        return statement
+    return statement.join(Client, Deal.client_id == Client.id).where(Client.user_id == user_id)
+
+
+def stage_totals(db: Session, user_id: Optional[int] = None) -> Dict[str, Dict[str, int]]:
+    """
+    Deal count and total value (in cents) per stage
+
+    Args:
+        db: Database session
+        user_id: Only count this user's deals (all deals when None)
+
+    Returns:
+        Dictionary keyed by stage with "count" and "value", including
+        stages without deals
+    """
+    statement = _scope_to_user(
+        select(Deal.stage, func.count(), func.coalesce(func.sum(Deal.value), 0)),
+        user_id
+    ).group_by(Deal.stage)
+
+    totals = {stage: {"count": 0, "value": 0} for stage in STAGES}
+    for stage, count, value in db.exec(statement).all():
+        totals[stage] = {"count": count, "value": int(value)}
+    return totals
+
+
+def velocity_stats(
+    db: Session,
+    since: datetime,
+    user_id: Optional[int] = None
+) -> Dict[str, float]:
+    """
+    Opportunity count, won count and average value of deals updated since a time
+
+    Args:
+        db: Database session
+        since: Only deals updated at or after this time are included
+        user_id: Only include this user's deals (all deals when None)
+
+    Returns:
+        Dictionary with "opportunities", "won" and "avg_value" (in cents)
+    """
+    statement = _scope_to_user(
+        select(
+            func.count(),
+            func.coalesce(func.sum(case((Deal.stage == "won", 1), else_=0)), 0),
+            func.avg(Deal.value)
+        ),
+        user_id
+    ).where(Deal.updated_at >= since)
+
+    opportunities, won, avg_value = db.exec(statement).one()
+    return {
+        "opportunities": opportunities,
+        "won": int(won),
+        "avg_value": float(avg_value or 0),
+    }
+
+
+def client_totals(
+    db: Session,
+    user_id: Optional[int] = None,
+    limit: Optional[int] = None
+) -> List[Dict[str, Any]]:
+    """
+    Deal count and total value (in cents) per client, largest total first
+
+    Args:
+        db: Database session
+        user_id: Only include this user's clients (all clients when None)
+        limit: Return at most this many clients
+
+    Returns:
+        List of dictionaries with "id", "name", "deal_count" and "total_value"
+        for clients that have deals
+    """
+    total_value = func.coalesce(func.sum(Deal.value), 0).label("total_value")
+    statement = (
+        select(Client.id, Client.name, func.count(Deal.id), total_value)
+        .select_from(Deal)
+        .join(Client, Deal.client_id == Client.id)
+        .group_by(Client.id, Client.name)
+        .order_by(total_value.desc(), Client.id)
+    )
+    if user_id is not None:
+        statement = statement.where(Client.user_id == user_id)
+    if limit is not None:
+        statement = statement.limit(limit)
+
+    return [
+        {"id": client_id, "name": name, "deal_count": deal_count, "total_value": int(value)}
+        for client_id, name, deal_count, value in db.exec(statement).all()
+    ]
+
+
+def data_version(db: Session, user_id: Optional[int] = None) -> str:
+    """
+    Fingerprint of the deal and client rows that reports are built from
+
+    Any insert, delete or ORM update of a deal or client changes at least
+    one of the row count, id sum or latest updated_at, so two equal
+    fingerprints mean a report would come out the same.
+
+    Args:
+        db: Database session
+        user_id: Only consider this user's clients and deals (all when None)
+
+    Returns:
+        Short string that changes whenever the underlying data does
+    """
+    deals = _scope_to_user(
+        select(func.count(), func.coalesce(func.sum(Deal.id), 0), func.max(Deal.updated_at)),
+        user_id
+    )
+    clients = select(func.count(), func.coalesce(func.sum(Client.id), 0), func.max(Client.updated_at))
+    if user_id is not None:
+        clients = clients.where(Client.user_id == user_id)
+
+    parts = list(db.exec(deals).one()) + list(db.exec(clients).one())
+    return ":".join(str(part) for part in parts)
@@ -0,0 +1,154 @@
+"""
+On-disk cache of generated report files.
+
+Artifacts are content addressed: the key is a hash of everything that
+determines the file (report type, parameters and a fingerprint of the data
+it was built from), so a stored file never goes stale. It simply stops
+being requested once the data changes and ages out under the size limit,
+least recently used first.
+
+Hits are served straight from disk. The access order is kept in memory per
+process; files are written atomically, so several processes can share one
+directory, each evicting only what it knows about.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.utils.downloads import SERVING_SUFFIX
+
+ARTIFACT_CACHE_DIR = os.getenv("ARTIFACT_CACHE_DIR", "app/data/artifacts")
+ARTIFACT_CACHE_MAX_BYTES = int(os.getenv("ARTIFACT_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+# Bump when report layouts change so older artifacts are no longer served
+ARTIFACT_CACHE_VERSION = 1
+
+
+def artifact_key(*parts: Any) -> str:
+    """Stable hash of the values that determine an artifact"""
+    payload = json.dumps([ARTIFACT_CACHE_VERSION, *parts], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+class ArtifactCache:
+    """Size-bounded LRU of files in one directory"""
+
+    def __init__(self, directory: str, max_bytes: int = ARTIFACT_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # file name -> size
+        self._total_bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+        self._lock = threading.Lock()
+        self._scanned = False
+
+    def _scan(self) -> None:
+        """Index files left by earlier runs, oldest first"""
+        if self._scanned:
+            return
+        self._scanned = True
+        try:
+            entries = [entry for entry in os.scandir(self.directory) if entry.is_file()]
+        except FileNotFoundError:
+            return
+        for entry in sorted(entries, key=lambda entry: entry.stat().st_mtime):
+            if entry.name.endswith((".partial", SERVING_SUFFIX)):
+                continue
+            size = entry.stat().st_size
+            self._entries[entry.name] = size
+            self._total_bytes += size
+
+    def _forget(self, name: str) -> None:
+        self._total_bytes -= self._entries.pop(name, 0)
+
+    def lookup(self, key: str, extension: str) -> Optional[str]:
+        """
+        Find a stored artifact
+
+        Args:
+            key: Artifact key from artifact_key()
+            extension: File extension including the dot, e.g. ".pdf"
+
+        Returns:
+            Path of the file, or None on a miss
+        """
+        name = f"{key}{extension}"
+        path = os.path.join(self.directory, name)
+        with self._lock:
+            self._scan()
+            if name in self._entries and os.path.exists(path):
+                self._entries.move_to_end(name)
+                self._stats["hits"] += 1
+                return path
+            self._forget(name)
+            self._stats["misses"] += 1
+            return None
+
+    def store(self, key: str, extension: str, data: bytes) -> Optional[str]:
+        """
+        Save an artifact, evicting the least recently used ones over the size limit
+
+        Args:
+            key: Artifact key from artifact_key()
+            extension: File extension including the dot
+            data: File contents
+
+        Returns:
+            Path of the stored file, or None if it is larger than the cache
+        """
+        if len(data) > self.max_bytes:
+            return None
+
+        name = f"{key}{extension}"
+        path = os.path.join(self.directory, name)
+        os.makedirs(self.directory, exist_ok=True)
+        partial_path = f"{path}.{threading.get_ident()}.partial"
+        with open(partial_path, "wb") as file:
+            file.write(data)
+        os.replace(partial_path, path)
+
+        with self._lock:
+            self._scan()
+            self._forget(name)
+            self._entries[name] = len(data)
+            self._total_bytes += len(data)
+            self._stats["stores"] += 1
+            while self._total_bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._forget(oldest)
+                self._stats["evictions"] += 1
+                try:
+                    os.remove(os.path.join(self.directory, oldest))
+                except FileNotFoundError:
+                    pass
+        return path
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit, miss, store and eviction counts plus current usage"""
+        with self._lock:
+            self._scan()
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else None,
+                "files": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+            }
+
+
+_artifact_cache: Optional[ArtifactCache] = None
+_artifact_cache_lock = threading.Lock()
+
+
+def get_artifact_cache() -> ArtifactCache:
+    """Process-wide cache in ARTIFACT_CACHE_DIR"""
+    global _artifact_cache
+    with _artifact_cache_lock:
+        if _artifact_cache is None:
+            _artifact_cache = ArtifactCache(ARTIFACT_CACHE_DIR, ARTIFACT_CACHE_MAX_BYTES)
+        return _artifact_cache
@@ -11,11 +11,12 @@ from app.utils.email_service import (
     send_email,
     send_bulk_email,
     send_welcome_email,
-    send_password_reset_email,
-    send_deal_notification_email
+    send_password_reset_email
 )
-from app.models import User, Deal, Client, NotificationType, Notification
-from sqlmodel import Session
+from app.models import User, Deal, Notification
+from app.utils.notifications import adjust_unread
+from app.utils.outbox import enqueue
+from app.utils.unit_of_work import UnitOfWork
 
 # Email background tasks
 def send_email_in_background(
@@ -104,84 +105,77 @@ def send_password_reset_email_in_background(
     """
     background_tasks.add_task(send_password_reset_email, recipient, reset_token)
 
-def send_deal_notification_email_in_background(
-    background_tasks: BackgroundTasks,
-    db: Session,
+def queue_deal_notification_email(
+    uow: UnitOfWork,
     user: User,
-    deal_id: int,
+    deal: Deal,
+    client_name: str,
     notification_type: str
 ) -> None:
     """
-    Create and send deal notification email in background
+    Record a deal notification email in the outbox, in the unit of work's transaction
+    
+    The outbox dispatcher sends it once the unit of work has committed; if
+    the unit of work rolls back, the email is discarded with it.
     
     Args:
-        background_tasks: FastAPI BackgroundTasks object
-        db: Database session
+        uow: Unit of work for the current request
         user: User to notify
-        deal_id: ID of the deal
+        deal: The deal the notification is about
+        client_name: Name of the deal's client
         notification_type: Type of notification
     """
-    # Get deal and client details
-    deal = db.get(Deal, deal_id)
-    if not deal:
-        return
-    
-    client = db.get(Client, deal.client_id)
-    if not client:
+    # Only send if user has email notifications enabled
+    if not user.email_notifications_enabled:
         return
     
     # Prepare deal title (using ID as title)
-    deal_title = f"Deal #{deal_id}"
-    
-    # Determine status message based on notification type
-    status = deal.stage
-    if notification_type == NotificationType.DEAL_CREATED:
-        subject = f"New Deal Created: {deal_title}"
-    elif notification_type == NotificationType.DEAL_UPDATED:
-        subject = f"Deal Updated: {deal_title}"
-    elif notification_type == NotificationType.DEAL_STAGE_CHANGED:
-        subject = f"Deal Stage Changed: {deal_title}"
-    else:
-        subject = f"Deal Update: {deal_title}"
+    deal_title = f"Deal #{deal.id}"
     
-    # Only send if user has email notifications enabled
-    if user.email_notifications_enabled:
-        background_tasks.add_task(
-            send_deal_notification_email,
-            recipient=user.email,
-            user_name=user.full_name or user.email,
-            deal_id=deal_id,
-            deal_title=deal_title,
-            client_name=client.name,
-            status=status
-        )
+    enqueue(
+        uow.session,
+        "deal_notification_email",
+        recipient=user.email,
+        user_name=user.full_name or user.email,
+        deal_id=deal.id,
+        deal_title=deal_title,
+        client_name=client_name,
+        status=deal.stage
+    )
 
 def create_notification_with_email(
-    background_tasks: BackgroundTasks,
-    db: Session,
-    user_id: int,
+    uow: UnitOfWork,
+    user: User,
     notification_type: str,
     title: str,
     message: str,
     entity_type: str,
-    entity_id: int
-) -> None:
+    entity_id: int,
+    deal: Optional[Deal] = None,
+    client_name: Optional[str] = None
+) -> Notification:
     """
-    Create notification and send email notification in background
+    Stage a notification and its email in the request's unit of work
+    
+    Nothing is committed here: the notification insert, the user's unread
+    counter update and the outbox message for the email are flushed together
+    with the caller's other changes when `uow.commit()` is called. The email
+    is sent by the outbox dispatcher, outside the request.
     
     Args:
-        background_tasks: FastAPI BackgroundTasks object
-        db: Database session
-        user_id: ID of the user to notify
+        uow: Unit of work for the current request
+        user: User to notify
         notification_type: Type of notification
         title: Notification title
         message: Notification message
         entity_type: Type of entity (deal, client, etc.)
         entity_id: ID of the entity
+        deal: The already loaded deal, for deal notifications
+        client_name: Name of the deal's client, for deal notifications
     """
     # Create notification in database
     notification = Notification(
-        user_id=user_id,
+        user_id=user.id,
         type=notification_type,
         title=title,
         message=message,
@@ -189,20 +183,17 @@ def create_notification_with_email(
         entity_id=entity_id,
         is_read=False
     )
-    db.add(notification)
-    db.commit()
-    
-    # Get user
-    user = db.get(User, user_id)
-    if not user:
-        return
+    uow.add(notification)
+    adjust_unread(uow.session, user.id, 1)
     
     # Send email notification based on entity type
-    if entity_type == "deal":
-        send_deal_notification_email_in_background(
-            background_tasks=background_tasks,
-            db=db,
+    if entity_type == "deal" and deal is not None:
+        queue_deal_notification_email(
+            uow=uow,
             user=user,
-            deal_id=entity_id,
+            deal=deal,
+            client_name=client_name or "Unknown Client",
             notification_type=notification_type
-        ) 
\ No newline at end of file
+        )
+    
+    return notification
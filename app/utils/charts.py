@@ -0,0 +1,308 @@
+"""
+Rendered analytics charts with a fingerprint cache.
+
+A chart is fully determined by the numbers it plots, so each render is keyed
+by a hash of its kind, format and data. Identical data is served from memory
+without touching matplotlib, and the same fingerprint doubles as the HTTP
+ETag so browsers can revalidate with a 304 instead of downloading the image.
+
+Cache misses are drawn with the object-oriented Figure API, which keeps no
+global state, on a small process pool. Every worker draws each chart once
+when it starts so font loading and text layout caches are warm before the
+first request.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, Request, Response, status
+
+from app.utils.metrics import get_latency_recorder
+
+# Bump when the chart styling changes so cached images and ETags are replaced
+CHART_STYLE_VERSION = 1
+CHART_CACHE_MAX_SIZE = 256
+
+# Render pool size (0 draws in the calling thread), how many renders may be
+# running or queued before requests get a 503, and how long a request waits
+CHART_RENDER_WORKERS = int(os.getenv("CHART_RENDER_WORKERS", "2"))
+CHART_RENDER_MAX_PENDING = int(os.getenv("CHART_RENDER_MAX_PENDING", "16"))
+CHART_RENDER_TIMEOUT = float(os.getenv("CHART_RENDER_TIMEOUT", "30"))
+
+CHART_MEDIA_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+
+_chart_cache: "OrderedDict[str, bytes]" = OrderedDict()
+_chart_cache_stats = {"hits": 0, "misses": 0}
+_chart_cache_lock = threading.Lock()
+
+
+def _draw_deals_by_stage(ax, counts: Sequence[int]) -> None:
+    """Pie chart of deal counts for lead, proposed and won"""
+    labels = ['Lead', 'Proposed', 'Won']
+    colors = ['#3498db', '#f39c12', '#2ecc71']
+    ax.pie(counts, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90)
+    ax.axis('equal')  # Equal aspect ratio ensures that pie is drawn as a circle
+    ax.set_title('Deals by Stage')
+
+
+def _draw_pipeline_value(ax, values: Sequence[float]) -> None:
+    """Bar chart of lead, proposed, won and total pipeline value in dollars"""
+    labels = ['Lead', 'Proposed', 'Won', 'Total']
+    colors = ['#3498db', '#f39c12', '#2ecc71', '#9b59b6']
+    bars = ax.bar(labels, values, color=colors)
+
+    # Add data labels on top of bars
+    for bar in bars:
+        height = bar.get_height()
+        ax.annotate(f'${height:,.2f}',
+                    xy=(bar.get_x() + bar.get_width() / 2, height),
+                    xytext=(0, 3),  # 3 points vertical offset
+                    textcoords="offset points",
+                    ha='center', va='bottom')
+
+    ax.set_title('Pipeline Value by Stage')
+    ax.set_xlabel('Stage')
+    ax.set_ylabel('Value ($)')
+
+
+# Chart kind -> (figure size, drawing function, warm-up data)
+CHARTS: Dict[str, Tuple[Tuple[int, int], Callable, Sequence[float]]] = {
+    "deals-by-stage": ((8, 6), _draw_deals_by_stage, (3, 2, 1)),
+    "pipeline-value": ((10, 6), _draw_pipeline_value, (1500.0, 2500.0, 1000.0, 5000.0)),
+}
+
+
+def deals_by_stage_series(totals: Dict[str, Dict[str, int]]) -> List[int]:
+    """Lead, proposed and won deal counts for the deals-by-stage chart, from stage_totals()"""
+    return [totals[stage]["count"] for stage in ("lead", "proposed", "won")]
+
+
+def pipeline_value_series(totals: Dict[str, Dict[str, int]]) -> List[float]:
+    """Lead, proposed, won and total value in dollars for the pipeline-value chart, from stage_totals()"""
+    values = [totals[stage]["value"] for stage in ("lead", "proposed", "won")]
+    return [value / 100 for value in values + [sum(values)]]
+
+
+def chart_fingerprint(kind: str, data: Sequence[float], fmt: str = "png") -> str:
+    """
+    Hash identifying one rendered chart
+
+    Args:
+        kind: Chart name, a key of CHARTS
+        data: Numbers plotted by the chart
+        fmt: Image format, "png" or "svg"
+
+    Returns:
+        Hex digest that changes whenever the rendered image would change
+    """
+    payload = json.dumps([CHART_STYLE_VERSION, kind, fmt, list(data)])
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+def _render(kind: str, data: Sequence[float], fmt: str) -> bytes:
+    """Draw a chart on a standalone Agg canvas and return the encoded image"""
+    # matplotlib is imported by the first render, usually in a pool worker
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figsize, draw, _ = CHARTS[kind]
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    draw(fig.subplots(), data)
+    buf = BytesIO()
+    fig.savefig(buf, format=fmt, bbox_inches='tight')
+    return buf.getvalue()
+
+
+def _render_timed(kind: str, data: Sequence[float], fmt: str) -> Tuple[bytes, float]:
+    """Render a chart, also returning the drawing time in seconds"""
+    start = time.perf_counter()
+    image = _render(kind, data, fmt)
+    return image, time.perf_counter() - start
+
+
+def warm_up_renderer() -> None:
+    """Draw every chart in every format once to load fonts and fill layout caches"""
+    for kind, (_, _, sample) in CHARTS.items():
+        for fmt in CHART_MEDIA_TYPES:
+            _render(kind, sample, fmt)
+
+
+def _worker_ready() -> bool:
+    """No-op job used to start pool workers ahead of the first request"""
+    return True
+
+
+_render_pool: Optional[ProcessPoolExecutor] = None
+_render_pool_lock = threading.Lock()
+_render_slots = threading.BoundedSemaphore(CHART_RENDER_MAX_PENDING)
+
+
+def _get_render_pool() -> ProcessPoolExecutor:
+    """Return the render pool, starting it on first use"""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            _render_pool = ProcessPoolExecutor(
+                max_workers=CHART_RENDER_WORKERS,
+                initializer=warm_up_renderer
+            )
+        return _render_pool
+
+
+def start_chart_renderer() -> None:
+    """Start and warm up the render workers, or warm this process when pooling is off"""
+    if CHART_RENDER_WORKERS <= 0:
+        warm_up_renderer()
+        return
+    pool = _get_render_pool()
+    for _ in range(CHART_RENDER_WORKERS):
+        pool.submit(_worker_ready)
+
+
+def stop_chart_renderer() -> None:
+    """Shut down the render workers"""
+    global _render_pool
+    with _render_pool_lock:
+        pool, _render_pool = _render_pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _render_in_pool(kind: str, data: Sequence[float], fmt: str) -> bytes:
+    """Render on the process pool, falling back to this process if the pool died"""
+    if not _render_slots.acquire(blocking=False):
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many charts being rendered, please retry shortly",
+            headers={"Retry-After": "1"},
+        )
+    try:
+        if CHART_RENDER_WORKERS <= 0:
+            image, seconds = _render_timed(kind, data, fmt)
+        else:
+            try:
+                future = _get_render_pool().submit(_render_timed, kind, list(data), fmt)
+                image, seconds = future.result(timeout=CHART_RENDER_TIMEOUT)
+            except FutureTimeoutError:
+                # Drops the job if it is still queued; a running render finishes in its worker
+                future.cancel()
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Chart rendering timed out, please retry shortly",
+                    headers={"Retry-After": "5"},
+                )
+            except BrokenProcessPool:
+                print("Chart render pool crashed, restarting it")
+                stop_chart_renderer()
+                image, seconds = _render_timed(kind, data, fmt)
+        get_latency_recorder("charts.draw").record(seconds)
+        return image
+    finally:
+        _render_slots.release()
+
+
+def render_chart(kind: str, data: Sequence[float], fmt: str = "png") -> Tuple[bytes, str]:
+    """
+    Render a chart, reusing the cached image when the data is unchanged
+
+    Args:
+        kind: Chart name, a key of CHARTS
+        data: Numbers plotted by the chart
+        fmt: Image format, "png" or "svg"
+
+    Returns:
+        Tuple of (image bytes, fingerprint)
+    """
+    fingerprint = chart_fingerprint(kind, data, fmt)
+    image = _chart_cache.get(fingerprint)
+    if image is not None:
+        with _chart_cache_lock:
+            _chart_cache_stats["hits"] += 1
+            if fingerprint in _chart_cache:
+                _chart_cache.move_to_end(fingerprint)
+        return image, fingerprint
+
+    # Queue wait included, so this shows what a cache miss costs a request
+    with get_latency_recorder("charts.render").time():
+        image = _render_in_pool(kind, data, fmt)
+    with _chart_cache_lock:
+        _chart_cache_stats["misses"] += 1
+        _chart_cache[fingerprint] = image
+        _chart_cache.move_to_end(fingerprint)
+        while len(_chart_cache) > CHART_CACHE_MAX_SIZE:
+            _chart_cache.popitem(last=False)
+    return image, fingerprint
+
+
+def chart_renderer_stats() -> Dict[str, Any]:
+    """
+    Report on the chart cache and render pool
+
+    Returns:
+        Dictionary with pool settings, cache size and hit counts, and
+        latency summaries for whole renders and for drawing alone
+    """
+    with _chart_cache_lock:
+        cache = {"entries": len(_chart_cache), **_chart_cache_stats}
+    return {
+        "workers": CHART_RENDER_WORKERS,
+        "max_pending": CHART_RENDER_MAX_PENDING,
+        "cache": cache,
+        "render": get_latency_recorder("charts.render").snapshot(),
+        "draw": get_latency_recorder("charts.draw").snapshot(),
+    }
+
+
+def clear_chart_cache() -> None:
+    """Drop every cached chart image"""
+    with _chart_cache_lock:
+        _chart_cache.clear()
+        _chart_cache_stats.update(hits=0, misses=0)
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def chart_response(request: Request, kind: str, data: Sequence[float], fmt: str = "png") -> Response:
+    """
+    Serve a chart as a raw image with an ETag
+
+    The fingerprint is known before rendering, so a matching If-None-Match
+    gets a 304 without drawing or reading the cache.
+
+    Args:
+        request: Incoming request, checked for If-None-Match
+        kind: Chart name, a key of CHARTS
+        data: Numbers plotted by the chart
+        fmt: Image format, "png" or "svg"
+
+    Returns:
+        Image response, or an empty 304 if the client copy is current
+    """
+    etag = f'"{chart_fingerprint(kind, data, fmt)}"'
+    # Per-user data: browsers may keep a copy but must revalidate it
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    image, _ = render_chart(kind, data, fmt)
+    return Response(content=image, media_type=CHART_MEDIA_TYPES[fmt], headers=headers)
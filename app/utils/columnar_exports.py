@@ -0,0 +1,199 @@
+"""
+Columnar exports as Parquet files or Arrow IPC streams.
+
+Rows are read from a yield_per cursor and converted to Arrow record batches
+of COLUMNAR_BATCH_SIZE rows. Each batch is written out and sent before the
+next one is read. Money stays in integer cents and dates and timestamps keep
+their types, so analytics tools can load the columns without parsing
+formatted strings.
+
+pyarrow is optional. When it is not installed, HAS_PYARROW is False and the
+endpoints answer 501. It is imported on the first export, not at startup.
+"""
+
+import importlib.util
+import io
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator
+
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from app.lazy_imports import lazy_module
+from app.models import Client, Deal, Invoice
+
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+pa = lazy_module("pyarrow")
+pq = lazy_module("pyarrow.parquet")
+
+# Rows per record batch (and per Parquet row group)
+COLUMNAR_BATCH_SIZE = 10_000
+
+COLUMNAR_MEDIA_TYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrows": "application/vnd.apache.arrow.stream",
+}
+
+
+@dataclass(frozen=True)
+class ColumnarExport:
+    """Query and Arrow schema for one exportable table"""
+
+    statement: Callable[[int], object]  # user id -> SELECT in schema column order
+    schema: Callable[[], "pa.Schema"]  # built on use so pyarrow loads lazily
+
+
+def _clients_statement(user_id: int):
+    return select(
+        Client.id, Client.name, Client.email, Client.phone, Client.created_at, Client.updated_at
+    ).where(Client.user_id == user_id).order_by(Client.id)
+
+
+def _clients_schema():
+    return pa.schema([
+        ("id", pa.int64()),
+        ("name", pa.string()),
+        ("email", pa.string()),
+        ("phone", pa.string()),
+        ("created_at", pa.timestamp("us")),
+        ("updated_at", pa.timestamp("us")),
+    ])
+
+
+def _deals_statement(user_id: int):
+    return select(
+        Deal.id, Deal.client_id, Client.name, Deal.stage, Deal.value, Deal.created_at, Deal.updated_at
+    ).join(Client, Deal.client_id == Client.id).where(Client.user_id == user_id).order_by(Deal.id)
+
+
+def _deals_schema():
+    return pa.schema([
+        ("id", pa.int64()),
+        ("client_id", pa.int64()),
+        ("client_name", pa.string()),
+        ("stage", pa.string()),
+        ("value_cents", pa.int64()),
+        ("created_at", pa.timestamp("us")),
+        ("updated_at", pa.timestamp("us")),
+    ])
+
+
+def _invoices_statement(user_id: int):
+    return select(
+        Invoice.id, Invoice.client_id, Client.name, Invoice.number, Invoice.total, Invoice.status, Invoice.due_date
+    ).join(Client, Invoice.client_id == Client.id).where(Client.user_id == user_id).order_by(Invoice.id)
+
+
+def _invoices_schema():
+    return pa.schema([
+        ("id", pa.int64()),
+        ("client_id", pa.int64()),
+        ("client_name", pa.string()),
+        ("number", pa.string()),
+        ("total_cents", pa.int64()),
+        ("status", pa.string()),
+        ("due_date", pa.date32()),
+    ])
+
+
+COLUMNAR_EXPORTS: Dict[str, ColumnarExport] = {
+    "clients": ColumnarExport(_clients_statement, _clients_schema),
+    "deals": ColumnarExport(_deals_statement, _deals_schema),
+    "invoices": ColumnarExport(_invoices_statement, _invoices_schema),
+}
+
+
+def iter_record_batches(
+    engine: Engine,
+    export: ColumnarExport,
+    user_id: int,
+    batch_size: int = COLUMNAR_BATCH_SIZE
+) -> Iterator["pa.RecordBatch"]:
+    """
+    Read an export as Arrow record batches
+
+    Args:
+        engine: Engine to read the rows from on a session of its own
+        export: Table to export
+        user_id: Only rows belonging to this user's clients are read
+        batch_size: Rows per batch
+
+    Yields:
+        Record batches matching export.schema()
+    """
+    schema = export.schema()
+    statement = export.statement(user_id).execution_options(yield_per=batch_size)
+    with Session(engine) as db:
+        for rows in db.exec(statement).partitions(batch_size):
+            columns = zip(*rows)
+            yield pa.RecordBatch.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema
+            )
+
+
+def _drain(buffer: io.BytesIO) -> bytes:
+    chunk = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return chunk
+
+
+def iter_parquet(batches: Iterator["pa.RecordBatch"], schema: "pa.Schema") -> Iterator[bytes]:
+    """Write batches as Parquet row groups, yielding the bytes of each as it is written"""
+    buffer = io.BytesIO()
+    with pq.ParquetWriter(buffer, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            yield _drain(buffer)
+    # Closing the writer appends the footer
+    yield _drain(buffer)
+
+
+def iter_arrow_stream(batches: Iterator["pa.RecordBatch"], schema: "pa.Schema") -> Iterator[bytes]:
+    """Write batches in the Arrow IPC streaming format, one message per batch"""
+    buffer = io.BytesIO()
+    with pa.ipc.new_stream(buffer, schema) as writer:
+        yield _drain(buffer)
+        for batch in batches:
+            writer.write_batch(batch)
+            yield _drain(buffer)
+    yield _drain(buffer)
+
+
+def columnar_response(db: Session, entity: str, fmt: str, user_id: int) -> StreamingResponse:
+    """
+    Stream one table as Parquet or an Arrow IPC stream
+
+    Args:
+        db: Request session; only its engine is used
+        entity: Key of COLUMNAR_EXPORTS
+        fmt: "parquet" or "arrows"
+        user_id: User whose rows are exported
+
+    Returns:
+        StreamingResponse sending one chunk per record batch
+
+    Raises:
+        HTTPException: 404 for an unknown entity or format, 501 without pyarrow
+    """
+    export = COLUMNAR_EXPORTS.get(entity)
+    if export is None or fmt not in COLUMNAR_MEDIA_TYPES:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Export not found")
+    if not HAS_PYARROW:
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Parquet and Arrow exports require pyarrow"
+        )
+
+    schema = export.schema()
+    batches = iter_record_batches(db.get_bind(), export, user_id, COLUMNAR_BATCH_SIZE)
+    writer = iter_parquet if fmt == "parquet" else iter_arrow_stream
+    return StreamingResponse(
+        writer(batches, schema),
+        media_type=COLUMNAR_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f"attachment; filename={entity}.{fmt}"}
+    )
@@ -0,0 +1,125 @@
+"""
+Streaming CSV exports.
+
+The header row is sent before the export query runs, and the rows follow in
+batches of CSV_BATCH_SIZE as the database cursor yields them, so the first
+byte goes out immediately and memory stays flat however large the table is.
+Each batch is formatted with a single writerows call.
+"""
+
+import csv
+import io
+import itertools
+from dataclasses import dataclass
+from operator import itemgetter
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+from app import crud
+
+# Rows fetched from the cursor and formatted per chunk sent
+CSV_BATCH_SIZE = 1000
+
+
+@dataclass(frozen=True)
+class CsvExport:
+    """Row source and column order for one exportable table"""
+
+    rows: Callable[[Session, int, Optional[int]], Iterator[dict]]
+    columns: Tuple[str, ...]
+    filename: str
+
+
+CSV_EXPORTS: Dict[str, CsvExport] = {
+    "clients": CsvExport(
+        crud.iter_clients_with_export_data,
+        ("id", "name", "email", "phone", "notes", "created_at"),
+        "clients.csv"
+    ),
+    "deals": CsvExport(
+        crud.iter_deals_with_export_data,
+        ("id", "client_name", "stage", "value", "value_formatted", "updated_at"),
+        "deals.csv"
+    ),
+    "invoices": CsvExport(
+        crud.iter_invoices_with_export_data,
+        ("id", "client_name", "invoice_number", "total", "status", "due_date"),
+        "invoices.csv"
+    ),
+}
+
+
+def iter_csv(
+    engine: Engine,
+    export: CsvExport,
+    batch_size: int = CSV_BATCH_SIZE,
+    user_id: Optional[int] = None
+) -> Iterator[bytes]:
+    """
+    Yield an export as UTF-8 CSV chunks
+
+    The rows are read on a session of their own, because the request's
+    session is closed before a streamed body is sent.
+
+    Args:
+        engine: Engine to read the rows from
+        export: Table to export
+        batch_size: Rows per chunk
+        user_id: Only export rows belonging to this user's clients
+
+    Yields:
+        The header line, then one chunk per batch of rows
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def drain() -> bytes:
+        chunk = buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+        return chunk
+
+    writer.writerow(export.columns)
+    yield drain()
+
+    values = itemgetter(*export.columns)
+    with Session(engine) as db:
+        rows = export.rows(db, batch_size, user_id)
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                break
+            writer.writerows(map(values, batch))
+            yield drain()
+
+
+def csv_response(db: Session, entity: str, user_id: int) -> StreamingResponse:
+    """
+    Stream one table as a CSV download
+
+    Args:
+        db: Request session; only its engine is used
+        entity: Key of CSV_EXPORTS
+        user_id: User whose clients, deals or invoices are exported
+
+    Returns:
+        StreamingResponse sending the CSV in chunks
+
+    Raises:
+        HTTPException: 404 for an unknown entity
+    """
+    export = CSV_EXPORTS.get(entity)
+    if export is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Unknown export '{entity}'. Available: {', '.join(sorted(CSV_EXPORTS))}"
+        )
+    return StreamingResponse(
+        iter_csv(db.get_bind(), export, CSV_BATCH_SIZE, user_id),
+        media_type="text/csv",
+        headers={"Content-Disposition": f"attachment; filename={export.filename}"}
+    )
@@ -0,0 +1,109 @@
+"""
+Resumable file downloads.
+
+Serves a file from disk with HTTP Range support, so clients can resume an
+interrupted download or fetch a file in pieces. Starlette's FileResponse
+(0.39 or later) does the Range, If-Range and 416 handling and streams the
+file (with zero-copy pathsend where the server supports it); this module
+adds the entity tag and conditional 304 responses on top.
+
+FileResponse opens the file only once the response is being sent. To keep
+a cache eviction or report cleanup in any process from removing the file
+in between, the response serves a private hard link to it, removed again
+when the response is done.
+"""
+
+import os
+from typing import Optional
+from uuid import uuid4
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+from starlette.types import Receive, Scope, Send
+
+# Suffix of the links held while a file is being served
+SERVING_SUFFIX = ".serving"
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class _LinkedFileResponse(FileResponse):
+    """FileResponse for a private hard link, removed however the response ends"""
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            _remove(self.path)
+
+
+def _link_for_serving(path: str) -> Optional[str]:
+    """
+    Hard link a file under a private name
+
+    Returns:
+        The link, or None where the filesystem does not support hard links
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+    """
+    link = f"{path}.{uuid4().hex}{SERVING_SUFFIX}"
+    try:
+        os.link(path, link)
+    except FileNotFoundError:
+        raise
+    except OSError:
+        return None
+    return link
+
+
+def ranged_file_response(
+    request: Request,
+    path: str,
+    media_type: str,
+    filename: str,
+    etag: Optional[str] = None
+) -> Response:
+    """
+    Serve a file with Range, If-Range and ETag support
+
+    The file is served through a hard link taken before returning, so it
+    can be served to the end even if it is deleted in the meantime.
+
+    Args:
+        request: Incoming request, checked for If-None-Match (FileResponse
+            checks Range and If-Range)
+        path: File to serve
+        media_type: Content type of the file
+        filename: Name offered in Content-Disposition
+        etag: Quoted entity tag (derived from modification time and size when omitted)
+
+    Returns:
+        200 with the whole file, 206 with the requested range(s), 304 if
+        the client's copy is current, or 416 if the range is outside the file
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+    """
+    stat = os.stat(path)
+    etag = etag or f'"{int(stat.st_mtime)}-{stat.st_size}"'
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+
+    link = _link_for_serving(path)
+    if link is not None:
+        stat = os.stat(link)
+    response_class = FileResponse if link is None else _LinkedFileResponse
+    # FileResponse keeps a given ETag and matches If-Range against it
+    return response_class(
+        link or path,
+        media_type=media_type,
+        stat_result=stat,
+        headers={"ETag": etag, "Content-Disposition": f"attachment; filename={filename}"}
+    )
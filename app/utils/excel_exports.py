@@ -1,196 +1,190 @@
+"""
+Excel exports written with xlsxwriter in constant-memory mode.
+
+Rows are written to the worksheet as they are read, so an export can stream
+straight from a database cursor without building a DataFrame or holding more
+than one row in memory. Column widths are estimated from the first
+WIDTH_SAMPLE_ROWS rows instead of measuring every value.
+"""
+
 import io
-import pandas as pd
-from typing import List, Dict, Any
+import itertools
 from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from app.lazy_imports import lazy_module
+
+# Imported on first export rather than at startup
+xlsxwriter = lazy_module("xlsxwriter")
+
+# Rows inspected to size each column, and the widest a column may get
+WIDTH_SAMPLE_ROWS = 500
+MAX_COLUMN_WIDTH = 60
+
+# First row of the table, below the title and generation date
+TABLE_START_ROW = 3
+
+CLIENT_COLUMNS = ("id", "name", "deal_count", "total_value", "total_value_formatted")
+DEAL_COLUMNS = ("id", "client_name", "stage", "value", "value_formatted", "updated_at")
+
+HEADER_FORMAT = {
+    'bold': True,
+    'bg_color': '#0d6efd',
+    'color': 'white',
+    'border': 1
+}
+TITLE_FORMAT = {'bold': True, 'font_size': 16}
+
+def _new_workbook(output: io.BytesIO):
+    """Workbook that flushes each row to a temp file once the next row starts"""
+    return xlsxwriter.Workbook(output, {'constant_memory': True})
+
+def _write_title(workbook, worksheet, title: str, merge_to: Optional[str] = None) -> None:
+    """Title in row 1 and generation time in row 2"""
+    title_format = workbook.add_format(TITLE_FORMAT)
+    if merge_to:
+        worksheet.merge_range(f'A1:{merge_to}1', title, title_format)
+    else:
+        worksheet.write('A1', title, title_format)
+    worksheet.write('A2', f'Generated on: {datetime.now().strftime("%Y-%m-%d %H:%M")}')
+
+def _peek_rows(
+    rows: Iterable[Dict[str, Any]],
+    default_columns: Sequence[str]
+) -> Tuple[Sequence[str], List[Dict[str, Any]], Iterator[Dict[str, Any]]]:
+    """
+    Split off the first rows for sizing without consuming the stream
+
+    Returns:
+        Tuple of (column names, sampled rows, iterator over every row)
+    """
+    rows = iter(rows)
+    sample = list(itertools.islice(rows, WIDTH_SAMPLE_ROWS))
+    columns = list(sample[0].keys()) if sample else list(default_columns)
+    return columns, sample, itertools.chain(sample, rows)
+
+def _estimate_width(column: str, sample: List[Dict[str, Any]]) -> int:
+    """Width fitting the header and the longest sampled value"""
+    longest = max((len(str(row.get(column, ""))) for row in sample), default=0)
+    return min(max(longest, len(column)) + 2, MAX_COLUMN_WIDTH)
+
+def _write_rows(
+    worksheet,
+    columns: Sequence[str],
+    rows: Iterable[Dict[str, Any]],
+    first_row: int
+) -> int:
+    """Write rows in column order starting at first_row and return the next free row"""
+    row_num = first_row
+    for row in rows:
+        worksheet.write_row(row_num, 0, [row.get(column) for column in columns])
+        row_num += 1
+    return row_num
 
 def generate_pipeline_excel(pipeline_data: Dict[str, Any]) -> bytes:
     """
     Generate Excel file for pipeline summary data
-    
+
     Args:
         pipeline_data: Dictionary containing pipeline statistics
-        
+
     Returns:
         Excel file as bytes
     """
-    # Create pipeline summary dataframe
-    pipeline_df = pd.DataFrame({
-        'Stage': ['Lead', 'Proposed', 'Won'],
-        'Count': [
-            pipeline_data['lead_count'], 
-            pipeline_data['proposed_count'], 
-            pipeline_data['won_count']
-        ],
-        'Value ($)': [
-            pipeline_data['lead_value'], 
-            pipeline_data['proposed_value'], 
-            pipeline_data['won_value']
-        ]
+    output = io.BytesIO()
+    workbook = _new_workbook(output)
+    worksheet = workbook.add_worksheet('Pipeline Summary')
+    header_format = workbook.add_format(HEADER_FORMAT)
+    total_format = workbook.add_format({
+        'bold': True,
+        'bg_color': '#f8f9fa',
+        'border': 1
     })
-    
-    # Add totals row
-    pipeline_df.loc[len(pipeline_df)] = [
-        'Total', 
-        pipeline_data['total_count'],
-        pipeline_data['total_value']
+
+    # Set column widths
+    worksheet.set_column('A:A', 15)
+    worksheet.set_column('B:C', 20)
+
+    _write_title(workbook, worksheet, 'Pipeline Summary')
+    worksheet.write_row(TABLE_START_ROW, 0, ['Stage', 'Count', 'Value ($)'], header_format)
+    rows = [
+        ['Lead', pipeline_data['lead_count'], pipeline_data['lead_value']],
+        ['Proposed', pipeline_data['proposed_count'], pipeline_data['proposed_value']],
+        ['Won', pipeline_data['won_count'], pipeline_data['won_value']],
     ]
-    
-    # Create Excel writer with pandas
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        pipeline_df.to_excel(writer, sheet_name='Pipeline Summary', index=False)
-        
-        # Get the worksheet and workbook
-        workbook = writer.book
-        worksheet = writer.sheets['Pipeline Summary']
-        
-        # Add formats
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#0d6efd',
-            'color': 'white',
-            'border': 1
-        })
-        
-        total_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#f8f9fa',
-            'border': 1
-        })
-        
-        # Format cells
-        for col_num, value in enumerate(pipeline_df.columns.values):
-            worksheet.write(0, col_num, value, header_format)
-        
-        # Format total row
-        for col_num in range(len(pipeline_df.columns)):
-            worksheet.write(4, col_num, pipeline_df.iloc[3, col_num], total_format)
-        
-        # Set column widths
-        worksheet.set_column('A:A', 15)
-        worksheet.set_column('B:C', 20)
-        
-        # Add a title
-        title_format = workbook.add_format({'bold': True, 'font_size': 16})
-        worksheet.write('A1', 'Pipeline Summary', title_format)
-        worksheet.write('A2', f'Generated on: {datetime.now().strftime("%Y-%m-%d %H:%M")}')
-        
-        # Start the actual data at row 4
-        pipeline_df.to_excel(writer, sheet_name='Pipeline Summary', startrow=3, index=False)
-    
+    for offset, row in enumerate(rows, start=1):
+        worksheet.write_row(TABLE_START_ROW + offset, 0, row)
+    worksheet.write_row(
+        TABLE_START_ROW + len(rows) + 1, 0,
+        ['Total', pipeline_data['total_count'], pipeline_data['total_value']],
+        total_format
+    )
+
+    workbook.close()
     return output.getvalue()
 
-def generate_clients_excel(client_data: List[Dict[str, Any]]) -> bytes:
+def generate_clients_excel(client_data: Iterable[Dict[str, Any]]) -> bytes:
     """
     Generate Excel file for client distribution data
-    
+
     Args:
-        client_data: List of dictionaries containing client distribution data
-        
+        client_data: Client distribution rows, e.g. from crud.get_client_distribution
+
     Returns:
         Excel file as bytes
     """
-    # Create clients dataframe
-    clients_df = pd.DataFrame(client_data)
-    
-    # Create Excel writer with pandas
+    columns, sample, rows = _peek_rows(client_data, CLIENT_COLUMNS)
+
     output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        clients_df.to_excel(writer, sheet_name='Client Distribution', index=False)
-        
-        # Get the worksheet and workbook
-        workbook = writer.book
-        worksheet = writer.sheets['Client Distribution']
-        
-        # Add formats
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#0d6efd',
-            'color': 'white',
-            'border': 1
-        })
-        
-        # Format header
-        for col_num, value in enumerate(clients_df.columns.values):
-            worksheet.write(0, col_num, value, header_format)
-        
-        # Set column widths
-        for i, col in enumerate(clients_df.columns):
-            column_width = max(clients_df[col].astype(str).map(len).max(), len(col)) + 2
-            worksheet.set_column(i, i, column_width)
-        
-        # Add title
-        title_format = workbook.add_format({'bold': True, 'font_size': 16})
-        worksheet.merge_range('A1:C1', 'Client Distribution Report', title_format)
-        worksheet.write('A2', f'Generated on: {datetime.now().strftime("%Y-%m-%d %H:%M")}')
-        
-        # Start the actual data at row 4
-        clients_df.to_excel(writer, sheet_name='Client Distribution', startrow=3, index=False)
-    
+    workbook = _new_workbook(output)
+    worksheet = workbook.add_worksheet('Client Distribution')
+    header_format = workbook.add_format(HEADER_FORMAT)
+
+    # Set column widths
+    for i, column in enumerate(columns):
+        worksheet.set_column(i, i, _estimate_width(column, sample))
+
+    _write_title(workbook, worksheet, 'Client Distribution Report', merge_to='C')
+    worksheet.write_row(TABLE_START_ROW, 0, columns, header_format)
+    _write_rows(worksheet, columns, rows, TABLE_START_ROW + 1)
+
+    workbook.close()
     return output.getvalue()
 
-def generate_deals_excel(deals_data: List[Dict[str, Any]]) -> bytes:
+def generate_deals_excel(deals_data: Iterable[Dict[str, Any]]) -> bytes:
     """
     Generate Excel file for deals data
-    
+
+    Rows are consumed one at a time, so passing crud.iter_deals_with_export_data
+    keeps memory flat regardless of the number of deals.
+
     Args:
-        deals_data: List of dictionaries containing deals data
-        
+        deals_data: Deal export rows, e.g. from crud.iter_deals_with_export_data
+
     Returns:
         Excel file as bytes
     """
-    # Create deals dataframe
-    deals_df = pd.DataFrame(deals_data)
-    
-    # Create Excel writer with pandas
+    columns, sample, rows = _peek_rows(deals_data, DEAL_COLUMNS)
+
     output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-        deals_df.to_excel(writer, sheet_name='Deals', index=False)
-        
-        # Get the worksheet and workbook
-        workbook = writer.book
-        worksheet = writer.sheets['Deals']
-        
-        # Add formats
-        header_format = workbook.add_format({
-            'bold': True,
-            'bg_color': '#0d6efd',
-            'color': 'white',
-            'border': 1
-        })
-        
-        currency_format = workbook.add_format({'num_format': '$#,##0.00'})
-        date_format = workbook.add_format({'num_format': 'yyyy-mm-dd'})
-        
-        # Format header
-        for col_num, value in enumerate(deals_df.columns.values):
-            worksheet.write(0, col_num, value, header_format)
-        
-        # Format columns based on data type
-        if 'value' in deals_df.columns:
-            value_col = deals_df.columns.get_loc('value')
-            worksheet.set_column(value_col, value_col, 15, currency_format)
-        
-        if 'created_at' in deals_df.columns:
-            date_col = deals_df.columns.get_loc('created_at')
-            worksheet.set_column(date_col, date_col, 12, date_format)
-        
-        if 'updated_at' in deals_df.columns:
-            date_col = deals_df.columns.get_loc('updated_at')
-            worksheet.set_column(date_col, date_col, 12, date_format)
-        
-        # Set column widths
-        for i, col in enumerate(deals_df.columns):
-            if col not in ['value', 'created_at', 'updated_at']:
-                column_width = max(deals_df[col].astype(str).map(len).max(), len(col)) + 2
-                worksheet.set_column(i, i, column_width)
-        
-        # Add title
-        title_format = workbook.add_format({'bold': True, 'font_size': 16})
-        worksheet.merge_range('A1:E1', 'Deals Report', title_format)
-        worksheet.write('A2', f'Generated on: {datetime.now().strftime("%Y-%m-%d %H:%M")}')
-        
-        # Start the actual data at row 4
-        deals_df.to_excel(writer, sheet_name='Deals', startrow=3, index=False)
-    
-    return output.getvalue() 
\ No newline at end of file
+    workbook = _new_workbook(output)
+    worksheet = workbook.add_worksheet('Deals')
+    header_format = workbook.add_format(HEADER_FORMAT)
+    currency_format = workbook.add_format({'num_format': '$#,##0.00'})
+    date_format = workbook.add_format({'num_format': 'yyyy-mm-dd'})
+
+    # Format columns based on data type
+    for i, column in enumerate(columns):
+        if column == 'value':
+            worksheet.set_column(i, i, 15, currency_format)
+        elif column in ('created_at', 'updated_at'):
+            worksheet.set_column(i, i, 12, date_format)
+        else:
+            worksheet.set_column(i, i, _estimate_width(column, sample))
+
+    _write_title(workbook, worksheet, 'Deals Report', merge_to='E')
+    worksheet.write_row(TABLE_START_ROW, 0, columns, header_format)
+    _write_rows(worksheet, columns, rows, TABLE_START_ROW + 1)
+
+    workbook.close()
+    return output.getvalue()
@@ -0,0 +1,122 @@
+"""
+In-process latency metrics.
+
+Each named recorder keeps the most recent samples in a bounded window and
+reports count, percentiles and error totals on demand. Recording is a locked
+deque append, cheap enough for per-request use. PhaseTimer breaks a single
+request into named phases on top of the shared recorders.
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator
+
+import numpy as np
+
+# Samples kept per recorder for percentile calculations
+LATENCY_WINDOW_SIZE = 1000
+
+
+class LatencyRecorder:
+    """Rolling window of latencies for one operation"""
+
+    def __init__(self, name: str, window_size: int = LATENCY_WINDOW_SIZE):
+        self.name = name
+        self._samples: Deque[float] = deque(maxlen=window_size)
+        self._count = 0
+        self._errors = 0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float, error: bool = False) -> None:
+        """Add one sample"""
+        with self._lock:
+            self._samples.append(seconds)
+            self._count += 1
+            if error:
+                self._errors += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """Record the wall time of the enclosed block, counting exceptions as errors"""
+        start = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.record(time.perf_counter() - start, error=True)
+            raise
+        self.record(time.perf_counter() - start)
+
+    def snapshot(self) -> Dict[str, float]:
+        """
+        Summarize the recorded samples
+
+        Returns:
+            Dictionary with the total count and errors, plus p50/p95/p99/max
+            in milliseconds over the current window
+        """
+        with self._lock:
+            samples = np.fromiter(self._samples, dtype=np.float64)
+            count, errors = self._count, self._errors
+
+        summary = {"count": count, "errors": errors}
+        if samples.size:
+            p50, p95, p99 = np.percentile(samples, [50, 95, 99]) * 1000
+            summary.update({
+                "p50_ms": round(float(p50), 2),
+                "p95_ms": round(float(p95), 2),
+                "p99_ms": round(float(p99), 2),
+                "max_ms": round(float(samples.max()) * 1000, 2),
+            })
+        return summary
+
+    def reset(self) -> None:
+        """Forget every sample"""
+        with self._lock:
+            self._samples.clear()
+            self._count = 0
+            self._errors = 0
+
+
+class PhaseTimer:
+    """
+    Times the phases of one request
+
+    Each phase is recorded both on this timer, for reporting back to the
+    caller, and on the shared recorder named "<prefix>.<phase>".
+    """
+
+    def __init__(self, prefix: str):
+        self.prefix = prefix
+        self.durations: Dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the enclosed block as one phase"""
+        start = time.perf_counter()
+        with get_latency_recorder(f"{self.prefix}.{name}").time():
+            yield
+        self.durations[name] = time.perf_counter() - start
+
+    def server_timing(self) -> str:
+        """Format the phase durations as a Server-Timing header value"""
+        return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.durations.items())
+
+
+_recorders: Dict[str, LatencyRecorder] = {}
+_recorders_lock = threading.Lock()
+
+
+def get_latency_recorder(name: str) -> LatencyRecorder:
+    """Return the recorder for name, creating it on first use"""
+    recorder = _recorders.get(name)
+    if recorder is None:
+        with _recorders_lock:
+            recorder = _recorders.setdefault(name, LatencyRecorder(name))
+    return recorder
+
+
+def latency_snapshot() -> Dict[str, Dict[str, float]]:
+    """Summaries of every recorder, keyed by name"""
+    return {name: recorder.snapshot() for name, recorder in sorted(_recorders.items())}
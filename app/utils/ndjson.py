@@ -0,0 +1,73 @@
+"""
+Newline-delimited JSON responses for list endpoints.
+
+Clients that send `Accept: application/x-ndjson` get one JSON object per line
+instead of a single array. Rows are read from a yield_per cursor and sent in
+chunks of NDJSON_BATCH_SIZE lines, so the first rows arrive while the query
+is still running and memory stays flat for large accounts. Compression is
+left to StreamingGZipMiddleware, which flushes after every chunk.
+"""
+
+from typing import Iterator
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+from app.utils.serializers import RowSerializer
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Rows fetched from the cursor and serialized per chunk sent
+NDJSON_BATCH_SIZE = 500
+
+
+def wants_ndjson(request: Request) -> bool:
+    """Whether the client asked for newline-delimited JSON"""
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def iter_ndjson(
+    engine: Engine,
+    statement,
+    serializer: RowSerializer,
+    batch_size: int = NDJSON_BATCH_SIZE
+) -> Iterator[bytes]:
+    """
+    Yield the rows of a query as NDJSON chunks
+
+    The rows are read on a session of their own, because the request's
+    session is closed before a streamed body is sent.
+
+    Args:
+        engine: Engine to read the rows from
+        statement: SELECT of the serializer's table
+        serializer: Read model serializer; only its columns are selected
+        batch_size: Rows per chunk
+
+    Yields:
+        One chunk of newline-terminated JSON objects per batch
+    """
+    with Session(engine) as db:
+        statement = serializer.select(statement).execution_options(yield_per=batch_size)
+        for batch in db.execute(statement).partitions(batch_size):
+            yield serializer.dumps_lines(batch)
+
+
+def ndjson_response(db: Session, statement, serializer: RowSerializer) -> StreamingResponse:
+    """
+    Stream the rows of a query as application/x-ndjson
+
+    Args:
+        db: Request session; only its engine is used
+        statement: SELECT of the serializer's table
+        serializer: Read model serializer
+
+    Returns:
+        StreamingResponse sending one chunk per batch of rows
+    """
+    return StreamingResponse(
+        iter_ndjson(db.get_bind(), statement, serializer, NDJSON_BATCH_SIZE),
+        media_type=NDJSON_MEDIA_TYPE
+    )
@@ -0,0 +1,117 @@
+"""
+Notification read state and the per-user unread counter.
+
+`NotificationCounter` holds each user's unread count, so the badge in the UI
+is a primary key lookup instead of a count over the notification table.
+Every change to a notification's read state goes through the helpers below.
+They adjust the counter in the caller's transaction, so the count commits or
+rolls back together with the notifications it describes. None of them
+commit.
+"""
+
+from sqlalchemy import func, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, select
+
+from app.models import Notification, NotificationCounter
+
+
+def adjust_unread(session: Session, user_id: int, delta: int) -> None:
+    """Atomically add a delta to a user's unread count, creating the counter if needed"""
+    if delta == 0:
+        return
+    table = NotificationCounter.__table__
+
+    dialect = session.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite_insert if dialect == "sqlite" else postgresql_insert
+        statement = insert(table).values(user_id=user_id, unread=max(delta, 0))
+        statement = statement.on_conflict_do_update(
+            index_elements=["user_id"],
+            set_={"unread": func.max(table.c.unread + delta, 0) if dialect == "sqlite"
+                  else func.greatest(table.c.unread + delta, 0)}
+        )
+        session.execute(statement)
+        return
+
+    # Other backends: increment in place, insert when the row does not exist yet
+    result = session.execute(
+        update(table).where(table.c.user_id == user_id).values(unread=table.c.unread + delta)
+    )
+    if result.rowcount == 0:
+        session.execute(table.insert().values(user_id=user_id, unread=max(delta, 0)))
+
+
+def unread_count(session: Session, user_id: int) -> int:
+    """Read a user's unread count from the counter table"""
+    unread = session.exec(
+        select(NotificationCounter.unread).where(NotificationCounter.user_id == user_id)
+    ).first()
+    return unread or 0
+
+
+def mark_read(session: Session, notification: Notification) -> bool:
+    """
+    Mark one notification as read
+
+    The update only matches while the notification is unread, so concurrent
+    requests for the same notification decrement the counter once.
+
+    Args:
+        session: Database session
+        notification: Notification to mark, already checked to belong to the user
+
+    Returns:
+        True if the notification was unread
+    """
+    result = session.execute(
+        update(Notification)
+        .where(Notification.id == notification.id, Notification.is_read == False)
+        .values(is_read=True)
+    )
+    if result.rowcount == 0:
+        return False
+    adjust_unread(session, notification.user_id, -1)
+    return True
+
+
+def mark_all_read(session: Session, user_id: int) -> int:
+    """
+    Mark all of a user's unread notifications as read in one UPDATE
+
+    Args:
+        session: Database session
+        user_id: Owner of the notifications
+
+    Returns:
+        Number of notifications that were unread
+    """
+    result = session.execute(
+        update(Notification)
+        .where(Notification.user_id == user_id, Notification.is_read == False)
+        .values(is_read=True)
+    )
+    adjust_unread(session, user_id, -result.rowcount)
+    return result.rowcount
+
+
+def rebuild_unread_counters(session: Session) -> int:
+    """
+    Recompute every user's unread counter from the notification table (does not commit)
+
+    Returns:
+        Number of users with unread notifications
+    """
+    counts = session.exec(
+        select(Notification.user_id, func.count())
+        .where(Notification.is_read == False)
+        .group_by(Notification.user_id)
+    ).all()
+    session.execute(NotificationCounter.__table__.delete())
+    if counts:
+        session.execute(
+            NotificationCounter.__table__.insert(),
+            [{"user_id": user_id, "unread": unread} for user_id, unread in counts]
+        )
+    return len(counts)
@@ -0,0 +1,222 @@
+"""
+Transactional outbox for emails and other side effects of a write.
+
+A request that should trigger an email records an `OutboxMessage` in the
+same transaction as the change itself: if the change rolls back, so does the
+message, and once it commits the message survives restarts. The request
+worker never renders or sends anything.
+
+A dispatcher loop, run inside the app or as its own process by
+scripts/run_outbox_dispatcher.py, delivers the messages:
+
+1. It claims up to OUTBOX_BATCH_SIZE due messages with a conditional UPDATE
+   that stamps them with a claim token. Several dispatchers can run at once
+   and each message is claimed by only one of them.
+2. It delivers the batch with at most OUTBOX_CONCURRENCY sends in flight.
+3. It records the outcome of every message in one transaction. Sent
+   messages are kept with their sent_at time. Failures are retried with
+   exponential backoff until OUTBOX_MAX_ATTEMPTS, then marked failed with
+   the last error.
+
+A dispatcher that dies mid-batch leaves its messages in the sending state.
+They are claimed again after OUTBOX_CLAIM_TIMEOUT. Delivery is therefore at
+least once.
+"""
+
+import asyncio
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, or_, update
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from app.models import OutboxMessage, OutboxStatus
+from app.utils.email_service import send_deal_notification_email
+
+# Messages claimed per batch, and how many are delivered at once
+OUTBOX_BATCH_SIZE = int(os.getenv("OUTBOX_BATCH_SIZE", "100"))
+OUTBOX_CONCURRENCY = int(os.getenv("OUTBOX_CONCURRENCY", "10"))
+
+# Attempts before a message is marked failed; the first retry waits
+# OUTBOX_RETRY_SECONDS and each later one twice as long as the one before
+OUTBOX_MAX_ATTEMPTS = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+OUTBOX_RETRY_SECONDS = int(os.getenv("OUTBOX_RETRY_SECONDS", "30"))
+
+# Idle wait between polls when the outbox is drained
+OUTBOX_POLL_SECONDS = float(os.getenv("OUTBOX_POLL_SECONDS", "2"))
+
+# Run the dispatcher inside the web app; set to 0 when it runs as its own process
+OUTBOX_DISPATCH_IN_APP = os.getenv("OUTBOX_DISPATCH_IN_APP", "1") == "1"
+
+# Messages left in the sending state longer than this are claimed again
+OUTBOX_CLAIM_TIMEOUT = timedelta(minutes=5)
+
+# Message kinds and the coroutines that deliver them; the payload holds their arguments
+OUTBOX_HANDLERS: Dict[str, Callable[..., Awaitable[None]]] = {
+    "deal_notification_email": send_deal_notification_email,
+}
+
+
+def enqueue(session: Session, kind: str, **payload: Any) -> OutboxMessage:
+    """
+    Record a message in the caller's transaction (does not commit)
+
+    Args:
+        session: Session of the write that triggers the message
+        kind: Key of OUTBOX_HANDLERS
+        **payload: JSON-serializable arguments for the handler
+
+    Returns:
+        The staged outbox message
+    """
+    if kind not in OUTBOX_HANDLERS:
+        raise ValueError(f"Unknown outbox message kind '{kind}'")
+    message = OutboxMessage(kind=kind, payload=json.dumps(payload))
+    session.add(message)
+    return message
+
+
+def _due(now: datetime):
+    return or_(
+        and_(OutboxMessage.status == OutboxStatus.PENDING, OutboxMessage.available_at <= now),
+        and_(
+            OutboxMessage.status == OutboxStatus.SENDING,
+            OutboxMessage.claimed_at < now - OUTBOX_CLAIM_TIMEOUT
+        ),
+    )
+
+
+def claim_batch(engine: Engine, batch_size: int = OUTBOX_BATCH_SIZE) -> List[OutboxMessage]:
+    """
+    Claim up to batch_size due messages for this dispatcher
+
+    Args:
+        engine: Engine to claim on, with a session of its own
+        batch_size: Most messages to claim
+
+    Returns:
+        The claimed messages in id order, detached from any session
+    """
+    now = datetime.utcnow()
+    token = uuid4().hex
+    with Session(engine) as db:
+        ids = db.exec(
+            select(OutboxMessage.id).where(_due(now)).order_by(OutboxMessage.id).limit(batch_size)
+        ).all()
+        if not ids:
+            return []
+
+        # Repeating the due condition skips rows another dispatcher claimed since the SELECT
+        db.execute(
+            update(OutboxMessage)
+            .where(OutboxMessage.id.in_(ids), _due(now))
+            .values(
+                status=OutboxStatus.SENDING,
+                claim_token=token,
+                claimed_at=now,
+                attempts=OutboxMessage.attempts + 1
+            )
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+        return list(db.exec(
+            select(OutboxMessage).where(OutboxMessage.claim_token == token).order_by(OutboxMessage.id)
+        ).all())
+
+
+async def _deliver(message: OutboxMessage, semaphore: asyncio.Semaphore) -> Optional[str]:
+    """Run the message's handler; returns the error, or None once it was delivered"""
+    async with semaphore:
+        try:
+            handler = OUTBOX_HANDLERS[message.kind]
+            await handler(**json.loads(message.payload))
+        except Exception as e:
+            return f"{type(e).__name__}: {e}"
+    return None
+
+
+def record_deliveries(engine: Engine, outcomes: List[Tuple[OutboxMessage, Optional[str]]]) -> None:
+    """
+    Store the outcome of each claimed message in one transaction
+
+    A message that was reclaimed by another dispatcher in the meantime no
+    longer carries this claim token and is left alone.
+
+    Args:
+        engine: Engine to write to
+        outcomes: Claimed messages with their delivery error, or None when sent
+    """
+    now = datetime.utcnow()
+    with Session(engine) as db:
+        for message, error in outcomes:
+            if error is None:
+                values = {"status": OutboxStatus.SENT, "sent_at": now, "last_error": None}
+            elif message.attempts >= OUTBOX_MAX_ATTEMPTS:
+                values = {"status": OutboxStatus.FAILED, "last_error": error}
+            else:
+                backoff = OUTBOX_RETRY_SECONDS * 2 ** (message.attempts - 1)
+                values = {
+                    "status": OutboxStatus.PENDING,
+                    "last_error": error,
+                    "available_at": now + timedelta(seconds=backoff),
+                }
+            db.execute(
+                update(OutboxMessage)
+                .where(OutboxMessage.id == message.id, OutboxMessage.claim_token == message.claim_token)
+                .values(claim_token=None, **values)
+                .execution_options(synchronize_session=False)
+            )
+        db.commit()
+
+
+async def dispatch_batch(
+    engine: Engine,
+    batch_size: int = OUTBOX_BATCH_SIZE,
+    concurrency: int = OUTBOX_CONCURRENCY
+) -> int:
+    """
+    Claim, deliver and record one batch of messages
+
+    Args:
+        engine: Engine holding the outbox
+        batch_size: Most messages to claim
+        concurrency: Most deliveries in flight at once
+
+    Returns:
+        Number of messages claimed
+    """
+    messages = await run_in_threadpool(claim_batch, engine, batch_size)
+    if not messages:
+        return 0
+
+    semaphore = asyncio.Semaphore(concurrency)
+    errors = await asyncio.gather(*(_deliver(message, semaphore) for message in messages))
+    outcomes = list(zip(messages, errors))
+    await run_in_threadpool(record_deliveries, engine, outcomes)
+
+    failed = sum(error is not None for error in errors)
+    if failed:
+        print(f"Outbox: {len(messages) - failed} delivered, {failed} failed")
+    return len(messages)
+
+
+async def run_outbox_dispatcher(engine: Engine) -> None:
+    """
+    Deliver outbox messages until cancelled
+
+    Batches are dispatched back to back while the outbox has a backlog. Once
+    it is drained, the dispatcher polls every OUTBOX_POLL_SECONDS.
+    """
+    while True:
+        try:
+            claimed = await dispatch_batch(engine)
+        except Exception as e:
+            print(f"Error dispatching outbox messages: {str(e)}")
+            claimed = 0
+        if claimed < OUTBOX_BATCH_SIZE:
+            await asyncio.sleep(OUTBOX_POLL_SECONDS)
@@ -0,0 +1,128 @@
+"""
+Shared building blocks for the reportlab PDF reports.
+
+Style sheets and table styles are built once per process and reused by every
+report instead of being recreated on each call. They are treated as
+read-only; a report that needs a variant should copy the style first. Chart
+images are embedded straight from memory.
+
+This module imports reportlab at load time, so the generators in app.utils
+import it on first use rather than at startup.
+"""
+
+import io
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Dict, List
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import StyleSheet1, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import Image, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+PAGE_MARGIN = 72  # points
+
+PIPELINE_COLUMN_WIDTHS = (2 * inch, 1 * inch, 2 * inch)
+CLIENT_COLUMN_WIDTHS = (3 * inch, 1.5 * inch, 1.5 * inch)
+CHART_WIDTH = 5 * inch
+CHART_HEIGHT = 3 * inch
+
+
+@lru_cache(maxsize=None)
+def report_styles() -> StyleSheet1:
+    """Paragraph styles shared by every report"""
+    return getSampleStyleSheet()
+
+
+@lru_cache(maxsize=None)
+def table_style(total_row: bool = False) -> TableStyle:
+    """
+    Grid style for report tables
+
+    Args:
+        total_row: Highlight the last row as a totals row
+
+    Returns:
+        Shared TableStyle with a bold, shaded header row
+    """
+    commands = [
+        ('BACKGROUND', (0, 0), (-1, 0), colors.lightblue),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ]
+    if total_row:
+        commands += [
+            ('BACKGROUND', (0, -1), (-1, -1), colors.lightgrey),
+            ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+        ]
+    commands.append(('GRID', (0, 0), (-1, -1), 1, colors.black))
+    return TableStyle(commands)
+
+
+def new_document(buffer: io.BytesIO) -> SimpleDocTemplate:
+    """Letter-sized document with the standard report margins"""
+    return SimpleDocTemplate(
+        buffer,
+        pagesize=letter,
+        rightMargin=PAGE_MARGIN,
+        leftMargin=PAGE_MARGIN,
+        topMargin=PAGE_MARGIN,
+        bottomMargin=PAGE_MARGIN
+    )
+
+
+def report_header(company_name: str, title: str) -> List[Any]:
+    """Company name, report title and generation time"""
+    styles = report_styles()
+    date_str = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    return [
+        Paragraph(f"{company_name}", styles['Heading1']),
+        Spacer(1, 0.25 * inch),
+        Paragraph(title, styles['Heading2']),
+        Spacer(1, 0.1 * inch),
+        Paragraph(f"Generated: {date_str}", styles['Normal']),
+        Spacer(1, 0.25 * inch),
+    ]
+
+
+def pipeline_table(pipeline_stats: Dict[str, Any]) -> Table:
+    """Deal count and value per stage with a totals row"""
+    stages = pipeline_stats.get("stages", {})
+    total = pipeline_stats.get("total", {})
+    rows = [["Stage", "Count", "Value"]]
+    for label, stage in [("Lead", "lead"), ("Proposed", "proposed"), ("Won", "won")]:
+        rows.append([label, stages.get(stage, {}).get("count", 0), stages.get(stage, {}).get("value_formatted", "$0")])
+    rows.append(["Total", total.get("count", 0), total.get("value_formatted", "$0")])
+
+    table = Table(rows, colWidths=PIPELINE_COLUMN_WIDTHS)
+    table.setStyle(table_style(total_row=True))
+    return table
+
+
+def client_table(client_distribution: List[Dict[str, Any]], limit: int) -> Table:
+    """Deal count and value for the top clients"""
+    rows = [["Client", "Deal Count", "Total Value"]]
+    for client in client_distribution[:limit]:
+        rows.append([
+            client.get("name", "Unknown"),
+            client.get("deal_count", 0),
+            client.get("total_value_formatted", "$0")
+        ])
+
+    if len(rows) == 1:  # Only header, no data
+        rows.append(["No client data available", "", ""])
+
+    table = Table(rows, colWidths=CLIENT_COLUMN_WIDTHS)
+    table.setStyle(table_style())
+    return table
+
+
+def png_image(png: bytes, width: float = CHART_WIDTH, height: float = CHART_HEIGHT) -> Image:
+    """Image flowable read from PNG bytes in memory"""
+    return Image(io.BytesIO(png), width=width, height=height)
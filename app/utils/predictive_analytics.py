@@ -2,12 +2,33 @@
 Predictive analytics utilities for sales forecasting and trend analysis.
 """
 
+import asyncio
+import os
+from collections import OrderedDict
 import numpy as np
-import pandas as pd
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from threading import Lock
 from typing import Dict, List, Tuple, Optional, Any
+from sqlalchemy import case, func
 from sqlmodel import Session, select
+from starlette.concurrency import run_in_threadpool
+from app.database import engine
 from app.models import Deal, Client
+from app.utils.analytics_queries import velocity_stats
+from app.utils.stage_history import (
+    average_cycle_length,
+    stage_history_version,
+    stage_history_versions,
+    stage_value_series,
+    stage_value_series_by_user
+)
+from app.utils.time_series import date_axis, format_dates
+
+# Hour of the day (UTC) at which every user's forecast is precomputed
+FORECAST_REFRESH_HOUR = int(os.getenv("FORECAST_REFRESH_HOUR", "2"))
+
+# Most forecasts kept in memory; the least recently used are evicted first
+FORECAST_CACHE_MAX_SIZE = int(os.getenv("FORECAST_CACHE_MAX_SIZE", "4096"))
 
 class PredictiveAnalytics:
     """Predictive analytics utility class for sales forecasting and trend analysis"""
@@ -16,35 +37,110 @@ class PredictiveAnalytics:
     def forecast_pipeline_value(
         db: Session, 
         days_history: int = 90, 
-        days_forecast: int = 30
+        days_forecast: int = 30,
+        user_id: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Forecast pipeline value for the next n days based on historical data
         
+        Results are cached per user against the version of their stage
+        history, so repeated calls only cost one small version query until
+        the pipeline changes or the day rolls over.
+        
         Args:
             db: Database session
             days_history: Number of days of historical data to use
             days_forecast: Number of days to forecast
+            user_id: Forecast one user's pipeline (all users when None)
             
         Returns:
             Dictionary containing forecast data
         """
+        key = (user_id, days_history, days_forecast)
+        version = (stage_history_version(db, user_id), datetime.utcnow().date())
+        cached = _get_cached_forecast(key, version)
+        if cached is not None:
+            return cached
+        
         # Calculate start date for historical data
         start_date = datetime.utcnow() - timedelta(days=days_history)
         
-        # Get all deals updated within the date range
-        statement = select(Deal).where(Deal.updated_at >= start_date)
-        deals = db.exec(statement).all()
+        # Pipeline value per stage for every day in the history, in cents,
+        # read from the daily stage rollups
+        _, totals = stage_value_series(db, start_date.date(), user_id=user_id)
+        
+        # Fit all stages in one least-squares solve
+        forecast, r_squared = PredictiveAnalytics._linear_forecast_batch(totals / 100, days_forecast)
+        result = PredictiveAnalytics._forecast_response(totals, forecast, r_squared)
+        
+        _set_cached_forecast(key, version, result)
+        return result
+    
+    @staticmethod
+    def forecast_all_users(
+        db: Session, 
+        days_history: int = 90, 
+        days_forecast: int = 30
+    ) -> int:
+        """
+        Precompute and cache the pipeline forecast of every user
+        
+        All users' stage series are stacked into one matrix and fitted with a
+        single least-squares solve.
         
-        # Convert to DataFrame for easier analysis
-        deals_data = [{
-            'id': deal.id,
-            'value': deal.value / 100,  # Convert to dollars
-            'stage': deal.stage,
-            'updated_at': deal.updated_at.date()
-        } for deal in deals]
+        Args:
+            db: Database session
+            days_history: Number of days of historical data to use
+            days_forecast: Number of days to forecast
+            
+        Returns:
+            Number of users forecast
+        """
+        today = datetime.utcnow().date()
+        start_date = today - timedelta(days=days_history)
+        versions = stage_history_versions(db)
+        
+        _, user_ids, totals = stage_value_series_by_user(db, start_date, today)
+        if not user_ids:
+            return 0
         
-        if not deals_data:
+        n_users, n_stages, n_days = totals.shape
+        forecast, r_squared = PredictiveAnalytics._linear_forecast_batch(
+            totals.reshape(n_users * n_stages, n_days) / 100, days_forecast
+        )
+        forecast = forecast.reshape(n_users, n_stages, days_forecast)
+        r_squared = r_squared.reshape(n_users, n_stages)
+        
+        for index, user_id in enumerate(user_ids):
+            result = PredictiveAnalytics._forecast_response(
+                totals[index], forecast[index], r_squared[index]
+            )
+            _set_cached_forecast(
+                (user_id, days_history, days_forecast),
+                (versions.get(user_id, 0), today),
+                result
+            )
+        
+        return len(user_ids)
+    
+    @staticmethod
+    def _forecast_response(
+        totals: np.ndarray, 
+        forecast: np.ndarray, 
+        r_squared: np.ndarray
+    ) -> Dict[str, Any]:
+        """
+        Build the forecast response for one pipeline
+        
+        Args:
+            totals: Historical value per stage in cents, shape (stages, days)
+            forecast: Forecast value per stage in dollars, shape (stages, days_forecast)
+            r_squared: Fit quality per stage
+            
+        Returns:
+            Dictionary containing forecast data
+        """
+        if not totals.any():
             return {
                 "forecast_dates": [],
                 "lead_forecast": [],
@@ -54,54 +150,30 @@ class PredictiveAnalytics:
                 "confidence": 0
             }
         
-        # Create DataFrame
-        df = pd.DataFrame(deals_data)
+        days_forecast = forecast.shape[1]
+        forecast_dates = format_dates(date_axis(
+            datetime.utcnow().date() + timedelta(days=1),
+            datetime.utcnow().date() + timedelta(days=days_forecast)
+        ))
         
-        # Group by date and calculate daily values
-        date_range = pd.date_range(start=start_date.date(), end=datetime.utcnow().date())
-        daily_values = PredictiveAnalytics._calculate_daily_values(df, date_range)
-        
-        # Generate forecast
-        forecast_dates = [
-            (datetime.utcnow() + timedelta(days=i)).strftime('%Y-%m-%d') 
-            for i in range(1, days_forecast + 1)
-        ]
-        
-        # Simple forecasting method: linear regression
-        lead_forecast, lead_conf = PredictiveAnalytics._linear_forecast(
-            daily_values['dates_num'], daily_values['lead_values'], days_forecast
-        )
-        
-        proposed_forecast, proposed_conf = PredictiveAnalytics._linear_forecast(
-            daily_values['dates_num'], daily_values['proposed_values'], days_forecast
-        )
-        
-        won_forecast, won_conf = PredictiveAnalytics._linear_forecast(
-            daily_values['dates_num'], daily_values['won_values'], days_forecast
-        )
-        
-        # Calculate total forecast and overall confidence
-        total_forecast = [
-            lead + proposed + won 
-            for lead, proposed, won in zip(lead_forecast, proposed_forecast, won_forecast)
-        ]
-        
-        # Average confidence across all forecasts
-        confidence = round((lead_conf + proposed_conf + won_conf) / 3, 2)
+        # Convert to Python lists once for the whole matrix
+        lead_forecast, proposed_forecast, won_forecast = forecast.tolist()
         
         return {
             "forecast_dates": forecast_dates,
             "lead_forecast": lead_forecast,
             "proposed_forecast": proposed_forecast,
             "won_forecast": won_forecast,
-            "total_forecast": total_forecast,
-            "confidence": confidence
+            "total_forecast": forecast.sum(axis=0).tolist(),
+            # Average confidence across all forecasts
+            "confidence": round(float(r_squared.mean()), 2)
         }
     
     @staticmethod
     def analyze_sales_velocity(
         db: Session, 
-        days: int = 90
+        days: int = 90,
+        user_id: Optional[int] = None
     ) -> Dict[str, Any]:
         """
         Calculate sales velocity metrics
@@ -111,6 +183,7 @@ class PredictiveAnalytics:
         Args:
             db: Database session
             days: Number of days to analyze
+            user_id: Only analyze this user's deals (all users when None)
             
         Returns:
             Dictionary containing sales velocity metrics
@@ -118,11 +191,10 @@ class PredictiveAnalytics:
         # Calculate start date for analysis period
         start_date = datetime.utcnow() - timedelta(days=days)
         
-        # Get all deals updated within the date range
-        statement = select(Deal).where(Deal.updated_at >= start_date)
-        deals = db.exec(statement).all()
+        # Count, won count and average value of deals updated within the range
+        stats = velocity_stats(db, since=start_date, user_id=user_id)
         
-        if not deals:
+        if not stats['opportunities']:
             return {
                 "sales_velocity": 0,
                 "opportunities": 0,
@@ -133,17 +205,18 @@ class PredictiveAnalytics:
             }
         
         # Count opportunities (all deals)
-        opportunities = len(deals)
+        opportunities = stats['opportunities']
         
         # Calculate win rate (deals in 'won' stage / all deals)
-        won_deals = [deal for deal in deals if deal.stage == 'won']
-        win_rate = len(won_deals) / opportunities if opportunities > 0 else 0
+        win_rate = stats['won'] / opportunities
         
         # Calculate average deal size
-        avg_deal_size = sum(deal.value for deal in deals) / opportunities / 100 if opportunities > 0 else 0
+        avg_deal_size = stats['avg_value'] / 100
         
-        # Estimate sales cycle length (use 30 days as default if not enough data)
-        sales_cycle_length = 30
+        # Average days from first stage event to won (30 days if nothing was won);
+        # deals won on the day they were created count as a one-day cycle
+        cycle_length = average_cycle_length(db, since=start_date, user_id=user_id)
+        sales_cycle_length = 30 if cycle_length is None else max(1.0, round(cycle_length, 1))
         
         # Calculate sales velocity
         sales_velocity = (opportunities * win_rate * avg_deal_size) / sales_cycle_length if sales_cycle_length > 0 else 0
@@ -162,213 +235,324 @@ class PredictiveAnalytics:
     
     @staticmethod
     def predict_churn_risk(
-        db: Session
-    ) -> List[Dict[str, Any]]:
+        db: Session,
+        user_id: Optional[int] = None,
+        skip: int = 0,
+        limit: Optional[int] = None
+    ) -> Tuple[List[Dict[str, Any]], int]:
         """
         Identify clients with high churn risk
         
+        The per-client features are computed in one grouped query and the
+        risk formula is evaluated for all clients at once with numpy.
+        
         Args:
             db: Database session
+            user_id: Only score this user's clients (all clients when None)
+            skip: Number of clients to skip, highest risk first
+            limit: Maximum number of clients to return (all when None)
             
         Returns:
-            List of clients with risk scores
+            Tuple of (page of clients with risk scores, total number of scored clients)
         """
-        # Get all clients with their deals
-        statement = select(Client)
-        clients = db.exec(statement).all()
-        
-        client_risks = []
-        
-        for client in clients:
-            # Calculate days since last interaction
-            if not client.deals:
-                continue
-                
-            # Sort deals by update date
-            sorted_deals = sorted(client.deals, key=lambda d: d.updated_at, reverse=True)
-            
-            # Calculate days since most recent deal update
-            days_since_update = (datetime.utcnow() - sorted_deals[0].updated_at).days
-            
-            # Count total deals and won deals
-            total_deals = len(client.deals)
-            won_deals = sum(1 for deal in client.deals if deal.stage == 'won')
-            
-            # Calculate win rate
-            win_rate = won_deals / total_deals if total_deals > 0 else 0
-            
-            # Calculate risk score (0-100)
-            # Factors: days since last update, win rate, total deals
-            risk_score = min(100, days_since_update * 0.5 * (1 - win_rate) * (1 / (total_deals ** 0.5)))
-            
-            client_risks.append({
-                "id": client.id,
-                "name": client.name,
-                "email": client.email,
-                "days_since_update": days_since_update,
-                "total_deals": total_deals,
-                "win_rate": round(win_rate * 100, 1),
-                "risk_score": round(risk_score, 1),
-                "risk_level": "High" if risk_score > 70 else "Medium" if risk_score > 30 else "Low"
-            })
-        
-        # Sort by risk score (highest first)
-        client_risks.sort(key=lambda x: x["risk_score"], reverse=True)
-        
-        return client_risks
+        # Last deal update, total deals and won deals per client with deals
+        statement = (
+            select(
+                Client.id,
+                Client.name,
+                Client.email,
+                func.max(Deal.updated_at),
+                func.count(Deal.id),
+                func.sum(case((Deal.stage == 'won', 1), else_=0))
+            )
+            .join(Deal, Deal.client_id == Client.id)
+            .group_by(Client.id, Client.name, Client.email)
+            .order_by(Client.id)
+        )
+        if user_id is not None:
+            statement = statement.where(Client.user_id == user_id)
+        rows = db.exec(statement).all()
+        
+        if not rows:
+            return [], 0
+        
+        ids, names, emails, last_updates, total_deals, won_deals = zip(*rows)
+        total_deals = np.array(total_deals, dtype=np.float64)
+        won_deals = np.array(won_deals, dtype=np.float64)
+        
+        # Calculate days since most recent deal update
+        now = np.datetime64(datetime.utcnow(), 'us')
+        last_updates = np.array(last_updates, dtype='datetime64[us]')
+        days_since_update = (now - last_updates) // np.timedelta64(1, 'D')
+        
+        # Calculate win rate
+        win_rate = won_deals / total_deals
+        
+        # Calculate risk score (0-100)
+        # Factors: days since last update, win rate, total deals
+        risk_score = np.minimum(
+            100, days_since_update * 0.5 * (1 - win_rate) / np.sqrt(total_deals)
+        ).round(1)
+        risk_level = np.select(
+            [risk_score > 70, risk_score > 30], ["High", "Medium"], default="Low"
+        )
+        
+        # Sort by risk score (highest first), then build only the requested page
+        order = np.argsort(-risk_score, kind='stable')
+        end = None if limit is None else skip + limit
+        page = order[skip:end]
+        
+        client_risks = [
+            {
+                "id": ids[i],
+                "name": names[i],
+                "email": emails[i],
+                "days_since_update": int(days_since_update[i]),
+                "total_deals": int(total_deals[i]),
+                "win_rate": round(float(win_rate[i]) * 100, 1),
+                "risk_score": float(risk_score[i]),
+                "risk_level": str(risk_level[i])
+            }
+            for i in page.tolist()
+        ]
+        
+        return client_risks, len(rows)
     
     @staticmethod
     def forecast_deal_outcomes(
         db: Session, 
-        stage: str = 'proposed'
+        stage: str = 'proposed',
+        user_id: Optional[int] = None
     ) -> List[Dict[str, Any]]:
         """
         Forecast outcome probabilities for deals in a given stage
         
+        The deals in the stage and the per-client deal counts are each read
+        with a single query, and every deal is scored at once with numpy.
+        
         Args:
             db: Database session
             stage: Deal stage to analyze (usually 'proposed')
+            user_id: Only score this user's deals (all deals when None)
             
         Returns:
             List of deals with outcome probabilities
         """
-        # Get deals in the specified stage
-        statement = select(Deal).where(Deal.stage == stage)
-        deals = db.exec(statement).all()
+        # Deals in the stage, as plain columns
+        statement = (
+            select(Deal.id, Deal.client_id, Deal.value)
+            .where(Deal.stage == stage)
+            .order_by(Deal.id)
+        )
+        if user_id is not None:
+            statement = statement.join(Client, Deal.client_id == Client.id).where(Client.user_id == user_id)
+        # Plain Core rows: nothing here needs the ORM's per-row processing
+        rows = db.connection().execute(statement).all()
         
-        if not deals:
+        if not rows:
             return []
         
-        # We'll use a simple model based on deal value and client history
-        deal_predictions = []
+        deal_ids, client_ids, values = (np.array(column) for column in zip(*rows))
+        values = values.astype(np.float64)
+        
+        # Name, deal count and won count per client in one grouped query
+        client_statement = (
+            select(
+                Client.id,
+                Client.name,
+                func.count(),
+                func.sum(case((Deal.stage == 'won', 1), else_=0))
+            )
+            .join(Deal, Deal.client_id == Client.id)
+            .group_by(Client.id, Client.name)
+            .order_by(Client.id)
+        )
+        if user_id is not None:
+            client_statement = client_statement.where(Client.user_id == user_id)
+        client_rows = db.exec(client_statement).all()
         
-        for deal in deals:
-            # Get client
-            client = db.get(Client, deal.client_id)
-            if not client:
-                continue
-            
-            # Get client's deal history
-            client_deals = [d for d in client.deals if d.id != deal.id]
-            
-            # Calculate client's win rate
-            won_deals = sum(1 for d in client_deals if d.stage == 'won')
-            client_win_rate = won_deals / len(client_deals) if client_deals else 0.5
-            
-            # Adjust win probability based on deal value and client history
-            # This is a simplified model - in real life you'd use more factors and ML
-            base_probability = 0.5
-            
-            # Value factor: larger deals have lower win probability
-            avg_deal_value = sum(d.value for d in deals) / len(deals)
-            value_factor = 1.0 - min(0.3, (deal.value - avg_deal_value) / avg_deal_value * 0.1)
-            
-            # Client history factor
-            history_factor = 0.5 + client_win_rate * 0.5
-            
-            # Calculate final probability
-            win_probability = base_probability * value_factor * history_factor
-            win_probability = max(0.1, min(0.9, win_probability))
-            
-            # Get client name
-            client_name = client.name if client else "Unknown"
-            
-            deal_predictions.append({
-                "id": deal.id,
-                "client_id": deal.client_id,
-                "client_name": client_name,
-                "value": deal.value / 100,  # Convert to dollars
-                "win_probability": round(win_probability * 100, 1),
-                "expected_value": round((deal.value / 100) * win_probability, 2),
-                "recommendation": "Focus" if win_probability > 0.7 else "Review" if win_probability > 0.4 else "Reconsider"
-            })
+        # Deals whose client no longer exists are skipped
+        if not client_rows:
+            return []
+        
+        stats_ids, client_names, total_deals, won_deals = (
+            np.array(column) for column in zip(*client_rows)
+        )
+        position = np.minimum(np.searchsorted(stats_ids, client_ids), len(stats_ids) - 1)
+        keep = stats_ids[position] == client_ids
+        
+        # Client's deal history excluding the deal itself
+        other_deals = total_deals[position] - 1
+        other_won = won_deals[position] - (1 if stage == 'won' else 0)
+        win_probability = PredictiveAnalytics._score_deal_outcomes(values, other_deals, other_won)
+        
+        dollars = values / 100  # Convert to dollars
+        expected_value = (dollars * win_probability).round(2)
+        recommendation = np.select(
+            [win_probability > 0.7, win_probability > 0.4], ["Focus", "Review"], default="Reconsider"
+        )
         
         # Sort by expected value (highest first)
-        deal_predictions.sort(key=lambda x: x["expected_value"], reverse=True)
+        order = np.argsort(-expected_value, kind='stable')
+        order = order[keep[order]]
         
-        return deal_predictions
+        return [
+            {
+                "id": deal_id,
+                "client_id": client_id,
+                "client_name": client_name,
+                "value": value,
+                "win_probability": probability,
+                "expected_value": expected,
+                "recommendation": label
+            }
+            for deal_id, client_id, client_name, value, probability, expected, label in zip(
+                deal_ids[order].tolist(),
+                client_ids[order].tolist(),
+                client_names[position[order]].tolist(),
+                dollars[order].tolist(),
+                (win_probability[order] * 100).round(1).tolist(),
+                expected_value[order].tolist(),
+                recommendation[order].tolist()
+            )
+        ]
     
     @staticmethod
-    def _calculate_daily_values(
-        df: pd.DataFrame, 
-        date_range: pd.DateRange
-    ) -> Dict[str, Any]:
+    def _score_deal_outcomes(
+        values: np.ndarray, 
+        other_deals: np.ndarray, 
+        other_won: np.ndarray
+    ) -> np.ndarray:
         """
-        Calculate daily values for each stage from deal data
+        Win probability of every deal, as array operations
         
         Args:
-            df: DataFrame with deal data
-            date_range: Date range to calculate values for
+            values: Deal values in cents
+            other_deals: Number of the client's other deals, per deal
+            other_won: Number of the client's other deals that were won, per deal
             
         Returns:
-            Dictionary with daily values for each stage
+            Win probability per deal, between 0.1 and 0.9
         """
-        dates_array = np.array(range(len(date_range)))
-        lead_values = []
-        proposed_values = []
-        won_values = []
-        
-        for i, date in enumerate(date_range):
-            date_deals = df[df['updated_at'] <= date]
-            
-            # Sum values by stage
-            lead_value = date_deals[date_deals['stage'] == 'lead']['value'].sum()
-            proposed_value = date_deals[date_deals['stage'] == 'proposed']['value'].sum()
-            won_value = date_deals[date_deals['stage'] == 'won']['value'].sum()
-            
-            lead_values.append(float(lead_value))
-            proposed_values.append(float(proposed_value))
-            won_values.append(float(won_value))
-        
-        return {
-            "dates_num": dates_array,
-            "lead_values": lead_values,
-            "proposed_values": proposed_values,
-            "won_values": won_values
-        }
+        # Client's win rate (0.5 when the client has no other deals)
+        client_win_rate = np.full(len(values), 0.5)
+        np.divide(other_won, other_deals, out=client_win_rate, where=other_deals > 0)
+        
+        # Adjust win probability based on deal value and client history
+        # This is a simplified model - in real life you'd use more factors and ML
+        base_probability = 0.5
+        
+        # Value factor: larger deals have lower win probability
+        avg_deal_value = values.mean()
+        if avg_deal_value:
+            value_factor = 1.0 - np.minimum(0.3, (values - avg_deal_value) / avg_deal_value * 0.1)
+        else:
+            value_factor = np.ones(len(values))
+        
+        # Client history factor
+        history_factor = 0.5 + client_win_rate * 0.5
+        
+        # Calculate final probability
+        return np.clip(base_probability * value_factor * history_factor, 0.1, 0.9)
     
     @staticmethod
-    def _linear_forecast(
-        x: np.ndarray, 
-        y: List[float], 
+    def _linear_forecast_batch(
+        series: np.ndarray, 
         days_forecast: int
-    ) -> Tuple[List[float], float]:
+    ) -> Tuple[np.ndarray, np.ndarray]:
         """
-        Generate forecast using linear regression
+        Fit a linear trend to every series with one least-squares solve
         
         Args:
-            x: X values (dates as numbers)
-            y: Y values (historical values)
+            series: Historical values, one series per row, shape (k, days)
             days_forecast: Number of days to forecast
             
         Returns:
-            Tuple of (forecast_values, confidence)
+            Tuple of (forecast of shape (k, days_forecast), R-squared per series)
         """
+        n_series, n_days = series.shape
+        
         # Handle empty or single value datasets
-        if len(y) <= 1:
-            return [y[0] if y else 0] * days_forecast, 0.0
+        if n_days <= 1:
+            first = series[:, :1] if n_days else np.zeros((n_series, 1))
+            return np.repeat(first, days_forecast, axis=1), np.zeros(n_series)
+        
+        # Shared design matrix [x, 1]; each column of the right-hand side is a series
+        x = np.arange(n_days, dtype=np.float64)
+        design = np.column_stack([x, np.ones(n_days)])
+        coefficients, _, _, _ = np.linalg.lstsq(design, series.T, rcond=None)
+        
+        # Calculate R-squared (coefficient of determination) per series
+        fitted = (design @ coefficients).T
+        ss_total = np.sum((series - series.mean(axis=1, keepdims=True)) ** 2, axis=1)
+        ss_residual = np.sum((series - fitted) ** 2, axis=1)
+        r_squared = np.zeros(n_series)
+        has_variance = ss_total > 0
+        r_squared[has_variance] = 1 - ss_residual[has_variance] / ss_total[has_variance]
+        
+        # Generate forecast values, ensuring no negative values
+        future_x = np.arange(n_days, n_days + days_forecast, dtype=np.float64)
+        future = np.column_stack([future_x, np.ones(days_forecast)])
+        forecast = np.maximum((future @ coefficients).T, 0)
+        
+        return forecast, r_squared
+
+
+# Forecasts keyed by (user_id, days_history, days_forecast), holding the data
+# version they were computed from and the response, in least recently used order
+_forecast_cache: "OrderedDict[Tuple[Optional[int], int, int], Tuple[Tuple[int, date], Dict[str, Any]]]" = OrderedDict()
+_forecast_cache_lock = Lock()
+
+
+def _get_cached_forecast(key: Tuple[Optional[int], int, int], version: Tuple[int, date]) -> Optional[Dict[str, Any]]:
+    with _forecast_cache_lock:
+        entry = _forecast_cache.get(key)
+        if entry is None or entry[0] != version:
+            return None
+        _forecast_cache.move_to_end(key)
+    return entry[1]
+
+
+def _set_cached_forecast(
+    key: Tuple[Optional[int], int, int], 
+    version: Tuple[int, date], 
+    result: Dict[str, Any]
+) -> None:
+    with _forecast_cache_lock:
+        _forecast_cache[key] = (version, result)
+        _forecast_cache.move_to_end(key)
+        while len(_forecast_cache) > FORECAST_CACHE_MAX_SIZE:
+            _forecast_cache.popitem(last=False)
+
+
+def clear_forecast_cache() -> None:
+    """Drop all cached forecasts"""
+    with _forecast_cache_lock:
+        _forecast_cache.clear()
+
+
+def precompute_forecasts() -> int:
+    """Refresh the cached forecast of every user (used by the nightly job)"""
+    with Session(engine) as session:
+        return PredictiveAnalytics.forecast_all_users(session)
+
+
+async def run_nightly_forecasts() -> None:
+    """
+    Precompute every user's forecast once a day
+    
+    Runs at FORECAST_REFRESH_HOUR (UTC, default 2) so the first forecast
+    request of the day is served from the cache.
+    """
+    while True:
+        now = datetime.utcnow()
+        next_run = now.replace(hour=FORECAST_REFRESH_HOUR, minute=0, second=0, microsecond=0)
+        if next_run <= now:
+            next_run += timedelta(days=1)
+        await asyncio.sleep((next_run - now).total_seconds())
         
-        # Fit linear regression model
         try:
-            coefficients = np.polyfit(x, y, 1)
-            slope = coefficients[0]
-            intercept = coefficients[1]
-            
-            # Calculate R-squared (coefficient of determination)
-            y_pred = slope * x + intercept
-            ss_total = np.sum((y - np.mean(y)) ** 2)
-            ss_residual = np.sum((y - y_pred) ** 2)
-            r_squared = 1 - (ss_residual / ss_total) if ss_total > 0 else 0
-            
-            # Generate forecast values
-            forecast_x = np.array(range(max(x) + 1, max(x) + days_forecast + 1))
-            forecast_values = slope * forecast_x + intercept
-            
-            # Ensure no negative values
-            forecast_values = [max(0, val) for val in forecast_values]
-            
-            return forecast_values, r_squared
-        except:
-            # Fall back to simple average if regression fails
-            avg_value = sum(y) / len(y)
-            return [avg_value] * days_forecast, 0.0 
\ No newline at end of file
+            forecast_users = await run_in_threadpool(precompute_forecasts)
+            print(f"Precomputed pipeline forecasts for {forecast_users} users")
+        except Exception as e:
+            print(f"Error precomputing pipeline forecasts: {str(e)}")
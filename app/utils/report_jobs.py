@@ -0,0 +1,461 @@
+"""
+Background report generation.
+
+Large PDF and Excel exports can take longer than a request should block, so
+clients may submit them as jobs instead. A job row records the report type
+and parameters; a small thread pool builds the report with its own database
+session and writes it under REPORTS_DIR, and the client polls the job and
+downloads the finished file (with Range support) when it is ready.
+
+The synchronous /api/export routes use the same builders, so both paths
+produce identical files. Both go through the artifact cache: a report whose
+inputs have not changed since it was last built is read back from disk.
+
+A worker claims a job with a conditional UPDATE before building it, so a job
+that is dispatched twice (by the submitting request and by recovery in
+another process) is built once. Jobs left running by a worker that died are
+claimed again after REPORT_JOB_STALE_AFTER. Finished report files are
+deleted after REPORT_RETENTION_HOURS and their jobs marked expired.
+"""
+
+import asyncio
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import and_, or_, update
+from sqlalchemy.engine import Engine
+from sqlmodel import Session, select
+
+from app import crud
+from app.models import ReportJob, ReportJobStatus, User
+from app.utils.analytics_queries import data_version
+from app.utils.artifact_cache import artifact_key, get_artifact_cache
+
+# Where finished reports are written, and how many are built at once
+# (0 builds the report in the submitting request)
+REPORTS_DIR = os.getenv("REPORTS_DIR", "app/data/reports")
+REPORT_JOB_WORKERS = int(os.getenv("REPORT_JOB_WORKERS", "2"))
+
+# Running jobs not finished after this long are assumed lost and claimed again
+REPORT_JOB_STALE_AFTER = timedelta(minutes=int(os.getenv("REPORT_JOB_STALE_MINUTES", "30")))
+
+# How long finished reports stay downloadable, and how often old files are swept
+REPORT_RETENTION_HOURS = int(os.getenv("REPORT_RETENTION_HOURS", "24"))
+REPORT_SWEEP_SECONDS = int(os.getenv("REPORT_SWEEP_SECONDS", "3600"))
+
+PDF_MEDIA_TYPE = "application/pdf"
+EXCEL_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Parameters accepted by every report type
+REPORT_PARAMS = {"company_name"}
+
+
+@dataclass(frozen=True)
+class ReportType:
+    """How to build one kind of report and how to serve it"""
+
+    build: Callable[[Session, User, Dict[str, Any]], bytes]
+    media_type: str
+    filename: str
+    user_scoped: bool = False  # Reports only the requesting user's data
+    titled: bool = False  # Prints the company name
+
+    @property
+    def extension(self) -> str:
+        return os.path.splitext(self.filename)[1]
+
+
+def _company_name(user: User, params: Dict[str, Any]) -> str:
+    return params.get("company_name") or f"{user.full_name}'s FreelanceFlow"
+
+
+def _build_dashboard_pdf(db: Session, user: User, params: Dict[str, Any]) -> bytes:
+    from app.utils.reports import build_dashboard_pdf
+
+    pdf_data, _ = asyncio.run(build_dashboard_pdf(db, user.id, _company_name(user, params)))
+    return pdf_data
+
+
+def _build_pipeline_summary_pdf(db: Session, user: User, params: Dict[str, Any]) -> bytes:
+    from app.utils import generate_pipeline_summary_pdf
+    from app.utils.analytics_queries import stage_totals
+    from app.utils.reports import format_pipeline_stats
+
+    pipeline_stats = format_pipeline_stats(stage_totals(db, user_id=user.id))
+    return generate_pipeline_summary_pdf(pipeline_stats, _company_name(user, params))
+
+
+def _build_client_distribution_pdf(db: Session, user: User, params: Dict[str, Any]) -> bytes:
+    from app.utils import generate_client_distribution_pdf
+
+    return generate_client_distribution_pdf(
+        crud.get_client_distribution(db, user_id=user.id), _company_name(user, params)
+    )
+
+
+def _build_pipeline_summary_excel(db: Session, user: User, params: Dict[str, Any]) -> bytes:
+    from app.utils.analytics_queries import stage_totals
+    from app.utils.excel_exports import generate_pipeline_excel
+
+    totals = stage_totals(db, user_id=user.id)
+    pipeline_data = {}
+    for stage in ("lead", "proposed", "won"):
+        pipeline_data[f"{stage}_count"] = totals[stage]["count"]
+        pipeline_data[f"{stage}_value"] = totals[stage]["value"]
+    pipeline_data["total_count"] = sum(stage["count"] for stage in totals.values())
+    pipeline_data["total_value"] = sum(
+        pipeline_data[f"{stage}_value"] for stage in ("lead", "proposed", "won")
+    )
+    return generate_pipeline_excel(pipeline_data)
+
+
+def _build_client_distribution_excel(db: Session, user: User, params: Dict[str, Any]) -> bytes:
+    from app.utils.excel_exports import generate_clients_excel
+
+    return generate_clients_excel(crud.get_client_distribution(db, user_id=user.id))
+
+
+def _build_deals_excel(db: Session, user: User, params: Dict[str, Any]) -> bytes:
+    from app.utils.excel_exports import generate_deals_excel
+
+    return generate_deals_excel(crud.iter_deals_with_export_data(db, user_id=user.id))
+
+
+REPORT_TYPES: Dict[str, ReportType] = {
+    "dashboard-pdf": ReportType(
+        _build_dashboard_pdf, PDF_MEDIA_TYPE, "dashboard_report.pdf", user_scoped=True, titled=True
+    ),
+    "pipeline-summary-pdf": ReportType(
+        _build_pipeline_summary_pdf, PDF_MEDIA_TYPE, "pipeline_summary.pdf", user_scoped=True, titled=True
+    ),
+    "client-distribution-pdf": ReportType(
+        _build_client_distribution_pdf, PDF_MEDIA_TYPE, "client_distribution.pdf", user_scoped=True, titled=True
+    ),
+    "pipeline-summary-excel": ReportType(
+        _build_pipeline_summary_excel, EXCEL_MEDIA_TYPE, "pipeline_summary.xlsx", user_scoped=True
+    ),
+    "client-distribution-excel": ReportType(
+        _build_client_distribution_excel, EXCEL_MEDIA_TYPE, "client_distribution.xlsx", user_scoped=True
+    ),
+    "deals-excel": ReportType(_build_deals_excel, EXCEL_MEDIA_TYPE, "deals.xlsx", user_scoped=True),
+}
+
+
+def get_report_type(report_type: str) -> ReportType:
+    """Look up a report type, raising 400 for unknown names"""
+    try:
+        return REPORT_TYPES[report_type]
+    except KeyError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown report type '{report_type}'. Available: {', '.join(sorted(REPORT_TYPES))}"
+        )
+
+
+def report_cache_key(db: Session, user: User, report_type: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Artifact cache key for a report with the current data
+
+    Args:
+        db: Database session
+        user: User requesting the report
+        report_type: Key of REPORT_TYPES
+        params: Report parameters
+
+    Returns:
+        Key that changes whenever the report's contents would
+    """
+    report = get_report_type(report_type)
+    user_id = user.id if report.user_scoped else None
+    company_name = _company_name(user, params or {}) if report.titled else None
+    return artifact_key(report_type, user_id, company_name, data_version(db, user_id=user_id))
+
+
+@dataclass
+class ReportArtifact:
+    """A report read from the cache (path) or just built (data)"""
+
+    key: str
+    path: Optional[str] = None
+    data: Optional[bytes] = None
+
+    def read(self) -> bytes:
+        if self.data is not None:
+            return self.data
+        with open(self.path, "rb") as file:
+            return file.read()
+
+
+def load_report(db: Session, user: User, report_type: str, params: Optional[Dict[str, Any]] = None) -> ReportArtifact:
+    """
+    Return a cached report, building and caching it on a miss
+
+    Args:
+        db: Database session
+        user: User requesting the report
+        report_type: Key of REPORT_TYPES
+        params: Report parameters
+
+    Returns:
+        ReportArtifact with the cached file path on a hit or the new bytes
+        on a miss
+    """
+    report = get_report_type(report_type)
+    key = report_cache_key(db, user, report_type, params)
+    cache = get_artifact_cache()
+    path = cache.lookup(key, report.extension)
+    if path:
+        return ReportArtifact(key, path=path)
+
+    data = report.build(db, user, params or {})
+    cache.store(key, report.extension, data)
+    return ReportArtifact(key, data=data)
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=REPORT_JOB_WORKERS, thread_name_prefix="report-job")
+        return _executor
+
+
+def stop_report_workers() -> None:
+    """Stop accepting work; unfinished jobs are picked up again on the next start"""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
+
+
+def report_path(job: ReportJob) -> str:
+    """File a job's report is written to"""
+    return os.path.join(REPORTS_DIR, f"{job.id}{REPORT_TYPES[job.report_type].extension}")
+
+
+def _write_report(path: str, data: bytes) -> None:
+    """Write a report atomically so a download never sees a partial file"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    partial_path = f"{path}.{threading.get_ident()}.partial"
+    with open(partial_path, "wb") as file:
+        file.write(data)
+    os.replace(partial_path, path)
+
+
+def _claimable(now: datetime):
+    return or_(
+        ReportJob.status == ReportJobStatus.QUEUED,
+        and_(
+            ReportJob.status == ReportJobStatus.RUNNING,
+            or_(ReportJob.started_at.is_(None), ReportJob.started_at < now - REPORT_JOB_STALE_AFTER)
+        ),
+    )
+
+
+def claim_report_job(engine: Engine, job_id: str) -> Optional[datetime]:
+    """
+    Mark a job as running unless another worker already has it
+
+    Args:
+        engine: Engine to claim on
+        job_id: Job to claim
+
+    Returns:
+        The claim's started_at time, or None if the job was not claimable
+    """
+    now = datetime.utcnow()
+    with Session(engine) as db:
+        result = db.execute(
+            update(ReportJob)
+            .where(ReportJob.id == job_id, _claimable(now))
+            .values(status=ReportJobStatus.RUNNING, started_at=now)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+    return now if result.rowcount == 1 else None
+
+
+def run_report_job(engine: Engine, job_id: str) -> None:
+    """
+    Build the report for one job and record the outcome
+
+    The outcome is only recorded while the job still carries this worker's
+    claim; a worker whose job went stale and was claimed again discards it.
+
+    Args:
+        engine: Engine the worker opens its own session on
+        job_id: Job to run
+    """
+    started_at = claim_report_job(engine, job_id)
+    if started_at is None:
+        return
+
+    with Session(engine) as db:
+        job = db.get(ReportJob, job_id)
+        try:
+            user = db.get(User, job.user_id)
+            data = load_report(db, user, job.report_type, json.loads(job.params)).read()
+            path = report_path(job)
+            _write_report(path, data)
+        except Exception as e:
+            print(f"Report job {job_id} ({job.report_type}) failed: {str(e)}")
+            db.rollback()
+            values = {"status": ReportJobStatus.FAILED, "error": str(e) or type(e).__name__}
+        else:
+            values = {"status": ReportJobStatus.SUCCEEDED, "file_path": path, "size_bytes": len(data)}
+        db.execute(
+            update(ReportJob)
+            .where(
+                ReportJob.id == job_id,
+                ReportJob.status == ReportJobStatus.RUNNING,
+                ReportJob.started_at == started_at
+            )
+            .values(finished_at=datetime.utcnow(), **values)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+
+def _dispatch(engine: Engine, job_id: str) -> None:
+    if REPORT_JOB_WORKERS <= 0:
+        run_report_job(engine, job_id)
+    else:
+        _get_executor().submit(run_report_job, engine, job_id)
+
+
+def submit_report_job(db: Session, user: User, report_type: str, params: Dict[str, Any]) -> ReportJob:
+    """
+    Record a report job and hand it to the worker pool
+
+    Args:
+        db: Database session
+        user: User requesting the report
+        report_type: Key of REPORT_TYPES
+        params: Report parameters
+
+    Returns:
+        The queued job (already finished when REPORT_JOB_WORKERS is 0)
+
+    Raises:
+        HTTPException: 400 for an unknown report type, 422 for unknown parameters
+    """
+    get_report_type(report_type)
+    unknown = set(params) - REPORT_PARAMS
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Unknown report parameters: {', '.join(sorted(unknown))}"
+        )
+
+    job = ReportJob(user_id=user.id, report_type=report_type, params=json.dumps(params))
+    db.add(job)
+    db.commit()
+
+    _dispatch(db.get_bind(), job.id)
+    db.refresh(job)
+    return job
+
+
+def get_user_report_job(db: Session, user: User, job_id: str) -> ReportJob:
+    """Fetch a job owned by the user, raising 404 otherwise"""
+    job = db.get(ReportJob, job_id)
+    if job is None or job.user_id != user.id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Report job not found")
+    return job
+
+
+def recover_report_jobs(engine: Engine) -> int:
+    """
+    Requeue queued jobs and jobs whose worker has gone stale
+
+    Jobs that another worker is still building are left alone, and a job
+    requeued by several processes at once is still only claimed by one.
+
+    Args:
+        engine: Engine holding the report_job table
+
+    Returns:
+        Number of jobs requeued
+    """
+    with Session(engine) as db:
+        job_ids = db.exec(select(ReportJob.id).where(_claimable(datetime.utcnow()))).all()
+    for job_id in job_ids:
+        _dispatch(engine, job_id)
+    if job_ids:
+        print(f"Requeued {len(job_ids)} unfinished report jobs")
+    return len(job_ids)
+
+
+def sweep_report_files(engine: Engine) -> int:
+    """
+    Delete reports older than REPORT_RETENTION_HOURS
+
+    Succeeded jobs past the retention are marked expired and their files
+    removed. Any other file in REPORTS_DIR older than the retention, such as
+    a partial write from a crashed worker, is removed as well.
+
+    Args:
+        engine: Engine holding the report_job table
+
+    Returns:
+        Number of jobs expired
+    """
+    cutoff = datetime.utcnow() - timedelta(hours=REPORT_RETENTION_HOURS)
+    with Session(engine) as db:
+        jobs = db.exec(
+            select(ReportJob).where(
+                ReportJob.status == ReportJobStatus.SUCCEEDED, ReportJob.finished_at < cutoff
+            )
+        ).all()
+        for job in jobs:
+            if job.file_path:
+                try:
+                    os.remove(job.file_path)
+                except FileNotFoundError:
+                    pass
+            job.status = ReportJobStatus.EXPIRED
+            job.file_path = None
+            db.add(job)
+        db.commit()
+
+    try:
+        entries = [entry for entry in os.scandir(REPORTS_DIR) if entry.is_file()]
+    except FileNotFoundError:
+        entries = []
+    for entry in entries:
+        if datetime.utcfromtimestamp(entry.stat().st_mtime) < cutoff:
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+    return len(jobs)
+
+
+async def run_report_maintenance(engine: Engine) -> None:
+    """
+    Requeue lost jobs and sweep old reports every REPORT_SWEEP_SECONDS
+
+    The first pass runs immediately, picking up jobs interrupted by the last
+    shutdown.
+    """
+    while True:
+        try:
+            await run_in_threadpool(recover_report_jobs, engine)
+            expired = await run_in_threadpool(sweep_report_files, engine)
+            if expired:
+                print(f"Expired {expired} report jobs older than {REPORT_RETENTION_HOURS}h")
+        except Exception as e:
+            print(f"Error maintaining report jobs: {str(e)}")
+        await asyncio.sleep(REPORT_SWEEP_SECONDS)
@@ -0,0 +1,151 @@
+"""
+Dashboard report assembly.
+
+Building the dashboard PDF runs in three phases: read every number the
+report needs from one database snapshot, render both charts in parallel on
+the chart pool, then lay out the document. Each phase is timed so the
+end-to-end latency can be tracked and reported back to the client.
+"""
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlmodel import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.utils import format_money, generate_dashboard_pdf
+from app.utils.analytics_queries import client_totals, stage_totals
+from app.utils.charts import deals_by_stage_series, pipeline_value_series, render_chart
+from app.utils.metrics import PhaseTimer
+
+# Clients listed in the dashboard report
+DASHBOARD_TOP_CLIENTS = 5
+
+# Isolation level giving all snapshot queries the same view of the data
+SNAPSHOT_ISOLATION_LEVELS = {
+    "postgresql": "REPEATABLE READ",
+    "mysql": "REPEATABLE READ",
+}
+
+
+def format_pipeline_stats(stages: Dict[str, Dict[str, int]]) -> Dict[str, Any]:
+    """
+    Shape stage totals for the PDF generators
+
+    Args:
+        stages: Output of stage_totals
+
+    Returns:
+        Dictionary with per-stage and overall count, value and formatted value
+    """
+    stats = {
+        stage: {
+            "count": totals["count"],
+            "value": totals["value"],
+            "value_formatted": format_money(totals["value"])
+        }
+        for stage, totals in stages.items()
+    }
+    total_count = sum(totals["count"] for totals in stages.values())
+    total_value = sum(totals["value"] for totals in stages.values())
+    return {
+        "stages": stats,
+        "total": {
+            "count": total_count,
+            "value": total_value,
+            "value_formatted": format_money(total_value)
+        }
+    }
+
+
+@dataclass
+class DashboardSnapshot:
+    """Every number shown in the dashboard report"""
+
+    stages: Dict[str, Dict[str, int]]
+    clients: List[Dict[str, Any]]
+
+    def pipeline_stats(self) -> Dict[str, Any]:
+        """Stage counts and values in the shape generate_dashboard_pdf expects"""
+        return format_pipeline_stats(self.stages)
+
+    def client_distribution(self) -> List[Dict[str, Any]]:
+        """Top clients with formatted totals"""
+        return [
+            {**client, "total_value_formatted": format_money(client["total_value"])}
+            for client in self.clients
+        ]
+
+
+def load_dashboard_snapshot(db: Session, user_id: int) -> DashboardSnapshot:
+    """
+    Read the dashboard data in one short read-only transaction
+
+    Two aggregate queries cover everything. On databases where read
+    committed would let them see different data they run under repeatable
+    read.
+
+    Args:
+        db: Session whose engine is used for the snapshot
+        user_id: User whose pipeline is reported
+
+    Returns:
+        DashboardSnapshot for the user
+    """
+    with Session(db.get_bind()) as snapshot:
+        isolation_level = SNAPSHOT_ISOLATION_LEVELS.get(snapshot.get_bind().dialect.name)
+        if isolation_level:
+            snapshot.connection(execution_options={"isolation_level": isolation_level})
+        return DashboardSnapshot(
+            stages=stage_totals(snapshot, user_id=user_id),
+            clients=client_totals(snapshot, user_id=user_id, limit=DASHBOARD_TOP_CLIENTS)
+        )
+
+
+async def build_dashboard_pdf(
+    db: Session,
+    user_id: int,
+    company_name: str
+) -> Tuple[bytes, PhaseTimer]:
+    """
+    Produce the dashboard PDF for a user
+
+    Args:
+        db: Database session
+        user_id: User whose pipeline is reported
+        company_name: Name printed as the report title
+
+    Returns:
+        Tuple of (PDF bytes, timer holding the snapshot, charts and build
+        phase durations)
+    """
+    timer = PhaseTimer("dashboard_pdf")
+    with timer.phase("total"):
+        with timer.phase("snapshot"):
+            snapshot = await run_in_threadpool(load_dashboard_snapshot, db, user_id)
+
+        # Both renders wait on the chart pool at the same time
+        with timer.phase("charts"):
+            counts = deals_by_stage_series(snapshot.stages)
+            deals_chart: Optional[bytes] = None
+            if sum(counts):
+                (deals_chart, _), (pipeline_chart, _) = await asyncio.gather(
+                    run_in_threadpool(render_chart, "deals-by-stage", counts),
+                    run_in_threadpool(render_chart, "pipeline-value", pipeline_value_series(snapshot.stages))
+                )
+            else:
+                pipeline_chart, _ = await run_in_threadpool(
+                    render_chart, "pipeline-value", pipeline_value_series(snapshot.stages)
+                )
+
+        with timer.phase("build"):
+            pdf_data = await run_in_threadpool(
+                generate_dashboard_pdf,
+                snapshot.pipeline_stats(),
+                snapshot.client_distribution(),
+                deals_chart,
+                pipeline_chart,
+                company_name
+            )
+    return pdf_data, timer
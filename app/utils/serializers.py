@@ -0,0 +1,103 @@
+"""
+Fast JSON serialization for large list responses.
+
+Returning ORM objects from a route with response_model=List[DealRead] makes
+FastAPI load a full entity per row, validate each one through the read model,
+walk the result with jsonable_encoder and finally call json.dumps. For lists
+of thousands of rows that dominates the request.
+
+A RowSerializer selects exactly the read model's columns and turns the
+result tuples into JSON bytes with orjson. No ORM entities are loaded and
+nothing is validated a second time. The rows come straight from the table
+the read model describes, so they already have the declared types. The
+bytes go out in an ORJSONResponse. The route keeps its response_model for
+the OpenAPI schema.
+
+orjson is optional. Without it the standard library encoder is used, with
+the same output.
+"""
+
+import json
+from datetime import date, datetime
+from typing import Any, Iterable, Sequence, Tuple, Type
+
+from fastapi.responses import Response
+from sqlmodel import SQLModel
+
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+from app.models import Client, ClientRead, Deal, DealRead, Notification, NotificationRead
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Serialize to compact JSON bytes
+
+    Args:
+        content: JSON-compatible value; datetimes are written in ISO 8601
+
+    Returns:
+        UTF-8 encoded JSON
+    """
+    if HAS_ORJSON:
+        return orjson.dumps(content)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class ORJSONResponse(Response):
+    """JSON response rendered with orjson; bytes are sent as already encoded"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+class RowSerializer:
+    """
+    Serializes rows of one table in the shape of its read model
+
+    Args:
+        table: Table model the rows are selected from
+        read_model: Read model whose fields, in order, name the columns
+    """
+
+    def __init__(self, table: Type[SQLModel], read_model: Type[SQLModel]):
+        self.fields: Tuple[str, ...] = tuple(read_model.__fields__)
+        self.columns = tuple(getattr(table, name) for name in self.fields)
+
+    def select(self, statement):
+        """
+        Narrow a SELECT of the table to the read model's columns
+
+        Filters, ordering and limits are kept. Run the result with
+        Session.execute: exec() would return only the first column.
+        """
+        return statement.with_only_columns(*self.columns)
+
+    def dumps(self, rows: Iterable[Sequence]) -> bytes:
+        """Serialize rows as a JSON array of objects"""
+        fields = self.fields
+        return dumps([dict(zip(fields, row)) for row in rows])
+
+    def dumps_lines(self, rows: Iterable[Sequence]) -> bytes:
+        """Serialize rows as newline-terminated JSON objects"""
+        fields = self.fields
+        return b"".join(dumps(dict(zip(fields, row))) + b"\n" for row in rows)
+
+
+CLIENT_READ = RowSerializer(Client, ClientRead)
+DEAL_READ = RowSerializer(Deal, DealRead)
+NOTIFICATION_READ = RowSerializer(Notification, NotificationRead)
@@ -0,0 +1,387 @@
+"""
+Deal stage history: append-only stage events and per-day rollups.
+
+Every change to a deal's stage or value is written as a `DealStageEvent`, and
+the same transaction folds it into `DealStageDailyRollup`. A rollup row holds
+the net change in deal count and value for one user, day and stage, so the
+pipeline on any day is the running sum of the rollups up to that day. Trends
+and forecasts read these few hundred rows instead of the deals table.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import Date, func, literal, or_, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, select
+
+from app.models import Client, Deal, DealStageDailyRollup, DealStageEvent
+from app.utils.time_series import (
+    STAGES,
+    cumulative_daily_values,
+    cumulative_stage_values,
+    stage_codes
+)
+
+
+def record_stage_change(
+    session: Session,
+    user_id: int,
+    deal_id: int,
+    from_stage: Optional[str],
+    from_value: int,
+    to_stage: Optional[str],
+    to_value: int,
+    at: Optional[datetime] = None
+) -> Optional[DealStageEvent]:
+    """
+    Stage a stage event and its rollup deltas in the current transaction
+
+    Nothing is committed here; the caller commits the event and rollups
+    together with the deal change itself.
+
+    Args:
+        session: Database session (usually `UnitOfWork.session`)
+        user_id: Owner of the deal
+        deal_id: Deal that changed
+        from_stage: Stage before the change, None for a new deal
+        from_value: Value before the change, in cents
+        to_stage: Stage after the change, None for a deleted deal
+        to_value: Value after the change, in cents
+        at: Time of the change (defaults to now, UTC)
+
+    Returns:
+        The staged event, or None when neither stage nor value changed
+    """
+    if from_stage == to_stage and from_value == to_value:
+        return None
+
+    event = DealStageEvent(
+        deal_id=deal_id,
+        user_id=user_id,
+        from_stage=from_stage,
+        to_stage=to_stage,
+        from_value=from_value if from_stage is not None else 0,
+        to_value=to_value if to_stage is not None else 0,
+        created_at=at or datetime.utcnow()
+    )
+    session.add(event)
+
+    # Net the change per stage so a value-only edit is a single upsert
+    deltas: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+    if from_stage is not None:
+        deltas[from_stage][0] -= 1
+        deltas[from_stage][1] -= event.from_value
+    if to_stage is not None:
+        deltas[to_stage][0] += 1
+        deltas[to_stage][1] += event.to_value
+
+    day = event.created_at.date()
+    for stage, (net_count, net_value) in deltas.items():
+        _apply_rollup_delta(session, user_id, day, stage, net_count, net_value)
+
+    return event
+
+
+def _apply_rollup_delta(
+    session: Session,
+    user_id: int,
+    day: date,
+    stage: str,
+    net_count: int,
+    net_value: int
+) -> None:
+    """Atomically add a delta to a rollup row, creating it if needed"""
+    table = DealStageDailyRollup.__table__
+    values = {
+        "user_id": user_id,
+        "day": day,
+        "stage": stage,
+        "net_count": net_count,
+        "net_value": net_value,
+    }
+
+    dialect = session.get_bind().dialect.name
+    if dialect in ("sqlite", "postgresql"):
+        insert = sqlite_insert if dialect == "sqlite" else postgresql_insert
+        statement = insert(table).values(**values)
+        statement = statement.on_conflict_do_update(
+            index_elements=["user_id", "day", "stage"],
+            set_={
+                "net_count": table.c.net_count + statement.excluded.net_count,
+                "net_value": table.c.net_value + statement.excluded.net_value,
+            }
+        )
+        session.execute(statement)
+        return
+
+    # Other backends: increment in place, insert when the row does not exist yet
+    result = session.execute(
+        update(table)
+        .where(
+            table.c.user_id == user_id,
+            table.c.day == day,
+            table.c.stage == stage
+        )
+        .values(
+            net_count=table.c.net_count + net_count,
+            net_value=table.c.net_value + net_value
+        )
+    )
+    if result.rowcount == 0:
+        session.execute(table.insert().values(**values))
+
+
+def stage_value_series(
+    db: Session,
+    start_date: date,
+    end_date: Optional[date] = None,
+    user_id: Optional[int] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pipeline value per stage for every day in a range, from the rollups
+
+    Args:
+        db: Database session
+        start_date: First day of the series
+        end_date: Last day of the series (defaults to today, UTC)
+        user_id: Restrict to one user's pipeline (all users when None)
+
+    Returns:
+        Tuple of (date axis, array of shape (len(STAGES), days) in cents)
+    """
+    end_date = end_date or datetime.utcnow().date()
+
+    # Everything before the range collapses into a single opening balance
+    opening = select(
+        DealStageDailyRollup.stage, func.sum(DealStageDailyRollup.net_value)
+    ).where(DealStageDailyRollup.day < start_date)
+    in_range = select(
+        DealStageDailyRollup.day, DealStageDailyRollup.stage, DealStageDailyRollup.net_value
+    ).where(
+        DealStageDailyRollup.day >= start_date,
+        DealStageDailyRollup.day <= end_date
+    )
+    if user_id is not None:
+        opening = opening.where(DealStageDailyRollup.user_id == user_id)
+        in_range = in_range.where(DealStageDailyRollup.user_id == user_id)
+    opening = opening.group_by(DealStageDailyRollup.stage)
+
+    initial = np.zeros(len(STAGES))
+    for stage, net_value in db.exec(opening).all():
+        if stage in STAGES:
+            initial[STAGES.index(stage)] = net_value or 0
+
+    rows = db.exec(in_range).all()
+    days = np.array([row[0] for row in rows], dtype="datetime64[D]")
+    codes = stage_codes([row[1] for row in rows])
+    values = np.array([row[2] for row in rows], dtype=np.float64)
+
+    return cumulative_stage_values(days, codes, values, start_date, end_date, initial=initial)
+
+
+def stage_value_series_by_user(
+    db: Session,
+    start_date: date,
+    end_date: Optional[date] = None
+) -> Tuple[np.ndarray, List[int], np.ndarray]:
+    """
+    Pipeline value per stage and day for every user at once, from the rollups
+
+    Args:
+        db: Database session
+        start_date: First day of the series
+        end_date: Last day of the series (defaults to today, UTC)
+
+    Returns:
+        Tuple of (date axis, user ids, array of shape (users, len(STAGES), days)
+        in cents), with the users in the order of the returned ids
+    """
+    end_date = end_date or datetime.utcnow().date()
+
+    opening = db.exec(
+        select(
+            DealStageDailyRollup.user_id,
+            DealStageDailyRollup.stage,
+            func.sum(DealStageDailyRollup.net_value)
+        )
+        .where(DealStageDailyRollup.day < start_date)
+        .group_by(DealStageDailyRollup.user_id, DealStageDailyRollup.stage)
+    ).all()
+    in_range = db.exec(
+        select(
+            DealStageDailyRollup.user_id,
+            DealStageDailyRollup.day,
+            DealStageDailyRollup.stage,
+            DealStageDailyRollup.net_value
+        ).where(
+            DealStageDailyRollup.day >= start_date,
+            DealStageDailyRollup.day <= end_date
+        )
+    ).all()
+
+    user_ids = sorted({row[0] for row in opening} | {row[0] for row in in_range})
+    position = {user_id: index for index, user_id in enumerate(user_ids)}
+    n_rows = len(user_ids) * len(STAGES)
+
+    # Row (user, stage) is flattened to user_position * len(STAGES) + stage
+    initial = np.zeros(n_rows)
+    for user_id, stage, net_value in opening:
+        if stage in STAGES:
+            initial[position[user_id] * len(STAGES) + STAGES.index(stage)] = net_value or 0
+
+    codes = stage_codes([row[2] for row in in_range])
+    rows = np.array([position[row[0]] for row in in_range], dtype=np.int64) * len(STAGES) + codes
+    rows[codes < 0] = -1
+    days = np.array([row[1] for row in in_range], dtype="datetime64[D]")
+    values = np.array([row[3] for row in in_range], dtype=np.float64)
+
+    dates, totals = cumulative_daily_values(
+        rows, days, values, n_rows, start_date, end_date, initial=initial
+    )
+    return dates, user_ids, totals.reshape(len(user_ids), len(STAGES), len(dates))
+
+
+def stage_history_version(db: Session, user_id: Optional[int] = None) -> int:
+    """
+    Version of a user's stage history (all users when None)
+
+    Events are append-only, so the latest event id changes whenever the
+    pipeline does and can be used to validate cached results.
+    """
+    statement = select(func.max(DealStageEvent.id))
+    if user_id is not None:
+        statement = statement.where(DealStageEvent.user_id == user_id)
+    return db.exec(statement).one() or 0
+
+
+def stage_history_versions(db: Session) -> Dict[int, int]:
+    """Version of every user's stage history, keyed by user id"""
+    rows = db.exec(
+        select(DealStageEvent.user_id, func.max(DealStageEvent.id))
+        .group_by(DealStageEvent.user_id)
+    ).all()
+    return {user_id: version for user_id, version in rows}
+
+
+def average_cycle_length(
+    db: Session,
+    since: datetime,
+    user_id: Optional[int] = None
+) -> Optional[float]:
+    """
+    Average days from a deal's first event to it being won
+
+    Args:
+        db: Database session
+        since: Only deals won at or after this time are included
+        user_id: Restrict to one user's deals (all users when None)
+
+    Returns:
+        Average cycle length in days, or None when no deal was won
+    """
+    first_seen = (
+        select(
+            DealStageEvent.deal_id,
+            func.min(DealStageEvent.created_at).label("first_seen")
+        )
+        .group_by(DealStageEvent.deal_id)
+        .subquery()
+    )
+    statement = (
+        select(first_seen.c.first_seen, DealStageEvent.created_at)
+        .join(first_seen, first_seen.c.deal_id == DealStageEvent.deal_id)
+        .where(
+            DealStageEvent.to_stage == "won",
+            or_(DealStageEvent.from_stage.is_(None), DealStageEvent.from_stage != "won"),
+            DealStageEvent.created_at >= since
+        )
+    )
+    if user_id is not None:
+        statement = statement.where(DealStageEvent.user_id == user_id)
+
+    cycles = [
+        (won_at - first_seen_at).total_seconds() / 86400
+        for first_seen_at, won_at in db.exec(statement).all()
+    ]
+    if not cycles:
+        return None
+    return sum(cycles) / len(cycles)
+
+
+def backfill_stage_history(db: Session) -> int:
+    """
+    Seed history for deals that predate the event table and rebuild rollups (does not commit)
+
+    Each deal without events gets a creation event at its `created_at`, in its
+    current stage and value. The events are inserted by a single
+    INSERT ... SELECT that skips deals which already have history, and the
+    rollups are then rebuilt from all events. It does nothing once every
+    deal has history. On startup it runs through migrations.data_migrations
+    so that only one worker applies it.
+
+    Args:
+        db: Database session
+
+    Returns:
+        Number of deals that were backfilled
+    """
+    has_events = select(DealStageEvent.id).where(DealStageEvent.deal_id == Deal.id).exists()
+    result = db.execute(
+        DealStageEvent.__table__.insert().from_select(
+            ["deal_id", "user_id", "to_stage", "from_value", "to_value", "created_at"],
+            select(Deal.id, Client.user_id, Deal.stage, literal(0), Deal.value, Deal.created_at)
+            .join(Client, Deal.client_id == Client.id)
+            .where(~has_events)
+        )
+    )
+    if not result.rowcount:
+        return 0
+
+    rebuild_rollups(db)
+    return result.rowcount
+
+
+def rebuild_rollups(db: Session) -> None:
+    """Recompute every rollup row from the event table (does not commit)"""
+    day = func.date(DealStageEvent.created_at, type_=Date)
+    totals: Dict[Tuple[int, date, str], List[int]] = defaultdict(lambda: [0, 0])
+
+    entered = db.exec(
+        select(
+            DealStageEvent.user_id, day, DealStageEvent.to_stage,
+            func.count(DealStageEvent.id), func.sum(DealStageEvent.to_value)
+        )
+        .where(DealStageEvent.to_stage.is_not(None))
+        .group_by(DealStageEvent.user_id, day, DealStageEvent.to_stage)
+    ).all()
+    left = db.exec(
+        select(
+            DealStageEvent.user_id, day, DealStageEvent.from_stage,
+            func.count(DealStageEvent.id), func.sum(DealStageEvent.from_value)
+        )
+        .where(DealStageEvent.from_stage.is_not(None))
+        .group_by(DealStageEvent.user_id, day, DealStageEvent.from_stage)
+    ).all()
+
+    for user_id, event_day, stage, count, value in entered:
+        totals[(user_id, event_day, stage)][0] += count
+        totals[(user_id, event_day, stage)][1] += value or 0
+    for user_id, event_day, stage, count, value in left:
+        totals[(user_id, event_day, stage)][0] -= count
+        totals[(user_id, event_day, stage)][1] -= value or 0
+
+    db.execute(DealStageDailyRollup.__table__.delete())
+    db.bulk_insert_mappings(DealStageDailyRollup, [
+        {
+            "user_id": user_id,
+            "day": event_day,
+            "stage": stage,
+            "net_count": net_count,
+            "net_value": net_value,
+        }
+        for (user_id, event_day, stage), (net_count, net_value) in totals.items()
+    ])
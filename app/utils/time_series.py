@@ -0,0 +1,124 @@
+"""
+Vectorized daily time series for the deal pipeline.
+
+Deals are bucketed by day and stage in a single pass and the running totals
+are produced with one cumulative sum, so building a series costs
+O(deals + days) instead of re-filtering every deal for every day.
+"""
+
+from datetime import date
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Row order of the stage axis in every series produced by this module
+STAGES = ("lead", "proposed", "won")
+
+
+def stage_codes(stages: Sequence[str]) -> np.ndarray:
+    """
+    Map stage names to their index in STAGES
+
+    Args:
+        stages: Stage name per deal
+
+    Returns:
+        Integer array with the stage index per deal, -1 for unknown stages
+    """
+    stages = np.asarray(stages, dtype=object)
+    codes = np.full(len(stages), -1, dtype=np.int64)
+    for index, stage in enumerate(STAGES):
+        codes[stages == stage] = index
+    return codes
+
+
+def date_axis(start_date: date, end_date: date) -> np.ndarray:
+    """Return every day from start_date to end_date inclusive as datetime64[D]"""
+    return np.arange(
+        np.datetime64(start_date, "D"),
+        np.datetime64(end_date, "D") + 1,
+        dtype="datetime64[D]"
+    )
+
+
+def format_dates(dates: np.ndarray) -> List[str]:
+    """Format a datetime64[D] axis as YYYY-MM-DD strings"""
+    return np.datetime_as_string(dates, unit="D").tolist()
+
+
+def cumulative_daily_values(
+    rows: np.ndarray,
+    days: np.ndarray,
+    values: np.ndarray,
+    n_rows: int,
+    start_date: date,
+    end_date: date,
+    initial: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build running totals per row for every day in a range
+
+    Each item is added to its row on its day, and the value on a given day is
+    the sum of all items of that row on or before it. Items outside the range
+    or with a negative row index are ignored.
+
+    Args:
+        rows: Row index of each item
+        days: datetime64[D] day of each item
+        values: Value of each item
+        n_rows: Number of rows in the result
+        start_date: First day of the series
+        end_date: Last day of the series
+        initial: Optional per-row totals carried in before start_date
+
+    Returns:
+        Tuple of (date axis, array of shape (n_rows, days) with the totals)
+    """
+    dates = date_axis(start_date, end_date)
+    n_days = len(dates)
+
+    day_index = (np.asarray(days, dtype="datetime64[D]") - dates[0]).astype(np.int64)
+    rows = np.asarray(rows, dtype=np.int64)
+    mask = (day_index >= 0) & (day_index < n_days) & (rows >= 0)
+
+    # One bincount over a flattened (row, day) index buckets every item at once
+    buckets = np.bincount(
+        rows[mask] * n_days + day_index[mask],
+        weights=np.asarray(values, dtype=np.float64)[mask],
+        minlength=n_rows * n_days
+    ).reshape(n_rows, n_days)
+
+    totals = np.cumsum(buckets, axis=1, dtype=np.float64)
+    if initial is not None:
+        totals += np.asarray(initial, dtype=np.float64)[:, np.newaxis]
+    return dates, totals
+
+
+def cumulative_stage_values(
+    days: np.ndarray,
+    codes: np.ndarray,
+    values: np.ndarray,
+    start_date: date,
+    end_date: date,
+    initial: Optional[np.ndarray] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Build the running value per stage for every day in a range
+
+    The value on a given day is the sum of all deals whose day is on or
+    before it. Deals outside the range or in an unknown stage are ignored.
+
+    Args:
+        days: datetime64[D] day of each deal
+        codes: Stage index of each deal (see `stage_codes`)
+        values: Value of each deal
+        start_date: First day of the series
+        end_date: Last day of the series
+        initial: Optional per-stage totals carried in before start_date
+
+    Returns:
+        Tuple of (date axis, array of shape (len(STAGES), days) with the totals)
+    """
+    return cumulative_daily_values(
+        codes, days, values, len(STAGES), start_date, end_date, initial=initial
+    )
@@ -0,0 +1,80 @@
+"""
+Request-scoped unit of work for batching writes into a single commit.
+"""
+
+from typing import Any, Callable, Iterator, List, Tuple
+
+from fastapi import BackgroundTasks, Depends
+from sqlmodel import Session
+
+from app.database import get_session
+
+
+class UnitOfWork:
+    """
+    Collects the writes and side effects of one request and commits them together
+
+    Objects added to the unit of work are flushed in a single transaction when
+    `commit` is called. Side effects (such as queuing an email) are registered
+    with `add_after_commit` and only scheduled once the commit has succeeded,
+    so a rolled back request never triggers them.
+
+    While the unit of work is open the session uses `expire_on_commit=False`,
+    so instances stay usable after the commit without a refresh SELECT.
+    Primary keys of new rows are populated by the INSERT itself (RETURNING
+    where the backend supports it). `close` restores the session's setting
+    for whoever uses it next.
+    """
+
+    def __init__(self, session: Session, background_tasks: BackgroundTasks):
+        self.session = session
+        self._expire_on_commit = session.expire_on_commit
+        self.session.expire_on_commit = False
+        self.background_tasks = background_tasks
+        self._after_commit: List[Tuple[Callable[..., Any], tuple, dict]] = []
+
+    def __enter__(self) -> "UnitOfWork":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def add(self, obj: Any) -> Any:
+        """Stage a new or modified object for the next commit"""
+        self.session.add(obj)
+        return obj
+
+    def add_after_commit(self, func: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+        """Register a side effect to run in the background once the commit succeeds"""
+        self._after_commit.append((func, args, kwargs))
+
+    def commit(self) -> None:
+        """Flush all staged changes in one commit, then schedule side effects"""
+        try:
+            self.session.commit()
+        except Exception:
+            self.rollback()
+            raise
+
+        callbacks, self._after_commit = self._after_commit, []
+        for func, args, kwargs in callbacks:
+            self.background_tasks.add_task(func, *args, **kwargs)
+
+    def rollback(self) -> None:
+        """Discard staged changes and pending side effects"""
+        self.session.rollback()
+        self._after_commit.clear()
+
+    def close(self) -> None:
+        """Drop pending side effects and restore the session's expire_on_commit"""
+        self._after_commit.clear()
+        self.session.expire_on_commit = self._expire_on_commit
+
+
+def get_unit_of_work(
+    background_tasks: BackgroundTasks,
+    session: Session = Depends(get_session)
+) -> Iterator[UnitOfWork]:
+    """Provides a request-scoped unit of work as a dependency for routes"""
+    with UnitOfWork(session, background_tasks) as uow:
+        yield uow
@@ -100,7 +100,7 @@ services:
     name: freelanceflow
     env: python
     buildCommand: pip install -r requirements.txt && python -c "import secrets; print(f'SECRET_KEY={secrets.token_hex(32)}')" >> .env
-    startCommand: uvicorn app.main:app --host 0.0.0.0 --port $PORT
+    startCommand: uvicorn app.main:app --host 0.0.0.0 --port $PORT --forwarded-allow-ips='*'
     envVars:
       - key: PYTHON_VERSION
         value: 3.11.0
@@ -0,0 +1,19 @@
+"""
+Backfill unread notification counters for notifications created before the counter table existed.
+"""
+
+from migrations.data_migrations import run_once
+from app.database import engine
+from app.utils.notifications import rebuild_unread_counters
+
+def _backfill(session):
+    print("Backfilling unread notification counters...")
+    users = rebuild_unread_counters(session)
+    print(f"Backfilled unread counters for {users} users")
+
+def run_backfill():
+    """Build the unread counters from the notification table, once"""
+    run_once(engine, "backfill_notification_counters", _backfill)
+
+if __name__ == "__main__":
+    run_backfill()
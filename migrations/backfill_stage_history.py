@@ -0,0 +1,19 @@
+"""
+Backfill deal stage history for deals created before stage events existed.
+"""
+
+from migrations.data_migrations import run_once
+from app.database import engine
+from app.utils.stage_history import backfill_stage_history
+
+def _backfill(session):
+    print("Backfilling deal stage history...")
+    backfilled = backfill_stage_history(session)
+    print(f"Backfilled {backfilled} deals")
+
+def run_backfill():
+    """Seed stage events for deals without history and rebuild the daily rollups, once"""
+    run_once(engine, "backfill_stage_history", _backfill)
+
+if __name__ == "__main__":
+    run_backfill()
@@ -0,0 +1,48 @@
+"""
+Run one-off data migrations exactly once across all workers.
+"""
+
+from typing import Any, Callable
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session
+
+from app.models import DataMigration
+
+def run_once(engine: Engine, name: str, migrate: Callable[[Session], Any]) -> bool:
+    """
+    Apply a data migration unless it has already been applied
+
+    The migration's marker row is inserted before the migration runs and
+    committed together with its changes. A worker that starts at the same
+    time blocks on the uncommitted marker (or the database write lock) and
+    then skips the migration, so it runs once even when every worker calls
+    this on startup. If the migration fails, nothing is committed and the
+    next start tries again.
+
+    Args:
+        engine: Engine to migrate
+        name: Unique name of the migration
+        migrate: Applies the migration on the given session (must not commit)
+
+    Returns:
+        True if the migration ran, False if it had already been applied
+    """
+    with Session(engine) as session:
+        if session.get(DataMigration, name) is not None:
+            return False
+        session.add(DataMigration(name=name))
+        try:
+            session.flush()
+        except IntegrityError:
+            session.rollback()
+            return False
+
+        migrate(session)
+        try:
+            session.commit()
+        except IntegrityError:
+            session.rollback()
+            return False
+    return True
@@ -0,0 +1,15 @@
+"""
+Create indexes that were added to models after their tables already existed.
+"""
+
+from sqlmodel import SQLModel
+from app.database import engine
+
+def run_ensure_indexes():
+    """Create any index declared on a model that is missing from the database"""
+    for table in SQLModel.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(engine, checkfirst=True)
+
+if __name__ == "__main__":
+    run_ensure_indexes()
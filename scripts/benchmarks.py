@@ -0,0 +1,912 @@
+#!/usr/bin/env python
+"""
+Performance Benchmarks
+
+This script runs micro-benchmarks for the hot paths of FreelanceFlow against a
+throwaway in-memory SQLite database, reporting query counts and wall time so
+changes can be compared before and after.
+
+Usage:
+    python -m scripts.benchmarks exports [--invoices 100000] [--clients 1000]
+    python -m scripts.benchmarks auth [--requests 10000]
+    python -m scripts.benchmarks login-load [--logins 20] [--duration 5]
+    python -m scripts.benchmarks trends [--days 365] [--deals 1000000]
+    python -m scripts.benchmarks forecast [--users 1000] [--days 90]
+    python -m scripts.benchmarks churn [--clients 5000] [--deals 50000]
+    python -m scripts.benchmarks deal-outcomes [--proposed 50000] [--legacy-proposed 2000]
+    python -m scripts.benchmarks charts [--requests 50] [--threads 8]
+    python -m scripts.benchmarks import-time [--budget-ms 2000] [--module app.main]
+    python -m scripts.benchmarks dashboard-pdf [--reports 20] [--deals 50000]
+    python -m scripts.benchmarks pdf-throughput [--seconds 5] [--processes 1]
+    python -m scripts.benchmarks excel-rss [--rows 1000000]
+    python -m scripts.benchmarks json-lists [--rows 10000] [--repeat 5]
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Dict, List
+
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.pool import StaticPool
+
+from app import auth, crud
+from app.models import Client, Deal, Invoice, User
+from app.utils import format_date, format_money
+from app.utils import time_series
+
+
+class QueryCounter:
+    """Counts SQL statements executed on an engine."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def reset(self):
+        self.count = 0
+
+
+def create_benchmark_engine():
+    """Create an in-memory SQLite engine with all tables."""
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+
+def seed_database(
+    session: Session,
+    clients: int = 1000,
+    deals: int = 0,
+    invoices: int = 0,
+    seed: int = 42
+) -> User:
+    """Seed the benchmark database with a user, clients, deals and invoices."""
+    rng = random.Random(seed)
+    user = User(email="bench@example.com", hashed_password="", full_name="Bench User")
+    session.add(user)
+    session.commit()
+
+    now = datetime.utcnow()
+    session.bulk_insert_mappings(Client, [
+        {
+            "name": f"Client {i}",
+            "email": f"client{i}@example.com",
+            "user_id": user.id,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for i in range(clients)
+    ])
+    client_ids = list(session.exec(select(Client.id)).all())
+
+    stages = ["lead", "proposed", "won"]
+    session.bulk_insert_mappings(Deal, [
+        {
+            "client_id": rng.choice(client_ids),
+            "stage": rng.choice(stages),
+            "value": rng.randint(1000, 5_000_000),
+            "created_at": now - timedelta(days=rng.randint(0, 365)),
+            "updated_at": now - timedelta(days=rng.randint(0, 365)),
+        }
+        for _ in range(deals)
+    ])
+
+    today = date.today()
+    session.bulk_insert_mappings(Invoice, [
+        {
+            "client_id": rng.choice(client_ids),
+            "number": f"INV-{i:06d}",
+            "total": rng.randint(1000, 5_000_000),
+            "pdf_url": "",
+            "due_date": today + timedelta(days=rng.randint(-90, 90)),
+            "status": rng.choice(["draft", "sent", "paid"]),
+        }
+        for i in range(invoices)
+    ])
+    session.commit()
+    return user
+
+
+@contextmanager
+def measure(counter: QueryCounter, results: Dict[str, Dict[str, float]], label: str):
+    """Record wall time and query count for the enclosed block."""
+    counter.reset()
+    start = time.perf_counter()
+    yield
+    results[label] = {
+        "seconds": time.perf_counter() - start,
+        "queries": counter.count,
+    }
+
+
+def print_results(title: str, results: Dict[str, Dict[str, float]]):
+    """Print a benchmark result table."""
+    print(f"\n{'-'*80}")
+    print(title)
+    print(f"{'-'*80}")
+    print(f"{'Case':<40} {'Queries':>10} {'Wall time':>14}")
+    for label, result in results.items():
+        print(f"{label:<40} {result['queries']:>10} {result['seconds']*1000:>12.1f}ms")
+
+
+# Legacy implementations kept here only as a baseline for comparison
+def _legacy_invoices_export(db: Session) -> List[dict]:
+    result = []
+    for invoice in db.exec(select(Invoice)).all():
+        client = invoice.client
+        result.append({
+            "id": invoice.id,
+            "client_name": client.name if client else "",
+            "invoice_number": invoice.number,
+            "total": invoice.total / 100,
+            "status": invoice.status,
+            "due_date": invoice.due_date.isoformat() if invoice.due_date else ""
+        })
+    return result
+
+
+def _legacy_deals_export(db: Session) -> List[dict]:
+    result = []
+    for deal in db.exec(select(Deal)).all():
+        client = deal.client
+        result.append({
+            "id": deal.id,
+            "client_name": client.name if client else "",
+            "stage": deal.stage,
+            "value": deal.value / 100,
+            "value_formatted": format_money(deal.value),
+            "updated_at": format_date(deal.updated_at) if deal.updated_at else ""
+        })
+    return result
+
+
+def run_exports_benchmark(args):
+    """Compare lazy-loading export queries against projection-only joins."""
+    engine = create_benchmark_engine()
+    with Session(engine) as session:
+        seed_database(session, clients=args.clients, deals=args.invoices, invoices=args.invoices)
+
+    counter = QueryCounter(engine)
+    results: Dict[str, Dict[str, float]] = {}
+    cases: List[tuple] = [
+        ("invoices: legacy (lazy client)", _legacy_invoices_export),
+        ("invoices: projection join", crud.get_invoices_with_export_data),
+        ("deals: legacy (lazy client)", _legacy_deals_export),
+        ("deals: projection join", crud.get_deals_with_export_data),
+    ]
+    for label, func in cases:
+        # Fresh session per case so the identity map does not skew results
+        with Session(engine) as session:
+            with measure(counter, results, label):
+                rows = func(session)
+        results[label]["rows"] = len(rows)
+
+    print_results(
+        f"Export queries ({args.invoices} invoices/deals, {args.clients} clients)",
+        results
+    )
+
+
+def run_auth_benchmark(args):
+    """Measure per-request authentication overhead with and without the token cache."""
+    engine = create_benchmark_engine()
+    with Session(engine) as session:
+        user = seed_database(session, clients=0)
+        token = auth.create_access_token(data={"sub": user.email})
+
+    counter = QueryCounter(engine)
+    results: Dict[str, Dict[str, float]] = {}
+    with Session(engine) as session:
+        with measure(counter, results, "uncached (decode + user query)"):
+            for _ in range(args.requests):
+                auth.invalidate_token_cache()
+                auth.resolve_user_from_token(session, token)
+
+        auth.invalidate_token_cache()
+        auth.resolve_user_from_token(session, token)
+        with measure(counter, results, "cached"):
+            for _ in range(args.requests):
+                auth.resolve_user_from_token(session, token)
+
+    print_results(f"Token resolution ({args.requests} requests)", results)
+    for label, result in results.items():
+        per_request = result["seconds"] / args.requests * 1_000_000
+        print(f"{label:<40} {per_request:>10.1f}us per request")
+
+
+def _percentile(samples: List[float], percentile: int) -> float:
+    if len(samples) < 2:
+        return samples[0] if samples else 0.0
+    return statistics.quantiles(samples, n=100)[percentile - 1]
+
+
+async def _probe_latency(client, headers, stop: asyncio.Event) -> List[float]:
+    """Hit a cheap authenticated endpoint until stopped, recording latencies."""
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/api/me", headers=headers)
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.005)
+    return latencies
+
+
+async def _login_load(app, token: str, logins: int, duration: float) -> Dict[str, List[float]]:
+    import httpx
+
+    headers = {"Authorization": f"Bearer {token}"}
+    transport = httpx.ASGITransport(app=app)
+    results: Dict[str, List[float]] = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        # Baseline: no logins in flight
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_probe_latency(client, headers, stop))
+        await asyncio.sleep(duration)
+        stop.set()
+        results["/api/me idle"] = await probe
+
+        # Same probe while a burst of logins is being verified
+        async def login():
+            await client.post(
+                "/token",
+                data={"username": "bench@example.com", "password": "benchpassword"},
+            )
+
+        stop = asyncio.Event()
+        probe = asyncio.create_task(_probe_latency(client, headers, stop))
+        start = time.perf_counter()
+        await asyncio.gather(*(login() for _ in range(logins)))
+        results["login burst wall time"] = [time.perf_counter() - start]
+        stop.set()
+        results["/api/me during logins"] = await probe
+    return results
+
+
+def run_login_load_benchmark(args):
+    """Measure latency of other endpoints while bcrypt logins are in flight."""
+    from app.database import get_session
+    from app.main import app
+
+    engine = create_benchmark_engine()
+    with Session(engine) as session:
+        user = seed_database(session, clients=0)
+        user.hashed_password = auth.get_password_hash("benchpassword")
+        session.add(user)
+        session.commit()
+        token = auth.create_access_token(data={"sub": user.email})
+
+    def get_session_override():
+        with Session(engine) as session:
+            yield session
+
+    app.dependency_overrides[get_session] = get_session_override
+    auth.login_rate_limiter.max_attempts = args.logins + 1
+    try:
+        results = asyncio.run(_login_load(app, token, args.logins, args.duration))
+    finally:
+        app.dependency_overrides.clear()
+        auth.login_rate_limiter.reset()
+
+    print(f"\n{'-'*80}")
+    print(f"Endpoint latency during {args.logins} concurrent logins")
+    print(f"{'-'*80}")
+    print(f"{'Case':<40} {'Samples':>8} {'p50':>10} {'p99':>10}")
+    for label, samples in results.items():
+        p50 = _percentile(samples, 50) * 1000
+        p99 = _percentile(samples, 99) * 1000
+        print(f"{label:<40} {len(samples):>8} {p50:>8.1f}ms {p99:>8.1f}ms")
+
+
+def _legacy_stage_series(df, date_range) -> List[List[float]]:
+    """Per-day DataFrame filtering as previously done by the trends endpoints"""
+    series = [[], [], []]
+    for day in date_range:
+        date_deals = df[df['updated_at'] <= day]
+        for index, stage in enumerate(time_series.STAGES):
+            series[index].append(float(date_deals[date_deals['stage'] == stage]['value'].sum()))
+    return series
+
+
+def run_trends_benchmark(args):
+    """Compare per-day DataFrame filtering against the vectorized stage series."""
+    import numpy as np
+    import pandas as pd
+
+    rng = np.random.default_rng(42)
+    end_date = date.today()
+    start_date = end_date - timedelta(days=args.days - 1)
+    days = np.datetime64(start_date, "D") + rng.integers(0, args.days, args.deals)
+    stages = rng.choice(np.array(time_series.STAGES, dtype=object), args.deals)
+    values = rng.integers(1000, 5_000_000, args.deals).astype(np.float64)
+
+    timings: Dict[str, float] = {}
+
+    start = time.perf_counter()
+    _, totals = time_series.cumulative_stage_values(
+        days, time_series.stage_codes(stages), values, start_date, end_date
+    )
+    timings["vectorized (bincount + cumsum)"] = time.perf_counter() - start
+
+    df = pd.DataFrame({
+        "updated_at": pd.to_datetime(days),
+        "stage": stages,
+        "value": values,
+    })
+    date_range = pd.date_range(start=start_date, end=end_date)
+    start = time.perf_counter()
+    legacy = _legacy_stage_series(df, date_range)
+    timings["legacy (filter per day)"] = time.perf_counter() - start
+
+    if not np.allclose(totals, np.array(legacy)):
+        print("WARNING: vectorized series does not match the legacy series")
+
+    print(f"\n{'-'*80}")
+    print(f"Pipeline stage series ({args.days} days, {args.deals} deals)")
+    print(f"{'-'*80}")
+    for label, seconds in timings.items():
+        print(f"{label:<40} {seconds*1000:>12.1f}ms")
+    speedup = timings["legacy (filter per day)"] / timings["vectorized (bincount + cumsum)"]
+    print(f"{'speedup':<40} {speedup:>13.1f}x")
+
+
+def _legacy_linear_forecast(x, y: List[float], days_forecast: int):
+    """Per-series np.polyfit as previously done for each stage"""
+    import numpy as np
+
+    slope, intercept = np.polyfit(x, y, 1)
+    y_pred = slope * x + intercept
+    ss_total = np.sum((y - np.mean(y)) ** 2)
+    ss_residual = np.sum((y - y_pred) ** 2)
+    r_squared = 1 - (ss_residual / ss_total) if ss_total > 0 else 0
+    forecast_x = np.array(range(max(x) + 1, max(x) + days_forecast + 1))
+    return [max(0, val) for val in slope * forecast_x + intercept], r_squared
+
+
+def run_forecast_benchmark(args):
+    """Compare one polyfit per stage series against a single batched solve."""
+    import numpy as np
+    from app.utils.predictive_analytics import PredictiveAnalytics
+
+    rng = np.random.default_rng(42)
+    n_series = args.users * len(time_series.STAGES)
+    series = np.cumsum(rng.integers(0, 50_000, (n_series, args.days)), axis=1) / 100
+
+    timings: Dict[str, float] = {}
+    x = np.array(range(args.days))
+    start = time.perf_counter()
+    legacy = [_legacy_linear_forecast(x, row.tolist(), 30) for row in series]
+    timings["legacy (polyfit per series)"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    forecast, r_squared = PredictiveAnalytics._linear_forecast_batch(series, 30)
+    forecast.tolist()
+    timings["batched (one lstsq)"] = time.perf_counter() - start
+
+    if not np.allclose(forecast, np.array([values for values, _ in legacy])):
+        print("WARNING: batched forecast does not match the legacy forecast")
+
+    print(f"\n{'-'*80}")
+    print(f"Pipeline forecast ({args.users} users x {len(time_series.STAGES)} stages, {args.days} days)")
+    print(f"{'-'*80}")
+    for label, seconds in timings.items():
+        print(f"{label:<40} {seconds*1000:>12.1f}ms")
+    speedup = timings["legacy (polyfit per series)"] / timings["batched (one lstsq)"]
+    print(f"{'speedup':<40} {speedup:>13.1f}x")
+
+
+def _legacy_churn_risk(db: Session) -> List[dict]:
+    """Per-client lazy loading as previously done by predict_churn_risk"""
+    client_risks = []
+    for client in db.exec(select(Client)).all():
+        if not client.deals:
+            continue
+        sorted_deals = sorted(client.deals, key=lambda d: d.updated_at, reverse=True)
+        days_since_update = (datetime.utcnow() - sorted_deals[0].updated_at).days
+        total_deals = len(client.deals)
+        won_deals = sum(1 for deal in client.deals if deal.stage == 'won')
+        win_rate = won_deals / total_deals
+        risk_score = min(100, days_since_update * 0.5 * (1 - win_rate) * (1 / (total_deals ** 0.5)))
+        client_risks.append({"id": client.id, "risk_score": round(risk_score, 1)})
+    client_risks.sort(key=lambda x: x["risk_score"], reverse=True)
+    return client_risks
+
+
+def run_churn_benchmark(args):
+    """Compare per-client lazy loading against one grouped query for churn risk."""
+    from app.utils.predictive_analytics import PredictiveAnalytics
+
+    engine = create_benchmark_engine()
+    with Session(engine) as session:
+        seed_database(session, clients=args.clients, deals=args.deals)
+
+    counter = QueryCounter(engine)
+    results: Dict[str, Dict[str, float]] = {}
+    with Session(engine) as session:
+        with measure(counter, results, "legacy (lazy deals per client)"):
+            _legacy_churn_risk(session)
+    with Session(engine) as session:
+        with measure(counter, results, "grouped query + numpy (all)"):
+            PredictiveAnalytics.predict_churn_risk(session)
+    with Session(engine) as session:
+        with measure(counter, results, "grouped query + numpy (page of 50)"):
+            PredictiveAnalytics.predict_churn_risk(session, limit=50)
+
+    print_results(f"Churn risk ({args.clients} clients, {args.deals} deals)", results)
+
+
+def _legacy_deal_outcomes(db: Session, stage: str = 'proposed') -> List[dict]:
+    """Per-deal client lookups as previously done by forecast_deal_outcomes"""
+    deals = db.exec(select(Deal).where(Deal.stage == stage)).all()
+    deal_predictions = []
+    for deal in deals:
+        client = db.get(Client, deal.client_id)
+        if not client:
+            continue
+        client_deals = [d for d in client.deals if d.id != deal.id]
+        won_deals = sum(1 for d in client_deals if d.stage == 'won')
+        client_win_rate = won_deals / len(client_deals) if client_deals else 0.5
+        avg_deal_value = sum(d.value for d in deals) / len(deals)
+        value_factor = 1.0 - min(0.3, (deal.value - avg_deal_value) / avg_deal_value * 0.1)
+        history_factor = 0.5 + client_win_rate * 0.5
+        win_probability = max(0.1, min(0.9, 0.5 * value_factor * history_factor))
+        deal_predictions.append({
+            "id": deal.id,
+            "win_probability": round(win_probability * 100, 1),
+            "expected_value": round((deal.value / 100) * win_probability, 2),
+        })
+    deal_predictions.sort(key=lambda x: x["expected_value"], reverse=True)
+    return deal_predictions
+
+
+def run_deal_outcomes_benchmark(args):
+    """Compare per-deal client lookups against grouped stats and numpy scoring."""
+    from app.utils.predictive_analytics import PredictiveAnalytics
+
+    results: Dict[str, Dict[str, float]] = {}
+    # The legacy implementation is quadratic, so it runs on a smaller dataset
+    for label, proposed, func in [
+        (f"legacy ({args.legacy_proposed} proposed)", args.legacy_proposed, _legacy_deal_outcomes),
+        (f"vectorized ({args.legacy_proposed} proposed)", args.legacy_proposed, PredictiveAnalytics.forecast_deal_outcomes),
+        (f"vectorized ({args.proposed} proposed)", args.proposed, PredictiveAnalytics.forecast_deal_outcomes),
+    ]:
+        engine = create_benchmark_engine()
+        with Session(engine) as session:
+            # Roughly a third of the seeded deals are in the proposed stage
+            seed_database(session, clients=1000, deals=proposed * 3)
+        counter = QueryCounter(engine)
+        with Session(engine) as session:
+            with measure(counter, results, label):
+                func(session)
+
+    # Scoring alone, without fetching rows or building the response
+    import numpy as np
+
+    rng = np.random.default_rng(42)
+    values = rng.integers(1000, 5_000_000, args.proposed).astype(np.float64)
+    other_deals = rng.integers(0, 50, args.proposed)
+    other_won = rng.integers(0, 50, args.proposed) % (other_deals + 1)
+    with measure(counter, results, f"scoring only ({args.proposed} proposed)"):
+        PredictiveAnalytics._score_deal_outcomes(values, other_deals, other_won)
+
+    print_results("Deal outcome predictions", results)
+
+
+def run_charts_benchmark(args):
+    """Compare re-rendering every chart request against the fingerprint cache and render pool."""
+    import base64
+    from concurrent.futures import ThreadPoolExecutor
+
+    from app.utils import charts
+
+    counts = [120, 45, 30]
+    results: Dict[str, Dict[str, float]] = {}
+    counter = QueryCounter(create_benchmark_engine())
+    with measure(counter, results, f"render every request ({args.requests})"):
+        for _ in range(args.requests):
+            charts._render("deals-by-stage", counts, "png")
+
+    # Start the pool and wait for the warm-up before timing anything that uses it
+    charts.start_chart_renderer()
+    charts.render_chart("deals-by-stage", [1, 1, 1])
+    charts.clear_chart_cache()
+    with measure(counter, results, f"fingerprint cache ({args.requests})"):
+        for _ in range(args.requests):
+            image, _ = charts.render_chart("deals-by-stage", counts)
+
+    # Cache misses from concurrent requests, as the sync routes see them
+    charts.clear_chart_cache()
+    with ThreadPoolExecutor(max_workers=args.threads) as threads:
+        with measure(counter, results, f"{args.requests} misses, {args.threads} threads, {charts.CHART_RENDER_WORKERS} workers"):
+            list(threads.map(lambda i: charts.render_chart("deals-by-stage", [i + 1, 45, 30]), range(args.requests)))
+    charts.stop_chart_renderer()
+    print_results("Deals-by-stage chart", results)
+
+    render = charts.chart_renderer_stats()["render"]
+    print(f"\nRender latency: p50 {render['p50_ms']}ms, p95 {render['p95_ms']}ms, p99 {render['p99_ms']}ms")
+    data_uri = f"data:image/png;base64,{base64.b64encode(image).decode()}"
+    print(f"Payload: raw PNG {len(image):,} bytes, base64 JSON {len(data_uri) + 12:,} bytes, "
+          f"304 revalidation 0 bytes")
+
+
+def run_dashboard_pdf_benchmark(args):
+    """End-to-end dashboard PDF latency by phase, with cold and warm chart caches."""
+    from app.utils import charts
+    from app.utils.metrics import get_latency_recorder
+    from app.utils.reports import build_dashboard_pdf
+
+    engine = create_benchmark_engine()
+    with Session(engine) as session:
+        user = seed_database(session, clients=1000, deals=args.deals)
+        user_id = user.id
+    charts.start_chart_renderer()
+    charts.render_chart("deals-by-stage", [1, 1, 1])
+
+    phases = ("snapshot", "charts", "build", "total")
+    for label, clear_cache in [("cold chart cache", True), ("warm chart cache", False)]:
+        for phase in phases:
+            get_latency_recorder(f"dashboard_pdf.{phase}").reset()
+        with Session(engine) as session:
+            for _ in range(args.reports):
+                if clear_cache:
+                    charts.clear_chart_cache()
+                asyncio.run(build_dashboard_pdf(session, user_id, "Benchmark"))
+
+        print(f"\n{'-'*80}")
+        print(f"Dashboard PDF, {label} ({args.reports} reports, {args.deals} deals)")
+        print(f"{'-'*80}")
+        print(f"{'Phase':<20} {'p50':>10} {'p95':>10} {'max':>10}")
+        for phase in phases:
+            stats = get_latency_recorder(f"dashboard_pdf.{phase}").snapshot()
+            print(f"{phase:<20} {stats['p50_ms']:>8.1f}ms {stats['p95_ms']:>8.1f}ms {stats['max_ms']:>8.1f}ms")
+    charts.stop_chart_renderer()
+
+
+def _sample_dashboard_inputs():
+    """Pipeline stats, client list and chart images resembling a real dashboard report."""
+    from app.utils import charts
+
+    pipeline_stats = {
+        "stages": {
+            stage: {"count": count, "value": value, "value_formatted": format_money(value)}
+            for stage, count, value in [("lead", 120, 3_400_000), ("proposed", 45, 2_100_000), ("won", 30, 1_800_000)]
+        },
+        "total": {"count": 195, "value": 7_300_000, "value_formatted": format_money(7_300_000)},
+    }
+    clients = [
+        {"name": f"Client {i}", "deal_count": 20 - i, "total_value_formatted": format_money((20 - i) * 10_000)}
+        for i in range(10)
+    ]
+    deals_chart = charts._render("deals-by-stage", [120, 45, 30], "png")
+    pipeline_chart = charts._render("pipeline-value", [34000.0, 21000.0, 18000.0, 73000.0], "png")
+    return pipeline_stats, clients, deals_chart, pipeline_chart
+
+
+def _pdf_throughput_worker(seconds: float, rebuild_styles: bool) -> int:
+    """Build dashboard PDFs in one process for a fixed time and return how many were made."""
+    from app.utils import generate_dashboard_pdf
+    from app.utils import pdf_rendering
+
+    inputs = _sample_dashboard_inputs()
+    generate_dashboard_pdf(*inputs)
+    built = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        if rebuild_styles:
+            # What every call paid before styles were shared
+            pdf_rendering.report_styles.cache_clear()
+            pdf_rendering.table_style.cache_clear()
+        generate_dashboard_pdf(*inputs)
+        built += 1
+    return built
+
+
+def run_pdf_throughput_benchmark(args):
+    """Dashboard PDFs per second per core, with per-call and shared styles."""
+    from concurrent.futures import ProcessPoolExecutor
+
+    print(f"\n{'-'*80}")
+    print(f"Dashboard PDF throughput ({args.processes} processes, {args.seconds}s)")
+    print(f"{'-'*80}")
+    print(f"{'Case':<40} {'PDFs/s':>10} {'PDFs/s/core':>14}")
+    for label, rebuild_styles in [("styles rebuilt per call", True), ("shared styles", False)]:
+        with ProcessPoolExecutor(max_workers=args.processes) as pool:
+            counts = list(pool.map(
+                _pdf_throughput_worker, [args.seconds] * args.processes, [rebuild_styles] * args.processes
+            ))
+        rate = sum(counts) / args.seconds
+        print(f"{label:<40} {rate:>10.1f} {rate / args.processes:>14.1f}")
+
+
+def _legacy_deals_excel(deals_data: List[dict]) -> bytes:
+    """The DataFrame-based deals workbook, written twice and sized over every row."""
+    import io
+
+    import pandas as pd
+
+    deals_df = pd.DataFrame(deals_data)
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+        deals_df.to_excel(writer, sheet_name='Deals', index=False)
+        workbook = writer.book
+        worksheet = writer.sheets['Deals']
+        currency_format = workbook.add_format({'num_format': '$#,##0.00'})
+        worksheet.set_column(3, 3, 15, currency_format)
+        for i, col in enumerate(deals_df.columns):
+            if col not in ['value', 'created_at', 'updated_at']:
+                column_width = max(deals_df[col].astype(str).map(len).max(), len(col)) + 2
+                worksheet.set_column(i, i, column_width)
+        worksheet.merge_range('A1:E1', 'Deals Report', workbook.add_format({'bold': True, 'font_size': 16}))
+        deals_df.to_excel(writer, sheet_name='Deals', startrow=3, index=False)
+    return output.getvalue()
+
+
+def _excel_rss_worker(database_url: str, streaming: bool) -> Dict[str, float]:
+    """Export every deal to Excel in a fresh process and report its peak RSS."""
+    import resource
+
+    import pandas  # noqa: F401 - loaded up front so only the export counts towards the peak
+    import xlsxwriter  # noqa: F401
+
+    from app.utils.excel_exports import generate_deals_excel
+
+    engine = create_engine(database_url)
+    baseline_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    with Session(engine) as session:
+        if streaming:
+            workbook = generate_deals_excel(crud.iter_deals_with_export_data(session))
+        else:
+            workbook = _legacy_deals_excel(crud.get_deals_with_export_data(session))
+    return {
+        "seconds": time.perf_counter() - start,
+        "baseline_mb": baseline_kb / 1024,
+        "peak_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "size_mb": len(workbook) / (1024 * 1024),
+    }
+
+
+def _seed_file_database(database_url: str, clients: int, deals: int) -> None:
+    engine = create_engine(database_url)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        seed_database(session, clients=clients, deals=deals)
+
+
+def run_excel_rss_benchmark(args):
+    """Peak memory of the deals workbook export, DataFrame versus streaming."""
+    import multiprocessing
+    import os
+    import tempfile
+    from concurrent.futures import ProcessPoolExecutor
+
+    # ru_maxrss survives exec, so every process here is spawned from a parent
+    # that never held the seed data
+    spawn = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as directory:
+        database_url = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+        with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+            pool.submit(_seed_file_database, database_url, args.clients, args.rows).result()
+
+        print(f"\n{'-'*80}")
+        print(f"Deals Excel export ({args.rows} rows); RSS in MB, ru_maxrss as reported on Linux")
+        print(f"{'-'*80}")
+        print(f"{'Case':<30} {'Wall time':>12} {'Peak RSS':>10} {'Export RSS':>12} {'File':>8}")
+        for label, streaming in [("pandas DataFrame", False), ("streaming constant_memory", True)]:
+            # A fresh interpreter per case so each peak starts from a clean slate
+            with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+                result = pool.submit(_excel_rss_worker, database_url, streaming).result()
+            print(
+                f"{label:<30} {result['seconds']:>11.1f}s {result['peak_mb']:>10.0f} "
+                f"{result['peak_mb'] - result['baseline_mb']:>12.0f} {result['size_mb']:>7.1f}M"
+            )
+
+
+def _legacy_list_response(db: Session, table, read_model) -> bytes:
+    """ORM entities through response_model=List[read_model], as FastAPI serializes them."""
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+    from fastapi.utils import create_cloned_field, create_model_field
+
+    field = create_cloned_field(create_model_field(name="Response", type_=List[read_model]))
+    rows = db.exec(select(table)).all()
+    content = asyncio.run(serialize_response(field=field, response_content=rows))
+    return JSONResponse(content).body
+
+
+def _fast_list_response(db: Session, table, serializer) -> bytes:
+    """Read model columns straight from the cursor into orjson."""
+    from app.utils.serializers import ORJSONResponse
+
+    rows = db.execute(serializer.select(select(table))).all()
+    return ORJSONResponse(serializer.dumps(rows)).body
+
+
+def run_json_lists_benchmark(args):
+    """List endpoint serialization, response_model validation versus prebuilt row serializers."""
+    from app.models import ClientRead, DealRead
+    from app.utils.serializers import CLIENT_READ, DEAL_READ, HAS_ORJSON
+
+    engine = create_benchmark_engine()
+    with Session(engine) as session:
+        seed_database(session, clients=args.rows, deals=args.rows)
+    counter = QueryCounter(engine)
+
+    results: Dict[str, Dict[str, float]] = {}
+    sizes = {}
+    encoder = "orjson" if HAS_ORJSON else "json"
+    for name, table, read_model, serializer in [
+        ("clients", Client, ClientRead, CLIENT_READ),
+        ("deals", Deal, DealRead, DEAL_READ),
+    ]:
+        for label, build in [
+            (f"{name}: response_model", lambda db: _legacy_list_response(db, table, read_model)),
+            (f"{name}: row serializer ({encoder})", lambda db: _fast_list_response(db, table, serializer)),
+        ]:
+            # Best of several runs; each request gets a fresh session like the app
+            best = None
+            for _ in range(args.repeat):
+                run: Dict[str, Dict[str, float]] = {}
+                with Session(engine) as session:
+                    with measure(counter, run, label):
+                        sizes[label] = len(build(session))
+                if best is None or run[label]["seconds"] < best["seconds"]:
+                    best = run[label]
+            results[label] = best
+
+    print_results(f"List responses ({args.rows} rows, best of {args.repeat})", results)
+    print("\nBody sizes: " + ", ".join(f"{label} {size:,} bytes" for label, size in sizes.items()))
+
+
+# Libraries that must not be imported until a request needs them
+LAZY_MODULES = ("pandas", "matplotlib", "reportlab", "weasyprint", "httpx", "xlsxwriter", "pyarrow")
+
+
+def _parse_importtime(stderr: str) -> Dict[str, int]:
+    """Cumulative import time in microseconds per module from -X importtime output."""
+    cumulative: Dict[str, int] = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumul, name = line[len("import time:"):].split("|")
+        if cumul.strip().isdigit():
+            cumulative[name.strip()] = max(cumulative.get(name.strip(), 0), int(cumul))
+    return cumulative
+
+
+def run_import_time_benchmark(args):
+    """Cold-import a module in fresh interpreters and fail if it exceeds the budget."""
+    import os
+    import subprocess
+
+    probe = (
+        f"import sys, {args.module}; "
+        f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))"
+    )
+    runs = []
+    for _ in range(args.runs):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", probe],
+            capture_output=True, text=True, env=os.environ.copy()
+        )
+        if completed.returncode != 0:
+            print(completed.stderr[-2000:])
+            sys.exit(f"Importing {args.module} failed")
+        runs.append((_parse_importtime(completed.stderr), completed.stdout.strip()))
+
+    # The fastest run is the least disturbed by other load on the machine
+    cumulative, eager = min(runs, key=lambda run: run[0].get(args.module, 0))
+    total_ms = cumulative.get(args.module, 0) / 1000
+
+    print(f"\n{'-'*80}")
+    print(f"Cold import of {args.module} (best of {args.runs})")
+    print(f"{'-'*80}")
+    top_level = sorted(
+        ((name, micros) for name, micros in cumulative.items() if "." not in name and name != args.module),
+        key=lambda item: item[1], reverse=True
+    )
+    for name, micros in top_level[:args.top]:
+        print(f"{name:<40} {micros / 1000:>12.1f}ms")
+    print(f"{'Total':<40} {total_ms:>12.1f}ms (budget {args.budget_ms}ms)")
+
+    failures = []
+    if eager:
+        failures.append(f"imported at startup instead of on first use: {eager}")
+    if total_ms > args.budget_ms:
+        failures.append(f"{total_ms:.0f}ms exceeds the {args.budget_ms}ms budget")
+    if failures:
+        sys.exit("Import-time check failed: " + "; ".join(failures))
+
+
+def main():
+    """Main function to run the benchmarks."""
+    parser = argparse.ArgumentParser(description='Run FreelanceFlow performance benchmarks.')
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    exports_parser = subparsers.add_parser('exports', help='Export query count and wall time')
+    exports_parser.add_argument('--invoices', type=int, default=100_000, help='Number of invoices and deals to seed')
+    exports_parser.add_argument('--clients', type=int, default=1000, help='Number of clients to seed')
+    exports_parser.set_defaults(func=run_exports_benchmark)
+
+    auth_parser = subparsers.add_parser('auth', help='Per-request authentication overhead')
+    auth_parser.add_argument('--requests', type=int, default=10_000, help='Number of simulated requests')
+    auth_parser.set_defaults(func=run_auth_benchmark)
+
+    login_parser = subparsers.add_parser('login-load', help='Endpoint p99 latency while logins run')
+    login_parser.add_argument('--logins', type=int, default=20, help='Number of concurrent logins')
+    login_parser.add_argument('--duration', type=float, default=2.0, help='Seconds to sample the idle baseline')
+    login_parser.set_defaults(func=run_login_load_benchmark)
+
+    trends_parser = subparsers.add_parser('trends', help='Daily pipeline stage series')
+    trends_parser.add_argument('--days', type=int, default=365, help='Number of days in the series')
+    trends_parser.add_argument('--deals', type=int, default=1_000_000, help='Number of synthetic deals')
+    trends_parser.set_defaults(func=run_trends_benchmark)
+
+    forecast_parser = subparsers.add_parser('forecast', help='Batched pipeline forecasting')
+    forecast_parser.add_argument('--users', type=int, default=1000, help='Number of users to forecast')
+    forecast_parser.add_argument('--days', type=int, default=90, help='Days of history per series')
+    forecast_parser.set_defaults(func=run_forecast_benchmark)
+
+    churn_parser = subparsers.add_parser('churn', help='Client churn risk scoring')
+    churn_parser.add_argument('--clients', type=int, default=5000, help='Number of clients to seed')
+    churn_parser.add_argument('--deals', type=int, default=50_000, help='Number of deals to seed')
+    churn_parser.set_defaults(func=run_churn_benchmark)
+
+    outcomes_parser = subparsers.add_parser('deal-outcomes', help='Deal outcome scoring')
+    outcomes_parser.add_argument('--proposed', type=int, default=50_000, help='Approximate number of proposed deals')
+    outcomes_parser.add_argument('--legacy-proposed', type=int, default=2000, help='Proposed deals for the legacy comparison')
+    outcomes_parser.set_defaults(func=run_deal_outcomes_benchmark)
+
+    charts_parser = subparsers.add_parser('charts', help='Chart rendering and payload size')
+    charts_parser.add_argument('--requests', type=int, default=50, help='Number of chart requests')
+    charts_parser.add_argument('--threads', type=int, default=8, help='Concurrent requests for the render pool case')
+    charts_parser.set_defaults(func=run_charts_benchmark)
+
+    import_parser = subparsers.add_parser('import-time', help='Cold-start import time budget')
+    import_parser.add_argument('--budget-ms', type=int, default=2000, help='Fail above this cumulative import time')
+    import_parser.add_argument('--module', default='app.main', help='Module to import')
+    import_parser.add_argument('--runs', type=int, default=3, help='Fresh interpreters to try, best run counts')
+    import_parser.add_argument('--top', type=int, default=10, help='Slowest top-level imports to list')
+    import_parser.set_defaults(func=run_import_time_benchmark)
+
+    dashboard_parser = subparsers.add_parser('dashboard-pdf', help='Dashboard PDF latency by phase')
+    dashboard_parser.add_argument('--reports', type=int, default=20, help='Reports to build per case')
+    dashboard_parser.add_argument('--deals', type=int, default=50_000, help='Number of deals to seed')
+    dashboard_parser.set_defaults(func=run_dashboard_pdf_benchmark)
+
+    pdf_parser = subparsers.add_parser('pdf-throughput', help='Dashboard PDFs per second per core')
+    pdf_parser.add_argument('--seconds', type=float, default=5.0, help='How long each case runs')
+    pdf_parser.add_argument('--processes', type=int, default=1, help='Worker processes, one per core')
+    pdf_parser.set_defaults(func=run_pdf_throughput_benchmark)
+
+    excel_parser = subparsers.add_parser('excel-rss', help='Peak memory of the deals Excel export')
+    excel_parser.add_argument('--rows', type=int, default=1_000_000, help='Number of deals to export')
+    excel_parser.add_argument('--clients', type=int, default=1000, help='Number of clients to seed')
+    excel_parser.set_defaults(func=run_excel_rss_benchmark)
+
+    json_parser = subparsers.add_parser('json-lists', help='Client and deal list serialization')
+    json_parser.add_argument('--rows', type=int, default=10_000, help='Number of clients and deals to list')
+    json_parser.add_argument('--repeat', type=int, default=5, help='Runs per case, best run counts')
+    json_parser.set_defaults(func=run_json_lists_benchmark)
+
+    args = parser.parse_args()
+    try:
+        args.func(args)
+    except KeyboardInterrupt:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
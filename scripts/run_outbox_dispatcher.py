@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+"""
+Outbox Dispatcher
+
+Delivers queued outbox messages (notification emails) in a process of its own,
+so sending never competes with requests for the web workers. Start the app
+with OUTBOX_DISPATCH_IN_APP=0 when running this. Several dispatchers can run
+side by side; each message is claimed by one of them.
+
+Usage:
+    python -m scripts.run_outbox_dispatcher [--once]
+"""
+
+import argparse
+import asyncio
+import sys
+
+from app.database import engine
+from app.utils.outbox import dispatch_batch, run_outbox_dispatcher
+
+
+async def drain() -> int:
+    """Dispatch batches until the outbox has nothing due"""
+    total = 0
+    while True:
+        claimed = await dispatch_batch(engine)
+        if not claimed:
+            return total
+        total += claimed
+
+
+def main():
+    """Main function to run the dispatcher."""
+    parser = argparse.ArgumentParser(description='Deliver FreelanceFlow outbox messages.')
+    parser.add_argument('--once', action='store_true', help='Deliver everything due, then exit')
+    args = parser.parse_args()
+
+    try:
+        if args.once:
+            print(f"Dispatched {asyncio.run(drain())} outbox messages")
+        else:
+            asyncio.run(run_outbox_dispatcher(engine))
+    except KeyboardInterrupt:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
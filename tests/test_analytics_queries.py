@@ -0,0 +1,102 @@
+import pytest
+from datetime import datetime, timedelta
+
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.pool import StaticPool
+
+from app.crud import calculate_pipeline_value
+from app.models import Client, Deal, User
+from app.utils.analytics_queries import client_totals, stage_totals, velocity_stats
+
+# Setup test database
+@pytest.fixture(name="engine")
+def engine_fixture():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+@pytest.fixture(name="session")
+def session_fixture(engine):
+    with Session(engine) as session:
+        now = datetime.utcnow()
+        for email, deals in [
+            ("one@example.com", [("lead", 1000, 1), ("lead", 2000, 5), ("proposed", 3000, 2), ("won", 4000, 60)]),
+            ("two@example.com", [("won", 5000, 1)]),
+        ]:
+            user = User(email=email, hashed_password="", full_name=email)
+            session.add(user)
+            session.commit()
+            client = Client(name=email, user_id=user.id)
+            session.add(client)
+            session.commit()
+            for stage, value, age in deals:
+                session.add(Deal(client_id=client.id, stage=stage, value=value, updated_at=now - timedelta(days=age)))
+        session.commit()
+
+        yield session
+
+@pytest.fixture(name="query_log")
+def query_log_fixture(engine):
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", on_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", on_execute)
+
+def test_stage_totals_single_query(session: Session, query_log):
+    user_id = session.exec(select(User).where(User.email == "one@example.com")).one().id
+
+    query_log.clear()
+    totals = stage_totals(session, user_id=user_id)
+
+    assert len(query_log) == 1
+    assert totals == {
+        "lead": {"count": 2, "value": 3000},
+        "proposed": {"count": 1, "value": 3000},
+        "won": {"count": 1, "value": 4000},
+    }
+    assert stage_totals(session)["won"] == {"count": 2, "value": 9000}
+    assert stage_totals(session, user_id=user_id + 100) == {
+        stage: {"count": 0, "value": 0} for stage in ("lead", "proposed", "won")
+    }
+
+def test_pipeline_value_uses_stage_totals(session: Session, query_log):
+    query_log.clear()
+    pipeline = calculate_pipeline_value(session)
+
+    assert len(query_log) == 1
+    assert pipeline["lead"] == 3000
+    assert pipeline["won"] == 9000
+
+def test_velocity_stats(session: Session, query_log):
+    user_id = session.exec(select(User).where(User.email == "one@example.com")).one().id
+    since = datetime.utcnow() - timedelta(days=30)
+
+    query_log.clear()
+    stats = velocity_stats(session, since=since, user_id=user_id)
+
+    assert len(query_log) == 1
+    assert stats == {"opportunities": 3, "won": 0, "avg_value": pytest.approx(2000)}
+    assert velocity_stats(session, since=since) == {
+        "opportunities": 4, "won": 1, "avg_value": pytest.approx(2750)
+    }
+    assert velocity_stats(session, since=datetime.utcnow() + timedelta(days=1)) == {
+        "opportunities": 0, "won": 0, "avg_value": 0.0
+    }
+
+def test_client_totals(session: Session, query_log):
+    user_id = session.exec(select(User).where(User.email == "one@example.com")).one().id
+
+    query_log.clear()
+    clients = client_totals(session, user_id=user_id)
+
+    assert len(query_log) == 1
+    assert clients == [{"id": clients[0]["id"], "name": "one@example.com", "deal_count": 4, "total_value": 10000}]
+    assert [c["total_value"] for c in client_totals(session)] == [10000, 5000]
+    assert len(client_totals(session, limit=1)) == 1
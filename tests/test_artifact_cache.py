@@ -0,0 +1,101 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.pool import StaticPool
+
+from app.main import app
+from app.auth import get_current_user
+from app.database import get_session
+from app.models import Client, Deal, User
+from app.utils import artifact_cache, charts
+from app.utils.artifact_cache import ArtifactCache
+
+# Setup test database
+@pytest.fixture(name="engine")
+def engine_fixture():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+@pytest.fixture(name="session")
+def session_fixture(engine):
+    with Session(engine) as session:
+        user = User(email="test@example.com", hashed_password="", full_name="Test User")
+        session.add(user)
+        session.commit()
+        acme = Client(name="Acme Corp", user_id=user.id)
+        session.add(acme)
+        session.commit()
+        session.add_all([
+            Deal(client_id=acme.id, stage="lead", value=10000),
+            Deal(client_id=acme.id, stage="won", value=25000),
+        ])
+        session.commit()
+
+        yield session
+
+@pytest.fixture(name="cache")
+def cache_fixture(monkeypatch, tmp_path):
+    cache = ArtifactCache(str(tmp_path))
+    monkeypatch.setattr(artifact_cache, "_artifact_cache", cache)
+    return cache
+
+@pytest.fixture(name="client")
+def client_fixture(session: Session, cache: ArtifactCache, monkeypatch):
+    monkeypatch.setattr(charts, "CHART_RENDER_WORKERS", 0)
+    user = session.exec(select(User).where(User.email == "test@example.com")).one()
+    app.dependency_overrides[get_session] = lambda: session
+    app.dependency_overrides[get_current_user] = lambda: user
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+def test_least_recently_used_artifacts_evicted_over_size_limit(tmp_path):
+    cache = ArtifactCache(str(tmp_path), max_bytes=250)
+    cache.store("a", ".pdf", b"a" * 100)
+    cache.store("b", ".pdf", b"b" * 100)
+    assert cache.lookup("a", ".pdf")  # "b" is now least recently used
+
+    cache.store("c", ".pdf", b"c" * 100)
+
+    assert cache.lookup("b", ".pdf") is None
+    assert not (tmp_path / "b.pdf").exists()
+    assert cache.store("huge", ".pdf", b"x" * 251) is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["evictions"]) == (1, 1, 1)
+    assert (stats["files"], stats["bytes"]) == (2, 200)
+
+    # A new process picks up the files already on disk
+    assert ArtifactCache(str(tmp_path), max_bytes=250).stats()["bytes"] == 200
+
+def test_export_served_from_cache_until_data_changes(client: TestClient, session: Session, cache: ArtifactCache):
+    first = client.get("/api/export/deals-excel")
+    second = client.get("/api/export/deals-excel")
+
+    assert second.status_code == 200
+    assert second.content == first.content
+    assert second.headers["etag"] == first.headers["etag"]
+    assert second.headers["accept-ranges"] == "bytes"
+    assert client.get(
+        "/api/export/deals-excel", headers={"If-None-Match": first.headers["etag"]}
+    ).status_code == 304
+    assert cache.stats()["stores"] == 1
+
+    deal = session.exec(select(Deal).where(Deal.stage == "lead")).one()
+    deal.value = 12000
+    session.add(deal)
+    session.commit()
+
+    changed = client.get("/api/export/deals-excel")
+    assert changed.headers["etag"] != first.headers["etag"]
+    assert cache.stats()["stores"] == 2
+
+def test_dashboard_pdf_cached_per_user(client: TestClient, cache: ArtifactCache):
+    first = client.get("/api/export/dashboard-pdf")
+    second = client.get("/api/export/dashboard-pdf")
+
+    assert "server-timing" in first.headers
+    assert "server-timing" not in second.headers
+    assert second.content == first.content
+    assert cache.stats()["hits"] == 1
@@ -6,7 +6,14 @@ from sqlmodel.pool import StaticPool
 from app.main import app
 from app.database import get_session
 from app.models import User
-from app.auth import get_password_hash, create_access_token, verify_password
+from app.auth import (
+    get_password_hash,
+    create_access_token,
+    verify_password,
+    resolve_user_from_token,
+    invalidate_token_cache,
+    login_rate_limiter
+)
 
 # Setup test database
 @pytest.fixture(name="session")
@@ -35,9 +42,11 @@ def client_fixture(session: Session):
         return session
 
     app.dependency_overrides[get_session] = get_session_override
+    login_rate_limiter.reset()
     client = TestClient(app)
     yield client
     app.dependency_overrides.clear()
+    login_rate_limiter.reset()
 
 def test_token_generation(session: Session):
     """Test JWT token generation"""
@@ -87,6 +96,44 @@ def test_login_failure_wrong_email(client: TestClient):
     )
     assert response.status_code == 401
 
+def test_login_throttled_after_failures(client: TestClient):
+    """Test that repeated failed logins for one user from one address are throttled"""
+    for _ in range(login_rate_limiter.max_attempts):
+        response = client.post(
+            "/token",
+            data={"username": "test@example.com", "password": "wrongpassword"},
+        )
+        assert response.status_code == 401
+    
+    response = client.post(
+        "/token",
+        data={"username": "test@example.com", "password": "testpassword"},
+    )
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+    
+    # Other users behind the same address are not affected
+    response = client.post(
+        "/token",
+        data={"username": "someone@example.com", "password": "wrongpassword"},
+    )
+    assert response.status_code == 401
+
+def test_successful_logins_not_throttled(client: TestClient):
+    """Test that successful logins do not count toward the limit and clear failures"""
+    for _ in range(login_rate_limiter.max_attempts - 1):
+        client.post("/token", data={"username": "test@example.com", "password": "wrongpassword"})
+    
+    for _ in range(login_rate_limiter.max_attempts + 1):
+        response = client.post(
+            "/token",
+            data={"username": "test@example.com", "password": "testpassword"},
+        )
+        assert response.status_code == 200
+    
+    response = client.post("/token", data={"username": "test@example.com", "password": "wrongpassword"})
+    assert response.status_code == 401
+
 def test_protected_route_with_token(client: TestClient, session: Session):
     """Test accessing a protected route with a valid token"""
     # First login to get a token
@@ -112,4 +159,28 @@ def test_protected_route_with_token(client: TestClient, session: Session):
 def test_protected_route_without_token(client: TestClient):
     """Test that protected routes require a token"""
     response = client.get("/api/me")
-    assert response.status_code == 401 
\ No newline at end of file
+    assert response.status_code == 401 
+
+def test_token_resolution_is_cached(session: Session):
+    """Test that a resolved token is served from the cache without a user lookup"""
+    invalidate_token_cache()
+    token = create_access_token({"sub": "test@example.com"})
+    
+    user = resolve_user_from_token(session, token)
+    assert user.email == "test@example.com"
+    
+    # Rename the user behind the cache's back: the cached snapshot is returned
+    db_user = session.query(User).first()
+    db_user.full_name = "Renamed User"
+    session.add(db_user)
+    session.commit()
+    assert resolve_user_from_token(session, token).full_name == "Test User"
+    
+    # Invalidating the user's entries forces a fresh lookup
+    invalidate_token_cache(user_id=db_user.id)
+    assert resolve_user_from_token(session, token).full_name == "Renamed User"
+    invalidate_token_cache()
+
+def test_invalid_token_is_not_resolved(session: Session):
+    """Test that an invalid token does not resolve to a user"""
+    assert resolve_user_from_token(session, "not-a-jwt") is None
@@ -0,0 +1,144 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.pool import StaticPool
+
+from app.main import app
+from app.auth import get_current_user
+from app.database import get_session
+from app.models import Client, Deal, User
+from app.utils import charts
+
+# Setup test database
+@pytest.fixture(name="session")
+def session_fixture():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        user = User(email="test@example.com", hashed_password="", full_name="Test User")
+        session.add(user)
+        session.commit()
+        client = Client(name="Acme Corp", user_id=user.id)
+        session.add(client)
+        session.commit()
+        session.add(Deal(client_id=client.id, stage="lead", value=10000))
+        session.add(Deal(client_id=client.id, stage="won", value=25000))
+        session.commit()
+
+        yield session
+
+# Setup test client with dependency overrides
+@pytest.fixture(name="client")
+def client_fixture(session: Session, monkeypatch):
+    # Draw in the test process so renders can be counted
+    monkeypatch.setattr(charts, "CHART_RENDER_WORKERS", 0)
+    user = session.exec(select(User)).first()
+    app.dependency_overrides[get_session] = lambda: session
+    app.dependency_overrides[get_current_user] = lambda: user
+    charts.clear_chart_cache()
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    charts.clear_chart_cache()
+
+@pytest.fixture(name="renders")
+def renders_fixture(monkeypatch):
+    calls = []
+    render = charts._render
+
+    def counting_render(kind, data, fmt):
+        calls.append((kind, fmt))
+        return render(kind, data, fmt)
+
+    monkeypatch.setattr(charts, "_render", counting_render)
+    return calls
+
+def test_png_chart_with_etag(client: TestClient, renders):
+    response = client.get("/api/analytics/deals-by-stage-chart.png")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/png"
+    assert response.content.startswith(b"\x89PNG")
+    etag = response.headers["etag"]
+
+    # Unchanged data revalidates without rendering again
+    response = client.get("/api/analytics/deals-by-stage-chart.png", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    # The JSON route shares the cached render
+    data = client.get("/api/analytics/deals-by-stage-chart").json()
+    assert data["image"].startswith("data:image/png;base64,")
+    assert renders == [("deals-by-stage", "png")]
+
+def test_chart_changes_with_data(client: TestClient, session: Session, renders):
+    etag = client.get("/api/analytics/pipeline-value-chart.png").headers["etag"]
+
+    deal = session.exec(select(Deal)).first()
+    deal.value += 5000
+    session.add(deal)
+    session.commit()
+
+    response = client.get("/api/analytics/pipeline-value-chart.png", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert len(renders) == 2
+
+def test_svg_and_unknown_formats(client: TestClient):
+    response = client.get("/api/analytics/pipeline-value-chart.svg")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "image/svg+xml"
+    assert b"<svg" in response.content
+
+    assert client.get("/api/analytics/pipeline-value-chart.gif").status_code == 404
+
+def test_empty_stage_chart(client: TestClient, session: Session):
+    for deal in session.exec(select(Deal)).all():
+        session.delete(deal)
+    session.commit()
+
+    assert client.get("/api/analytics/deals-by-stage-chart.png").status_code == 404
+    assert client.get("/api/analytics/deals-by-stage-chart").json() == {"error": "No deals data available"}
+
+def test_pool_render_matches_in_process():
+    charts.clear_chart_cache()
+    try:
+        image, _ = charts.render_chart("pipeline-value", [10.0, 20.0, 30.0, 60.0])
+    finally:
+        charts.stop_chart_renderer()
+
+    assert image == charts._render("pipeline-value", [10.0, 20.0, 30.0, 60.0], "png")
+    stats = charts.chart_renderer_stats()
+    assert stats["cache"] == {"entries": 1, "hits": 0, "misses": 1}
+    assert stats["render"]["count"] >= 1
+    assert "p99_ms" in stats["draw"]
+    charts.clear_chart_cache()
+
+def test_render_timeout_returns_503(monkeypatch):
+    class StuckFuture:
+        cancelled = False
+
+        def result(self, timeout):
+            raise charts.FutureTimeoutError()
+
+        def cancel(self):
+            StuckFuture.cancelled = True
+            return True
+
+    class StuckPool:
+        def submit(self, *args):
+            return StuckFuture()
+
+    monkeypatch.setattr(charts, "CHART_RENDER_WORKERS", 1)
+    monkeypatch.setattr(charts, "_get_render_pool", lambda: StuckPool())
+    charts.clear_chart_cache()
+
+    with pytest.raises(charts.HTTPException) as exc_info:
+        charts.render_chart("deals-by-stage", [1, 2, 3])
+
+    assert exc_info.value.status_code == 503
+    assert exc_info.value.headers == {"Retry-After": "5"}
+    assert StuckFuture.cancelled
+    # The render slot is given back and nothing is cached
+    assert charts._render_slots._value == charts.CHART_RENDER_MAX_PENDING
+    assert charts.chart_renderer_stats()["cache"]["entries"] == 0
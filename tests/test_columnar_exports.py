@@ -0,0 +1,91 @@
+import io
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.pool import StaticPool
+
+from app.main import app
+from app.auth import get_current_user
+from app.database import get_session
+from app.models import Client, Deal, Invoice, User
+from app.utils import columnar_exports
+
+pa = pytest.importorskip("pyarrow")
+pq = pytest.importorskip("pyarrow.parquet")
+
+# Setup test database
+@pytest.fixture(name="engine")
+def engine_fixture():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+@pytest.fixture(name="session")
+def session_fixture(engine):
+    with Session(engine) as session:
+        user = User(email="test@example.com", hashed_password="", full_name="Test User")
+        other = User(email="other@example.com", hashed_password="", full_name="Other User")
+        session.add_all([user, other])
+        session.commit()
+        clients = [Client(name=f"Client {i}", email=f"c{i}@example.com", user_id=user.id) for i in range(25)]
+        foreign = Client(name="Not mine", user_id=other.id)
+        session.add_all(clients + [foreign])
+        session.commit()
+        session.add_all([Deal(client_id=client.id, stage="lead", value=12345) for client in clients])
+        session.add(Deal(client_id=foreign.id, stage="won", value=99999))
+        session.add(Invoice(client_id=clients[0].id, number="INV-1", total=5000, pdf_url="",
+                            due_date=date(2024, 1, 31), status="sent"))
+        session.add(Invoice(client_id=foreign.id, number="INV-SECRET", total=99999, pdf_url="",
+                            due_date=date(2024, 2, 1), status="sent"))
+        session.commit()
+        yield session
+
+@pytest.fixture(name="client")
+def client_fixture(session: Session, monkeypatch):
+    monkeypatch.setattr(columnar_exports, "COLUMNAR_BATCH_SIZE", 10)
+    user = session.exec(select(User).where(User.email == "test@example.com")).one()
+    app.dependency_overrides[get_session] = lambda: session
+    app.dependency_overrides[get_current_user] = lambda: user
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+def test_parquet_export_keeps_types(client: TestClient):
+    response = client.get("/api/export/deals.parquet")
+
+    assert response.headers["content-type"] == "application/vnd.apache.parquet"
+    parquet = pq.ParquetFile(io.BytesIO(response.content))
+    table = parquet.read()
+    assert table.schema.field("value_cents").type == pa.int64()
+    assert table.schema.field("created_at").type == pa.timestamp("us")
+    # One row group per batch read from the cursor
+    assert parquet.num_row_groups == 3
+    assert table.num_rows == 25
+    assert set(table.column("value_cents").to_pylist()) == {12345}
+
+def test_arrow_stream_export(client: TestClient):
+    response = client.get("/api/export/invoices.arrows")
+
+    assert response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.schema.field("due_date").type == pa.date32()
+    assert table.to_pylist() == [{
+        "id": 1, "client_id": 1, "client_name": "Client 0", "number": "INV-1",
+        "total_cents": 5000, "status": "sent", "due_date": date(2024, 1, 31)
+    }]
+
+def test_columnar_exports_only_include_own_rows(client: TestClient):
+    for entity in ("clients", "deals", "invoices"):
+        table = pq.read_table(io.BytesIO(client.get(f"/api/export/{entity}.parquet").content))
+        names = table.column("name" if entity == "clients" else "client_name").to_pylist()
+        assert "Not mine" not in names
+
+def test_unknown_columnar_export(client: TestClient, monkeypatch):
+    assert client.get("/api/export/users.parquet").status_code == 404
+    assert client.get("/api/export/deals.feather").status_code == 404
+
+    monkeypatch.setattr(columnar_exports, "HAS_PYARROW", False)
+    assert client.get("/api/export/deals.parquet").status_code == 501
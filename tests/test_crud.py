@@ -0,0 +1,82 @@
+import pytest
+from datetime import date
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.pool import StaticPool
+
+from app import crud
+from app.models import Client, Deal, Invoice, User
+
+# Setup test database
+@pytest.fixture(name="engine")
+def engine_fixture():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+@pytest.fixture(name="session")
+def session_fixture(engine):
+    with Session(engine) as session:
+        # Create test user
+        test_user = User(
+            email="test@example.com",
+            hashed_password="hashed_password",
+            is_active=True,
+            full_name="Test User"
+        )
+        session.add(test_user)
+        session.commit()
+
+        # Create two clients with a deal and an invoice each
+        for name in ["Acme Corp", "Globex"]:
+            client = Client(name=name, user_id=test_user.id)
+            session.add(client)
+            session.commit()
+            session.add(Deal(client_id=client.id, stage="lead", value=12345))
+            session.add(Invoice(
+                client_id=client.id,
+                number=f"INV-{client.id}",
+                total=50000,
+                pdf_url="",
+                due_date=date(2024, 1, 31),
+                status="sent"
+            ))
+        session.commit()
+
+        yield session
+
+def count_queries(engine, func, *args):
+    """Run func and return its result together with the number of SQL statements"""
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", on_execute)
+    try:
+        result = func(*args)
+    finally:
+        event.remove(engine, "before_cursor_execute", on_execute)
+    return result, len(statements)
+
+def test_invoices_export_uses_single_query(engine, session: Session):
+    session.expire_all()
+
+    rows, queries = count_queries(engine, crud.get_invoices_with_export_data, session)
+
+    assert queries == 1
+    assert [row["client_name"] for row in rows] == ["Acme Corp", "Globex"]
+    assert rows[0]["total"] == 500.0
+    assert rows[0]["due_date"] == "2024-01-31"
+
+def test_deals_export_uses_single_query(engine, session: Session):
+    session.expire_all()
+
+    rows, queries = count_queries(engine, crud.get_deals_with_export_data, session)
+
+    assert queries == 1
+    assert [row["client_name"] for row in rows] == ["Acme Corp", "Globex"]
+    assert rows[0]["value"] == 123.45
+    assert rows[0]["value_formatted"] == "$123.45"
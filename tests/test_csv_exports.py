@@ -0,0 +1,150 @@
+import asyncio
+import csv
+import io
+import zlib
+from datetime import date
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.pool import StaticPool
+from starlette.responses import Response, StreamingResponse
+
+from app.main import app
+from app.auth import get_current_user
+from app.database import get_session
+from app.models import Client, Deal, Invoice, User
+from app.utils import csv_exports
+from app.middleware.compression import StreamingGZipMiddleware
+
+# Setup test database
+@pytest.fixture(name="engine")
+def engine_fixture():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+@pytest.fixture(name="session")
+def session_fixture(engine):
+    with Session(engine) as session:
+        user = User(email="test@example.com", hashed_password="", full_name="Test User")
+        session.add(user)
+        session.commit()
+        clients = [Client(name=f"Client {i}", email=f"c{i}@example.com", user_id=user.id) for i in range(25)]
+        session.add_all(clients)
+        session.commit()
+        session.add_all([Deal(client_id=client.id, stage="lead", value=12345) for client in clients])
+        session.add(Invoice(client_id=clients[0].id, number="INV-1", total=5000, pdf_url="",
+                            due_date=date(2024, 1, 31), status="sent"))
+        session.commit()
+
+        other = User(email="other@example.com", hashed_password="", full_name="Other User")
+        session.add(other)
+        session.commit()
+        foreign = Client(name="Not mine", email="secret@example.com", user_id=other.id)
+        session.add(foreign)
+        session.commit()
+        session.add(Deal(client_id=foreign.id, stage="won", value=99999))
+        session.add(Invoice(client_id=foreign.id, number="INV-SECRET", total=99999, pdf_url="",
+                            due_date=date(2024, 2, 1), status="sent"))
+        session.commit()
+
+        yield session
+
+@pytest.fixture(name="client")
+def client_fixture(session: Session, monkeypatch):
+    monkeypatch.setattr(csv_exports, "CSV_BATCH_SIZE", 10)
+    user = session.exec(select(User).where(User.email == "test@example.com")).one()
+    app.dependency_overrides[get_session] = lambda: session
+    app.dependency_overrides[get_current_user] = lambda: user
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+def _read_csv(response) -> list:
+    return list(csv.DictReader(io.StringIO(response.text)))
+
+def test_csv_exports_for_each_entity(client: TestClient):
+    clients = _read_csv(client.get("/export/csv/clients"))
+    deals = _read_csv(client.get("/export/csv/deals"))
+    invoices = client.get("/export/csv/invoices")
+
+    assert len(clients) == 25 and clients[3]["email"] == "c3@example.com"
+    assert len(deals) == 25 and deals[0]["value_formatted"] == "$123.45"
+    assert invoices.headers["content-disposition"] == "attachment; filename=invoices.csv"
+    assert _read_csv(invoices) == [{
+        "id": "1", "client_name": "Client 0", "invoice_number": "INV-1",
+        "total": "50.0", "status": "sent", "due_date": "2024-01-31"
+    }]
+    assert client.get("/export/csv/users").status_code == 404
+    # The original clients route streams the same file
+    assert client.get("/export/csv").text == client.get("/export/csv/clients").text
+
+def test_csv_sent_in_batches_and_gzipped(client: TestClient, engine):
+    chunks = list(csv_exports.iter_csv(engine, csv_exports.CSV_EXPORTS["clients"], batch_size=10, user_id=1))
+    assert chunks[0] == b"id,name,email,phone,notes,created_at\r\n"
+    assert [chunk.count(b"\r\n") for chunk in chunks[1:]] == [10, 10, 5]
+
+    response = client.get("/export/csv/deals", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(_read_csv(response)) == 25
+
+def _run_asgi(asgi_app, headers=((b"accept-encoding", b"gzip"),)):
+    messages = []
+    requested = []
+
+    async def receive():
+        if not requested:
+            requested.append(True)
+            return {"type": "http.request", "body": b"", "more_body": False}
+        # Streaming responses listen for a disconnect until they finish
+        await asyncio.Event().wait()
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": list(headers), "query_string": b""}
+    asyncio.run(asgi_app(scope, receive, send))
+    return messages
+
+def test_gzip_flushes_each_streamed_chunk():
+    async def rows():
+        yield b"header\n"
+        yield b"row\n" * 100
+
+    messages = _run_asgi(StreamingGZipMiddleware(StreamingResponse(rows(), media_type="text/csv")))
+
+    assert (b"content-encoding", b"gzip") in messages[0]["headers"]
+    # The first chunk can be decompressed on its own, before the rest arrives
+    decompressor = zlib.decompressobj(31)
+    assert decompressor.decompress(messages[1]["body"]) == b"header\n"
+    assert decompressor.decompress(messages[2]["body"]) == b"row\n" * 100
+
+def test_gzip_skips_binary_and_small_responses():
+    png = _run_asgi(StreamingGZipMiddleware(Response(b"\x89PNG" * 1000, media_type="image/png")))
+    small = _run_asgi(StreamingGZipMiddleware(Response("ok", media_type="text/plain")))
+
+    assert not any(name == b"content-encoding" for name, _ in png[0]["headers"])
+    assert png[1]["body"] == b"\x89PNG" * 1000
+    assert small[1]["body"] == b"ok"
+
+def test_gzip_sends_start_before_pathsend():
+    async def text_file(scope, receive, send):
+        # What FileResponse sends for a text file on a server with pathsend
+        await send({"type": "http.response.start", "status": 200,
+                    "headers": [(b"content-type", b"text/plain"), (b"content-length", b"4096")]})
+        await send({"type": "http.response.pathsend", "path": "/tmp/notes.txt"})
+
+    messages = _run_asgi(StreamingGZipMiddleware(text_file))
+
+    assert [message["type"] for message in messages] == ["http.response.start", "http.response.pathsend"]
+    assert (b"content-length", b"4096") in messages[0]["headers"]
+    assert not any(name == b"content-encoding" for name, _ in messages[0]["headers"])
+
+def test_csv_exports_only_include_own_rows(client: TestClient):
+    for entity in ("clients", "deals", "invoices"):
+        body = client.get(f"/export/csv/{entity}").text
+        assert "Not mine" not in body and "secret@example.com" not in body
+        assert "INV-SECRET" not in body and "999.99" not in body
+    assert "Not mine" not in client.get("/export/csv").text
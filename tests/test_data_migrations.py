@@ -0,0 +1,67 @@
+import pytest
+from datetime import datetime
+
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.pool import StaticPool
+
+from app.models import Client, DataMigration, Deal, DealStageDailyRollup, DealStageEvent, User
+from app.utils.stage_history import backfill_stage_history
+from migrations.data_migrations import run_once
+
+@pytest.fixture(name="engine")
+def engine_fixture():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        user = User(email="test@example.com", hashed_password="", full_name="Test User")
+        session.add(user)
+        session.commit()
+        client = Client(name="Acme Corp", user_id=user.id)
+        session.add(client)
+        session.commit()
+        session.add_all([
+            Deal(client_id=client.id, stage="lead", value=1000, created_at=datetime(2024, 1, 2)),
+            Deal(client_id=client.id, stage="won", value=3000, created_at=datetime(2024, 1, 3)),
+        ])
+        session.commit()
+    return engine
+
+def _events(engine) -> list:
+    with Session(engine) as db:
+        return db.exec(select(DealStageEvent.deal_id, DealStageEvent.to_stage).order_by(DealStageEvent.deal_id)).all()
+
+def test_migration_runs_once(engine):
+    assert run_once(engine, "backfill_stage_history", backfill_stage_history) is True
+    # A second worker starting later skips it, even though rollups would be rebuilt
+    assert run_once(engine, "backfill_stage_history", backfill_stage_history) is False
+
+    assert _events(engine) == [(1, "lead"), (2, "won")]
+    with Session(engine) as db:
+        assert len(db.exec(select(DealStageDailyRollup)).all()) == 2
+        assert db.get(DataMigration, "backfill_stage_history") is not None
+
+def test_failed_migration_is_retried(engine):
+    def broken(session):
+        backfill_stage_history(session)
+        raise RuntimeError("interrupted")
+
+    with pytest.raises(RuntimeError):
+        run_once(engine, "backfill_stage_history", broken)
+    # Neither the events nor the marker were committed
+    assert _events(engine) == []
+
+    assert run_once(engine, "backfill_stage_history", backfill_stage_history) is True
+    assert _events(engine) == [(1, "lead"), (2, "won")]
+
+def test_backfill_skips_deals_with_history(engine):
+    with Session(engine) as db:
+        assert backfill_stage_history(db) == 2
+        db.commit()
+        db.add(Deal(client_id=1, stage="proposed", value=500))
+        db.commit()
+
+        assert backfill_stage_history(db) == 1
+        db.commit()
+    assert _events(engine) == [(1, "lead"), (2, "won"), (3, "proposed")]
@@ -0,0 +1,62 @@
+import asyncio
+
+import pytest
+from starlette.requests import Request
+
+from app.utils.downloads import SERVING_SUFFIX, ranged_file_response
+
+def _request(headers=None) -> Request:
+    raw = [(name.lower().encode(), value.encode()) for name, value in (headers or {}).items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+def _send(response, request: Request, fail: bool = False) -> list:
+    messages = []
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if fail and message["type"] == "http.response.body":
+            raise OSError("client went away")
+        messages.append(message)
+
+    asyncio.run(response(request.scope, receive, send))
+    return messages
+
+def _body(messages) -> bytes:
+    return b"".join(message.get("body", b"") for message in messages if message["type"] == "http.response.body")
+
+@pytest.fixture(name="report")
+def report_fixture(tmp_path):
+    path = tmp_path / "report.pdf"
+    path.write_bytes(b"%PDF" + bytes(range(256)) * 40)
+    return path
+
+def test_file_deleted_after_response_created_is_still_served(report, tmp_path):
+    request = _request({"Range": "bytes=4-"})
+    response = ranged_file_response(request, str(report), "application/pdf", "report.pdf", '"v1"')
+
+    # Evicted by the artifact cache, or another process, before the body is sent
+    expected = report.read_bytes()
+    report.unlink()
+    messages = _send(response, request)
+
+    assert messages[0]["status"] == 206
+    assert _body(messages) == expected[4:]
+    assert list(tmp_path.iterdir()) == []
+
+def test_serving_link_removed_when_client_disconnects(report, tmp_path):
+    request = _request()
+    response = ranged_file_response(request, str(report), "application/pdf", "report.pdf")
+    assert response.path.endswith(SERVING_SUFFIX)
+
+    with pytest.raises(OSError):
+        _send(response, request, fail=True)
+    assert list(tmp_path.iterdir()) == [report]
+
+def test_not_modified_takes_no_link(report, tmp_path):
+    request = _request({"If-None-Match": '"v1"'})
+    response = ranged_file_response(request, str(report), "application/pdf", "report.pdf", '"v1"')
+
+    assert response.status_code == 304
+    assert list(tmp_path.iterdir()) == [report]
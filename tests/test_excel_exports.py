@@ -0,0 +1,62 @@
+import io
+import zipfile
+
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.pool import StaticPool
+
+from app import crud
+from app.models import Client, Deal, User
+from app.utils import excel_exports
+from app.utils.excel_exports import generate_deals_excel, generate_pipeline_excel
+
+def _sheet_xml(workbook: bytes) -> str:
+    with zipfile.ZipFile(io.BytesIO(workbook)) as archive:
+        return archive.read("xl/worksheets/sheet1.xml").decode()
+
+def test_deals_streamed_from_cursor():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        user = User(email="test@example.com", hashed_password="", full_name="Test User")
+        session.add(user)
+        session.commit()
+        client = Client(name="Acme Corp", user_id=user.id)
+        session.add(client)
+        session.commit()
+        session.add_all([Deal(client_id=client.id, stage="won", value=i * 100) for i in range(1, 26)])
+        session.commit()
+
+        rows = crud.iter_deals_with_export_data(session, batch_size=10)
+        sheet = _sheet_xml(generate_deals_excel(rows))
+
+    # Title, date, blank row, header, then one row per deal
+    assert '<dimension ref="A1:F29"/>' in sheet
+    assert "<t>client_name</t>" in sheet
+    assert sheet.count("<t>Acme Corp</t>") == 25
+
+def test_column_widths_estimated_from_sample(monkeypatch):
+    monkeypatch.setattr(excel_exports, "WIDTH_SAMPLE_ROWS", 2)
+    consumed = []
+
+    def rows():
+        for name in ["Short", "Medium name", "A much longer client name past the sample"]:
+            consumed.append(name)
+            yield {"id": len(consumed), "name": name}
+
+    sheet = _sheet_xml(excel_exports.generate_clients_excel(rows()))
+
+    # Width comes from "Medium name" (11 + 2 padding), not the unsampled third row
+    assert '<col min="2" max="2" width="13.7109375"' in sheet
+    assert "A much longer client name past the sample" in sheet
+    assert len(consumed) == 3
+
+def test_empty_exports_still_have_headers():
+    deals_sheet = _sheet_xml(generate_deals_excel([]))
+    pipeline_sheet = _sheet_xml(generate_pipeline_excel({
+        "lead_count": 1, "proposed_count": 2, "won_count": 3,
+        "lead_value": 100, "proposed_value": 200, "won_value": 300,
+        "total_count": 6, "total_value": 600,
+    }))
+
+    assert "<t>value_formatted</t>" in deals_sheet
+    assert "<t>Total</t>" in pipeline_sheet and "<v>600</v>" in pipeline_sheet
@@ -0,0 +1,26 @@
+import sys
+
+import pytest
+
+from app.lazy_imports import lazy_module
+
+@pytest.fixture(name="probe_module")
+def probe_module_fixture(tmp_path, monkeypatch):
+    (tmp_path / "lazy_probe_module.py").write_text("LOADED = True\n\ndef answer():\n    return 42\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    yield "lazy_probe_module"
+    sys.modules.pop("lazy_probe_module", None)
+
+def test_module_imported_on_first_attribute_access(probe_module):
+    module = lazy_module(probe_module)
+    assert probe_module not in sys.modules
+    assert "not loaded" in repr(module)
+
+    assert module.answer() == 42
+    assert probe_module in sys.modules
+    assert module.LOADED is sys.modules[probe_module].LOADED
+
+def test_missing_module_fails_on_use():
+    module = lazy_module("no_such_module_for_lazy_imports")
+    with pytest.raises(ModuleNotFoundError):
+        module.anything
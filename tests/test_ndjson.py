@@ -0,0 +1,75 @@
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.pool import StaticPool
+
+from app.main import app
+from app.auth import get_current_user
+from app.database import get_session
+from app.models import Client, Deal, Notification, User
+from app.utils import ndjson
+from app.utils.serializers import DEAL_READ
+
+NDJSON = {"Accept": "application/x-ndjson"}
+
+# Setup test database
+@pytest.fixture(name="engine")
+def engine_fixture():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+@pytest.fixture(name="session")
+def session_fixture(engine):
+    with Session(engine) as session:
+        user = User(email="test@example.com", hashed_password="", full_name="Test User")
+        session.add(user)
+        session.commit()
+        clients = [Client(name=f"Client {i}", user_id=user.id) for i in range(25)]
+        session.add_all(clients)
+        session.commit()
+        session.add_all([Deal(client_id=client.id, stage="lead", value=100 * client.id) for client in clients])
+        session.add_all([
+            Notification(user_id=user.id, type="deal_won", title=f"Won {i}", message="",
+                         entity_type="deal", entity_id=i, is_read=i % 2 == 0)
+            for i in range(5)
+        ])
+        session.commit()
+        yield session
+
+@pytest.fixture(name="client")
+def client_fixture(session: Session):
+    user = session.exec(select(User)).first()
+    app.dependency_overrides[get_session] = lambda: session
+    app.dependency_overrides[get_current_user] = lambda: user
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+def _lines(response) -> list:
+    return [json.loads(line) for line in response.text.splitlines()]
+
+def test_ndjson_matches_json_array(client: TestClient):
+    for path in ("/api/clients/", "/api/deals/?sort_by=id", "/api/notifications/?unread_only=true"):
+        response = client.get(path, headers=NDJSON)
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert _lines(response) == client.get(path).json()
+
+    assert len(_lines(client.get("/api/deals/?min_value=20", headers=NDJSON))) == 6
+    assert len(_lines(client.get("/api/notifications/?unread_only=true", headers=NDJSON))) == 2
+
+def test_ndjson_sent_in_batches(engine, session):
+    statement = select(Deal).order_by(Deal.id)
+    chunks = list(ndjson.iter_ndjson(engine, statement, DEAL_READ, batch_size=10))
+
+    assert [chunk.count(b"\n") for chunk in chunks] == [10, 10, 5]
+    assert json.loads(chunks[0].splitlines()[0])["value"] == 100
+
+def test_ndjson_gzipped(client: TestClient):
+    response = client.get("/api/deals/", headers={**NDJSON, "Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert len(_lines(response)) == 25
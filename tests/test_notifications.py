@@ -0,0 +1,114 @@
+import pytest
+from fastapi import BackgroundTasks
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.pool import StaticPool
+
+from app.main import app
+from app.auth import get_current_user
+from app.database import get_session
+from app.models import Notification, NotificationCounter, User
+from app.utils.background_tasks import create_notification_with_email
+from app.utils.notifications import adjust_unread, rebuild_unread_counters, unread_count
+from app.utils.unit_of_work import UnitOfWork
+from migrations.data_migrations import run_once
+
+# Setup test database
+@pytest.fixture(name="session")
+def session_fixture():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        user = User(email="test@example.com", hashed_password="", full_name="Test User")
+        other = User(email="other@example.com", hashed_password="", full_name="Other User")
+        session.add_all([user, other])
+        session.commit()
+        session.add_all([
+            Notification(user_id=owner.id, type="deal_updated", title=f"Update {i}", message="",
+                         entity_type="deal", entity_id=i)
+            for owner in (user, other) for i in range(5)
+        ])
+        session.commit()
+        rebuild_unread_counters(session)
+        session.commit()
+        yield session
+
+@pytest.fixture(name="client")
+def client_fixture(session: Session):
+    user = session.exec(select(User).where(User.email == "test@example.com")).one()
+    app.dependency_overrides[get_session] = lambda: session
+    app.dependency_overrides[get_current_user] = lambda: user
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+def test_unread_count_follows_reads(client: TestClient, session: Session):
+    assert client.get("/api/notifications/unread-count").json() == {"unread": 5}
+
+    first = client.get("/api/notifications/?limit=1").json()[0]
+    client.patch(f"/api/notifications/{first['id']}/read")
+    client.patch(f"/api/notifications/{first['id']}/read")
+    assert client.get("/api/notifications/unread-count").json() == {"unread": 4}
+
+    assert client.patch("/api/notifications/read-all").json() == {"success": True, "count": 4}
+    assert client.get("/api/notifications/unread-count").json() == {"unread": 0}
+    assert client.get("/api/notifications/?unread_only=true").json() == []
+    # The other user's notifications are untouched
+    assert unread_count(session, 2) == 5
+
+def test_notifications_paginated_by_cursor(client: TestClient):
+    pages = []
+    url = "/api/notifications/?limit=2"
+    while url:
+        response = client.get(url)
+        pages.append([notification["title"] for notification in response.json()])
+        cursor = response.headers.get("x-next-cursor")
+        url = f"/api/notifications/?limit=2&before_id={cursor}" if cursor else None
+
+    assert pages == [["Update 4", "Update 3"], ["Update 2", "Update 1"], ["Update 0"]]
+
+def test_counter_committed_with_notification(session: Session):
+    user = session.get(User, 1)
+    user.email_notifications_enabled = False
+
+    uow = UnitOfWork(session, BackgroundTasks())
+    create_notification_with_email(uow, user, "deal_created", "New deal", "", "deal", 99)
+    uow.rollback()
+    assert unread_count(session, user.id) == 5
+
+    create_notification_with_email(uow, user, "deal_created", "New deal", "", "deal", 99)
+    uow.commit()
+    assert unread_count(session, user.id) == 6
+
+def test_unread_pages_use_composite_index(session: Session):
+    plan = session.execute(text(
+        "EXPLAIN QUERY PLAN SELECT * FROM notification "
+        "WHERE user_id = 1 AND is_read = 0 AND id < 100 ORDER BY id DESC LIMIT 10"
+    )).all()
+
+    assert "ix_notification_user_id_is_read_id" in plan[0][-1]
+    assert not any("TEMP B-TREE" in row[-1] for row in plan)
+
+def test_rebuild_unread_counters(session: Session):
+    session.exec(select(NotificationCounter)).first().unread = 42
+    session.commit()
+
+    assert rebuild_unread_counters(session) == 2
+    assert unread_count(session, 1) == 5
+
+def test_counter_backfill_runs_once(session: Session):
+    engine = session.get_bind()
+    session.execute(NotificationCounter.__table__.delete())
+    session.execute(Notification.__table__.update().values(is_read=True))
+    session.commit()
+
+    # Nothing is unread, so the backfill writes no counters but is still recorded
+    assert run_once(engine, "backfill_notification_counters", rebuild_unread_counters) is True
+    adjust_unread(session, 1, 1)
+    session.commit()
+
+    # A later start neither rebuilds nor wipes the increment made since
+    assert run_once(engine, "backfill_notification_counters", rebuild_unread_counters) is False
+    assert unread_count(session, 1) == 1
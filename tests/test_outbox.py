@@ -0,0 +1,141 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import BackgroundTasks
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.pool import StaticPool
+
+from app.models import Client, Deal, OutboxMessage, OutboxStatus, User
+from app.utils import outbox
+from app.utils.background_tasks import create_notification_with_email
+from app.utils.unit_of_work import UnitOfWork
+
+@pytest.fixture(name="engine")
+def engine_fixture():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+@pytest.fixture(name="sent")
+def sent_fixture(monkeypatch):
+    """Replaces the handlers with one that records its calls"""
+    sent = []
+
+    async def handler(**payload):
+        if payload.get("fail"):
+            raise RuntimeError("SMTP unavailable")
+        sent.append(payload)
+
+    monkeypatch.setattr(outbox, "OUTBOX_HANDLERS", {"test": handler})
+    return sent
+
+def _enqueue(engine, count: int, **payload) -> None:
+    with Session(engine) as db:
+        for i in range(count):
+            outbox.enqueue(db, "test", n=i, **payload)
+        db.commit()
+
+def _messages(engine) -> list:
+    with Session(engine) as db:
+        return db.exec(select(OutboxMessage).order_by(OutboxMessage.id)).all()
+
+def test_email_written_with_notification(engine):
+    with Session(engine) as session:
+        user = User(email="test@example.com", hashed_password="", full_name="Test User")
+        session.add(user)
+        session.commit()
+        client = Client(name="Acme Corp", user_id=user.id)
+        session.add(client)
+        session.commit()
+        deal = Deal(client_id=client.id, stage="won", value=1000)
+        session.add(deal)
+        session.commit()
+
+        background_tasks = BackgroundTasks()
+        uow = UnitOfWork(session, background_tasks)
+        create_notification_with_email(uow, user, "deal_stage_changed", "Won", "", "deal", deal.id,
+                                       deal=deal, client_name="Acme Corp")
+        uow.rollback()
+        assert _messages(engine) == []
+
+        create_notification_with_email(uow, user, "deal_stage_changed", "Won", "", "deal", deal.id,
+                                       deal=deal, client_name="Acme Corp")
+        uow.commit()
+
+    [message] = _messages(engine)
+    assert message.kind == "deal_notification_email" and message.status == OutboxStatus.PENDING
+    assert json.loads(message.payload) == {
+        "recipient": "test@example.com", "user_name": "Test User", "deal_id": 1,
+        "deal_title": "Deal #1", "client_name": "Acme Corp", "status": "won"
+    }
+    # Nothing is sent from the request itself
+    assert background_tasks.tasks == []
+
+def test_batches_delivered_with_bounded_concurrency(engine, monkeypatch):
+    in_flight = []
+    peak = []
+
+    async def handler(**payload):
+        in_flight.append(payload)
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.01)
+        in_flight.remove(payload)
+
+    monkeypatch.setattr(outbox, "OUTBOX_HANDLERS", {"test": handler})
+    _enqueue(engine, 10)
+
+    assert asyncio.run(outbox.dispatch_batch(engine, batch_size=8, concurrency=3)) == 8
+    assert max(peak) == 3
+    assert [message.status for message in _messages(engine)] == ["sent"] * 8 + ["pending"] * 2
+    assert all(message.sent_at and message.attempts == 1 for message in _messages(engine)[:8])
+
+    assert asyncio.run(outbox.dispatch_batch(engine, batch_size=8, concurrency=3)) == 2
+    assert asyncio.run(outbox.dispatch_batch(engine, batch_size=8, concurrency=3)) == 0
+
+def test_failures_retried_with_backoff_then_failed(engine, sent, monkeypatch):
+    monkeypatch.setattr(outbox, "OUTBOX_MAX_ATTEMPTS", 2)
+    _enqueue(engine, 1, fail=True)
+
+    asyncio.run(outbox.dispatch_batch(engine))
+    [message] = _messages(engine)
+    assert message.status == OutboxStatus.PENDING and message.attempts == 1
+    assert message.last_error == "RuntimeError: SMTP unavailable"
+    assert message.available_at > datetime.utcnow() + timedelta(seconds=outbox.OUTBOX_RETRY_SECONDS - 5)
+    # Not due again until the backoff has passed
+    assert asyncio.run(outbox.dispatch_batch(engine)) == 0
+
+    with Session(engine) as db:
+        db.get(OutboxMessage, message.id).available_at = datetime.utcnow()
+        db.commit()
+    asyncio.run(outbox.dispatch_batch(engine))
+    [message] = _messages(engine)
+    assert message.status == OutboxStatus.FAILED and message.attempts == 2
+    assert sent == []
+
+def test_claims_are_exclusive_until_stale(engine, sent):
+    _enqueue(engine, 3)
+
+    first = outbox.claim_batch(engine, batch_size=2)
+    second = outbox.claim_batch(engine, batch_size=2)
+    assert [m.id for m in first] == [1, 2] and [m.id for m in second] == [3]
+    assert outbox.claim_batch(engine) == []
+
+    # A dispatcher that died mid-batch leaves its claim behind
+    with Session(engine) as db:
+        db.get(OutboxMessage, 1).claimed_at = datetime.utcnow() - outbox.OUTBOX_CLAIM_TIMEOUT * 2
+        db.commit()
+    [reclaimed] = outbox.claim_batch(engine)
+    assert reclaimed.id == 1 and reclaimed.attempts == 2
+
+    # The stale claim can no longer record an outcome
+    outbox.record_deliveries(engine, [(first[0], None)])
+    assert _messages(engine)[0].status == OutboxStatus.SENDING
+
+def test_unknown_kind_rejected(engine, sent):
+    with Session(engine) as db:
+        with pytest.raises(ValueError):
+            outbox.enqueue(db, "fax")
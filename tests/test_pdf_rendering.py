@@ -0,0 +1,28 @@
+import pytest
+
+from app.utils import (
+    generate_client_distribution_pdf,
+    generate_dashboard_pdf,
+    generate_pipeline_summary_pdf,
+)
+from app.utils.reports import format_pipeline_stats
+
+PIPELINE_STATS = format_pipeline_stats({
+    "lead": {"count": 2, "value": 15000},
+    "proposed": {"count": 1, "value": 5000},
+    "won": {"count": 3, "value": 90000},
+})
+
+CLIENT_DISTRIBUTION = [
+    {"id": 1, "name": "Acme Corp", "deal_count": 4, "total_value": 100000, "total_value_formatted": "$1000.00"},
+    {"id": 2, "name": "Globex", "deal_count": 2, "total_value": 10000, "total_value_formatted": "$100.00"},
+]
+
+@pytest.mark.parametrize("build", [
+    lambda: generate_pipeline_summary_pdf(PIPELINE_STATS, "Test Co"),
+    lambda: generate_client_distribution_pdf(CLIENT_DISTRIBUTION, "Test Co"),
+    lambda: generate_client_distribution_pdf([], "Test Co"),
+    lambda: generate_dashboard_pdf(PIPELINE_STATS, CLIENT_DISTRIBUTION, company_name="Test Co"),
+], ids=["pipeline-summary", "client-distribution", "client-distribution-empty", "dashboard"])
+def test_pdf_generators_build_documents(build):
+    assert build().startswith(b"%PDF")
@@ -0,0 +1,82 @@
+import pytest
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine
+from sqlmodel.pool import StaticPool
+
+from app.auth import (
+    get_user_permissions,
+    invalidate_permission_cache,
+    user_has_permission
+)
+from app.models import Permission, Role, RolePermission, User, UserRole
+
+# Setup test database
+@pytest.fixture(name="engine")
+def engine_fixture():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+@pytest.fixture(name="session")
+def session_fixture(engine):
+    invalidate_permission_cache()
+    with Session(engine) as session:
+        # Create a user with one role granting two permissions
+        user = User(email="test@example.com", hashed_password="", full_name="Test User")
+        role = Role(name="Manager", description="Manager")
+        view = Permission(name="view_deals", description="View deals")
+        update = Permission(name="update_deals", description="Update deals")
+        admin = Permission(name="manage_roles", description="Manage roles")
+        session.add_all([user, role, view, update, admin])
+        session.commit()
+
+        session.add(UserRole(user_id=user.id, role_id=role.id))
+        session.add(RolePermission(role_id=role.id, permission_id=view.id))
+        session.add(RolePermission(role_id=role.id, permission_id=update.id))
+        session.commit()
+
+        yield session
+    invalidate_permission_cache()
+
+@pytest.fixture(name="query_log")
+def query_log_fixture(engine):
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", on_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", on_execute)
+
+def test_permissions_resolved_with_single_query(session: Session, query_log):
+    user = session.query(User).first()
+    query_log.clear()
+
+    assert get_user_permissions(session, user) == ["update_deals", "view_deals"]
+    assert len(query_log) == 1
+
+def test_permission_checks_hit_cache(session: Session, query_log):
+    user = session.query(User).first()
+    assert user_has_permission(session, user, "view_deals") is True
+    query_log.clear()
+
+    assert user_has_permission(session, user, "update_deals") is True
+    assert user_has_permission(session, user, "manage_roles") is False
+    assert query_log == []
+
+def test_invalidation_picks_up_role_changes(session: Session):
+    user = session.query(User).first()
+    role = session.query(Role).first()
+    admin = session.query(Permission).filter(Permission.name == "manage_roles").first()
+    assert user_has_permission(session, user, "manage_roles") is False
+
+    session.add(RolePermission(role_id=role.id, permission_id=admin.id))
+    session.commit()
+
+    # Still served from the cache until the mutation invalidates it
+    assert user_has_permission(session, user, "manage_roles") is False
+    invalidate_permission_cache(user.id)
+    assert user_has_permission(session, user, "manage_roles") is True
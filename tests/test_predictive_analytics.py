@@ -0,0 +1,231 @@
+import pytest
+from datetime import datetime, timedelta
+
+import numpy as np
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.pool import StaticPool
+
+from app.main import app
+from app.auth import get_current_user
+from app.database import get_session
+from app.models import Client, Deal, User
+from app.utils import predictive_analytics
+from app.utils.predictive_analytics import PredictiveAnalytics, clear_forecast_cache
+from app.utils.stage_history import record_stage_change
+
+# Setup test database
+@pytest.fixture(name="engine")
+def engine_fixture():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+@pytest.fixture(name="session")
+def session_fixture(engine):
+    clear_forecast_cache()
+    with Session(engine) as session:
+        # Two users with growing pipelines over the last few weeks
+        now = datetime.utcnow()
+        for index, email in enumerate(["one@example.com", "two@example.com"]):
+            user = User(email=email, hashed_password="", full_name=email)
+            session.add(user)
+            session.commit()
+            for day in range(20):
+                record_stage_change(
+                    session, user.id, index * 100 + day, None, 0,
+                    ["lead", "proposed", "won"][day % 3], 1000 * (index + 1),
+                    at=now - timedelta(days=20 - day)
+                )
+        session.commit()
+
+        yield session
+    clear_forecast_cache()
+
+@pytest.fixture(name="query_log")
+def query_log_fixture(engine):
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", on_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", on_execute)
+
+def test_batch_forecast_matches_polyfit():
+    rng = np.random.default_rng(1)
+    series = np.cumsum(rng.random((6, 40)), axis=1)
+
+    forecast, r_squared = PredictiveAnalytics._linear_forecast_batch(series, 10)
+
+    x = np.arange(40)
+    for row, values in enumerate(series):
+        slope, intercept = np.polyfit(x, values, 1)
+        expected = np.maximum(slope * np.arange(40, 50) + intercept, 0)
+        fitted = slope * x + intercept
+        expected_r2 = 1 - np.sum((values - fitted) ** 2) / np.sum((values - values.mean()) ** 2)
+        assert np.allclose(forecast[row], expected)
+        assert r_squared[row] == pytest.approx(expected_r2)
+
+def test_batch_forecast_flat_and_short_series():
+    forecast, r_squared = PredictiveAnalytics._linear_forecast_batch(np.full((2, 5), 7.0), 3)
+    assert np.allclose(forecast, 7.0)
+    assert r_squared.tolist() == [0.0, 0.0]
+
+    forecast, r_squared = PredictiveAnalytics._linear_forecast_batch(np.array([[4.0], [2.0]]), 3)
+    assert forecast.tolist() == [[4.0] * 3, [2.0] * 3]
+
+def test_forecast_cached_until_history_changes(session: Session, query_log):
+    user = session.exec(select(User)).first()
+    first = PredictiveAnalytics.forecast_pipeline_value(session, days_forecast=7, user_id=user.id)
+    assert len(first["forecast_dates"]) == 7
+    assert len(first["total_forecast"]) == 7
+
+    # A cache hit only checks the data version
+    query_log.clear()
+    assert PredictiveAnalytics.forecast_pipeline_value(session, days_forecast=7, user_id=user.id) is first
+    assert len(query_log) == 1
+
+    record_stage_change(session, user.id, 999, None, 0, "won", 50000)
+    session.commit()
+    refreshed = PredictiveAnalytics.forecast_pipeline_value(session, days_forecast=7, user_id=user.id)
+    assert refreshed is not first
+    assert refreshed["won_forecast"][0] > first["won_forecast"][0]
+
+def test_forecast_all_users_warms_cache(session: Session, query_log):
+    users = session.exec(select(User)).all()
+    expected = {
+        user.id: PredictiveAnalytics.forecast_pipeline_value(session, user_id=user.id)
+        for user in users
+    }
+    clear_forecast_cache()
+
+    assert PredictiveAnalytics.forecast_all_users(session) == 2
+
+    query_log.clear()
+    for user in users:
+        cached = PredictiveAnalytics.forecast_pipeline_value(session, user_id=user.id)
+        assert cached["forecast_dates"] == expected[user.id]["forecast_dates"]
+        assert np.allclose(cached["total_forecast"], expected[user.id]["total_forecast"])
+        assert cached["confidence"] == expected[user.id]["confidence"]
+    assert len(query_log) == len(users)
+
+def test_forecast_cache_evicts_least_recently_used(session: Session, query_log, monkeypatch):
+    monkeypatch.setattr(predictive_analytics, "FORECAST_CACHE_MAX_SIZE", 2)
+    user = session.exec(select(User)).first()
+
+    def forecast(days):
+        return PredictiveAnalytics.forecast_pipeline_value(session, days_forecast=days, user_id=user.id)
+
+    week, fortnight = forecast(7), forecast(14)
+    assert forecast(7) is week  # Now the most recently used
+    forecast(30)
+
+    assert len(predictive_analytics._forecast_cache) == 2
+    assert forecast(7) is week
+    assert forecast(14) is not fortnight
+
+def test_forecast_window_bounded(session: Session):
+    user = session.exec(select(User)).first()
+    app.dependency_overrides[get_session] = lambda: session
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        client = TestClient(app)
+        assert client.get("/api/analytics/forecast?days_forecast=7").status_code == 200
+        assert client.get("/api/analytics/forecast?days_history=100000").status_code == 422
+        assert client.get("/api/analytics/forecast?days_forecast=0").status_code == 422
+    finally:
+        app.dependency_overrides.clear()
+
+def test_churn_risk_page_bounded(session: Session):
+    user = session.exec(select(User)).first()
+    app.dependency_overrides[get_session] = lambda: session
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        client = TestClient(app)
+        assert client.get("/api/analytics/churn-risk?skip=0&limit=10").status_code == 200
+        assert client.get("/api/analytics/churn-risk?skip=-1").status_code == 422
+        assert client.get("/api/analytics/churn-risk?limit=0").status_code == 422
+        assert client.get("/api/analytics/churn-risk?limit=-5").status_code == 422
+        assert client.get("/api/analytics/churn-risk?limit=100000").status_code == 422
+    finally:
+        app.dependency_overrides.clear()
+
+def test_churn_risk_single_query_and_paginated(session: Session, query_log):
+    user = session.exec(select(User)).first()
+    now = datetime.utcnow()
+    quiet = Client(name="Quiet", email="quiet@example.com", user_id=user.id)
+    busy = Client(name="Busy", email="busy@example.com", user_id=user.id)
+    idle = Client(name="No deals", user_id=user.id)
+    session.add_all([quiet, busy, idle])
+    session.commit()
+    session.add(Deal(client_id=quiet.id, stage="lead", value=1000, updated_at=now - timedelta(days=150)))
+    session.add(Deal(client_id=busy.id, stage="won", value=1000, updated_at=now - timedelta(days=1)))
+    session.add(Deal(client_id=busy.id, stage="lead", value=1000, updated_at=now - timedelta(days=40)))
+    session.commit()
+    user_id = user.id
+
+    query_log.clear()
+    risks, total = PredictiveAnalytics.predict_churn_risk(session, user_id=user_id)
+
+    assert len(query_log) == 1
+    assert total == 2
+    assert [r["name"] for r in risks] == ["Quiet", "Busy"]
+    assert risks[0] == {
+        "id": quiet.id,
+        "name": "Quiet",
+        "email": "quiet@example.com",
+        "days_since_update": 150,
+        "total_deals": 1,
+        "win_rate": 0.0,
+        "risk_score": 75.0,
+        "risk_level": "High"
+    }
+    assert risks[1]["days_since_update"] == 1
+    assert risks[1]["win_rate"] == 50.0
+    assert risks[1]["risk_level"] == "Low"
+
+    page, total = PredictiveAnalytics.predict_churn_risk(session, user_id=user_id, skip=1, limit=1)
+    assert total == 2
+    assert [r["name"] for r in page] == ["Busy"]
+
+def test_deal_outcomes_scored_without_per_deal_queries(session: Session, query_log):
+    user = session.exec(select(User)).first()
+    loyal = Client(name="Loyal", user_id=user.id)
+    new = Client(name="New", user_id=user.id)
+    session.add_all([loyal, new])
+    session.commit()
+    session.add_all([
+        Deal(client_id=loyal.id, stage="won", value=10000),
+        Deal(client_id=loyal.id, stage="won", value=10000),
+        Deal(client_id=loyal.id, stage="proposed", value=10000),
+        Deal(client_id=new.id, stage="proposed", value=30000),
+        Deal(client_id=999, stage="proposed", value=20000),  # Client was deleted
+    ])
+    session.commit()
+    user_id = user.id
+
+    query_log.clear()
+    predictions = PredictiveAnalytics.forecast_deal_outcomes(session)
+
+    assert len(query_log) == 2
+    # Average of all three proposed deals is 200.00
+    assert [p["client_name"] for p in predictions] == ["New", "Loyal"]
+    assert predictions[0]["win_probability"] == 35.6
+    assert predictions[0]["expected_value"] == pytest.approx(106.88, abs=0.01)
+    assert predictions[0]["recommendation"] == "Reconsider"
+    assert predictions[1]["win_probability"] == 52.5
+    assert predictions[1]["expected_value"] == 52.5
+    assert predictions[1]["recommendation"] == "Review"
+
+    scoped = PredictiveAnalytics.forecast_deal_outcomes(session, user_id=user_id)
+    assert [p["client_name"] for p in scoped] == ["New", "Loyal"]
+
+def test_deal_outcome_scoring_zero_values():
+    values = np.zeros(3)
+    probability = PredictiveAnalytics._score_deal_outcomes(values, np.array([0, 2, 4]), np.array([0, 2, 0]))
+    assert probability.round(3).tolist() == [0.375, 0.5, 0.25]
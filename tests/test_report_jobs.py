@@ -0,0 +1,194 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.pool import StaticPool
+
+from app.main import app
+from app.auth import get_current_user
+from app.database import get_session
+from app.models import Client, Deal, ReportJob, ReportJobStatus, User
+from app.utils import artifact_cache, charts, report_jobs
+
+# Setup test database
+@pytest.fixture(name="engine")
+def engine_fixture():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+@pytest.fixture(name="session")
+def session_fixture(engine):
+    with Session(engine) as session:
+        user = User(email="test@example.com", hashed_password="", full_name="Test User")
+        other = User(email="other@example.com", hashed_password="", full_name="Other User")
+        session.add_all([user, other])
+        session.commit()
+        acme = Client(name="Acme Corp", user_id=user.id)
+        session.add(acme)
+        session.commit()
+        session.add_all([
+            Deal(client_id=acme.id, stage="lead", value=10000),
+            Deal(client_id=acme.id, stage="won", value=25000),
+        ])
+        session.commit()
+
+        yield session
+
+@pytest.fixture(name="client")
+def client_fixture(session: Session, monkeypatch, tmp_path):
+    # Build reports inline so each test sees the finished job
+    monkeypatch.setattr(report_jobs, "REPORT_JOB_WORKERS", 0)
+    monkeypatch.setattr(report_jobs, "REPORTS_DIR", str(tmp_path))
+    monkeypatch.setattr(charts, "CHART_RENDER_WORKERS", 0)
+    monkeypatch.setattr(artifact_cache, "_artifact_cache", artifact_cache.ArtifactCache(str(tmp_path / "artifacts")))
+    user = session.exec(select(User).where(User.email == "test@example.com")).one()
+    app.dependency_overrides[get_session] = lambda: session
+    app.dependency_overrides[get_current_user] = lambda: user
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+def test_report_job_lifecycle_and_ranged_download(client: TestClient, session: Session):
+    response = client.post("/api/reports", json={"report_type": "pipeline-summary-pdf"})
+
+    assert response.status_code == 202
+    job = response.json()
+    assert response.headers["location"] == f"/api/reports/{job['id']}"
+    assert job["status"] == "succeeded"
+
+    status_response = client.get(f"/api/reports/{job['id']}")
+    assert status_response.json()["download_url"] == f"/api/reports/{job['id']}/download"
+
+    full = client.get(job["download_url"])
+    assert full.status_code == 200
+    assert full.content.startswith(b"%PDF")
+    assert full.headers["accept-ranges"] == "bytes"
+    assert len(full.content) == job["size_bytes"]
+
+    # Resume from byte 100
+    partial = client.get(job["download_url"], headers={"Range": "bytes=100-"})
+    assert partial.status_code == 206
+    assert partial.headers["content-range"] == f"bytes 100-{len(full.content) - 1}/{len(full.content)}"
+    assert partial.content == full.content[100:]
+
+    # A stale If-Range gets the whole file instead of a mismatched piece
+    stale = client.get(job["download_url"], headers={"Range": "bytes=100-", "If-Range": '"stale"'})
+    assert stale.status_code == 200
+    current = client.get(job["download_url"], headers={"Range": "bytes=100-", "If-Range": full.headers["etag"]})
+    assert current.status_code == 206
+    assert client.get(job["download_url"], headers={"If-None-Match": full.headers["etag"]}).status_code == 304
+
+    unsatisfiable = client.get(job["download_url"], headers={"Range": f"bytes={len(full.content)}-"})
+    assert unsatisfiable.status_code == 416
+
+@pytest.mark.parametrize("report_type", sorted(report_jobs.REPORT_TYPES))
+def test_every_report_type_builds(client: TestClient, report_type: str):
+    response = client.post("/api/reports", json={"report_type": report_type})
+
+    assert response.json()["status"] == "succeeded", response.json()["error"]
+    assert client.get(response.json()["download_url"]).status_code == 200
+
+def test_report_job_validation_and_ownership(client: TestClient, session: Session):
+    assert client.post("/api/reports", json={"report_type": "nope"}).status_code == 400
+    assert client.post(
+        "/api/reports", json={"report_type": "deals-excel", "params": {"limit": 5}}
+    ).status_code == 422
+
+    other = session.exec(select(User).where(User.email == "other@example.com")).one()
+    foreign = ReportJob(user_id=other.id, report_type="deals-excel")
+    session.add(foreign)
+    session.commit()
+    assert client.get(f"/api/reports/{foreign.id}").status_code == 404
+
+def test_download_conflicts_until_finished_and_recovery_requeues(client: TestClient, session: Session, engine):
+    user = session.exec(select(User).where(User.email == "test@example.com")).one()
+    job = ReportJob(user_id=user.id, report_type="deals-excel", status=ReportJobStatus.RUNNING)
+    session.add(job)
+    session.commit()
+
+    assert client.get(f"/api/reports/{job.id}/download").status_code == 409
+
+    assert report_jobs.recover_report_jobs(engine) == 1
+    session.refresh(job)
+    assert job.status == ReportJobStatus.SUCCEEDED
+    assert client.get(f"/api/reports/{job.id}/download").status_code == 200
+
+def test_report_job_claimed_once_until_stale(client: TestClient, session: Session, engine):
+    user = session.exec(select(User).where(User.email == "test@example.com")).one()
+    job = ReportJob(user_id=user.id, report_type="deals-excel")
+    session.add(job)
+    session.commit()
+
+    started_at = report_jobs.claim_report_job(engine, job.id)
+    assert started_at is not None
+    # A second dispatch, e.g. recovery in another process, leaves it alone
+    assert report_jobs.claim_report_job(engine, job.id) is None
+    assert report_jobs.recover_report_jobs(engine) == 0
+    report_jobs.run_report_job(engine, job.id)
+    session.refresh(job)
+    assert job.status == ReportJobStatus.RUNNING and job.started_at == started_at
+
+    # Once the worker has gone stale the job is built again
+    job.started_at = started_at - report_jobs.REPORT_JOB_STALE_AFTER * 2
+    session.add(job)
+    session.commit()
+    assert report_jobs.recover_report_jobs(engine) == 1
+    session.refresh(job)
+    assert job.status == ReportJobStatus.SUCCEEDED
+
+def test_sweep_expires_old_reports(client: TestClient, session: Session, engine, tmp_path):
+    old = client.post("/api/reports", json={"report_type": "deals-excel"}).json()
+    new = client.post("/api/reports", json={"report_type": "pipeline-summary-excel"}).json()
+    leftover = tmp_path / "crashed.xlsx.123.partial"
+    leftover.write_bytes(b"partial")
+    long_ago = (datetime.utcnow() - timedelta(hours=report_jobs.REPORT_RETENTION_HOURS * 2)).timestamp()
+    os.utime(leftover, (long_ago, long_ago))
+
+    job = session.get(ReportJob, old["id"])
+    job.finished_at = datetime.utcnow() - timedelta(hours=report_jobs.REPORT_RETENTION_HOURS + 1)
+    session.add(job)
+    session.commit()
+    path = job.file_path
+
+    assert report_jobs.sweep_report_files(engine) == 1
+    session.refresh(job)
+    assert job.status == ReportJobStatus.EXPIRED and job.file_path is None
+    assert not os.path.exists(path) and not leftover.exists()
+    assert client.get(old["download_url"]).status_code == 410
+    assert client.get(new["download_url"]).status_code == 200
+
+def test_reports_only_include_the_users_data(client: TestClient, session: Session, monkeypatch):
+    from app.utils import excel_exports
+
+    other = session.exec(select(User).where(User.email == "other@example.com")).one()
+    globex = Client(name="Globex", user_id=other.id)
+    session.add(globex)
+    session.commit()
+    session.add(Deal(client_id=globex.id, stage="won", value=99999))
+    session.commit()
+
+    built = {}
+
+    def capture(name):
+        def generate(data):
+            built[name] = list(data) if name == "deals" else data
+            return b"report"
+        return generate
+
+    monkeypatch.setattr(excel_exports, "generate_deals_excel", capture("deals"))
+    monkeypatch.setattr(excel_exports, "generate_pipeline_excel", capture("pipeline"))
+    monkeypatch.setattr(excel_exports, "generate_clients_excel", capture("clients"))
+    for report_type in ("deals-excel", "pipeline-summary-excel", "client-distribution-excel"):
+        assert client.post("/api/reports", json={"report_type": report_type}).json()["status"] == "succeeded"
+
+    assert [deal["client_name"] for deal in built["deals"]] == ["Acme Corp", "Acme Corp"]
+    assert built["pipeline"]["total_value"] == 35000
+    assert [entry["name"] for entry in built["clients"]] == ["Acme Corp"]
+
+    # Each user's copy is cached separately
+    user = session.exec(select(User).where(User.email == "test@example.com")).one()
+    assert report_jobs.report_cache_key(session, user, "deals-excel") != report_jobs.report_cache_key(session, other, "deals-excel")
@@ -0,0 +1,114 @@
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.pool import StaticPool
+
+from app.main import app
+from app.auth import get_current_user
+from app.database import get_session
+from app.models import Client, Deal, User
+from app.utils import artifact_cache, charts
+from app.utils.metrics import get_latency_recorder
+from app.utils.reports import load_dashboard_snapshot
+
+# Setup test database
+@pytest.fixture(name="engine")
+def engine_fixture():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    return engine
+
+@pytest.fixture(name="session")
+def session_fixture(engine):
+    with Session(engine) as session:
+        user = User(email="test@example.com", hashed_password="", full_name="Test User")
+        other = User(email="other@example.com", hashed_password="", full_name="Other User")
+        session.add_all([user, other])
+        session.commit()
+        acme = Client(name="Acme Corp", user_id=user.id)
+        globex = Client(name="Globex", user_id=user.id)
+        foreign = Client(name="Not mine", user_id=other.id)
+        session.add_all([acme, globex, foreign])
+        session.commit()
+        session.add_all([
+            Deal(client_id=acme.id, stage="lead", value=10000),
+            Deal(client_id=acme.id, stage="won", value=25000),
+            Deal(client_id=globex.id, stage="proposed", value=50000),
+            Deal(client_id=foreign.id, stage="won", value=99999),
+        ])
+        session.commit()
+
+        yield session
+
+@pytest.fixture(name="client")
+def client_fixture(session: Session, monkeypatch, tmp_path):
+    monkeypatch.setattr(charts, "CHART_RENDER_WORKERS", 0)
+    monkeypatch.setattr(artifact_cache, "_artifact_cache", artifact_cache.ArtifactCache(str(tmp_path / "artifacts")))
+    user = session.exec(select(User).where(User.email == "test@example.com")).one()
+    app.dependency_overrides[get_session] = lambda: session
+    app.dependency_overrides[get_current_user] = lambda: user
+    charts.clear_chart_cache()
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+    charts.clear_chart_cache()
+
+@pytest.fixture(name="query_log")
+def query_log_fixture(engine):
+    statements = []
+
+    def on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", on_execute)
+    yield statements
+    event.remove(engine, "before_cursor_execute", on_execute)
+
+def test_snapshot_is_two_queries_scoped_to_user(session: Session, query_log):
+    user_id = session.exec(select(User).where(User.email == "test@example.com")).one().id
+
+    query_log.clear()
+    snapshot = load_dashboard_snapshot(session, user_id)
+
+    assert len(query_log) == 2
+    stats = snapshot.pipeline_stats()
+    assert stats["stages"]["won"] == {"count": 1, "value": 25000, "value_formatted": "$250.00"}
+    assert stats["total"] == {"count": 3, "value": 85000, "value_formatted": "$850.00"}
+    assert [c["name"] for c in snapshot.client_distribution()] == ["Globex", "Acme Corp"]
+    assert snapshot.client_distribution()[1]["total_value_formatted"] == "$350.00"
+
+def test_dashboard_pdf_with_charts_and_timings(client: TestClient):
+    render = get_latency_recorder("dashboard_pdf.total").snapshot()["count"]
+
+    response = client.get("/api/export/dashboard-pdf")
+
+    assert response.status_code == 200
+    assert response.content.startswith(b"%PDF")
+    phases = [entry.split(";")[0] for entry in response.headers["server-timing"].split(", ")]
+    assert phases == ["snapshot", "charts", "build", "total"]
+    assert get_latency_recorder("dashboard_pdf.total").snapshot()["count"] == render + 1
+    assert charts.chart_renderer_stats()["cache"]["misses"] == 2
+
+def test_pdf_styles_built_once_and_charts_embedded_from_memory(monkeypatch):
+    import tempfile
+
+    from app.utils import generate_dashboard_pdf, generate_pipeline_summary_pdf
+    from app.utils import pdf_rendering
+
+    def no_temp_files(*args, **kwargs):
+        raise AssertionError("PDF generation must not touch the filesystem")
+
+    monkeypatch.setattr(tempfile, "NamedTemporaryFile", no_temp_files)
+    chart = charts._render("deals-by-stage", [1, 2, 3], "png")
+
+    with_charts = generate_dashboard_pdf({}, [], chart, chart)
+    without_charts = generate_dashboard_pdf({}, [])
+    generate_pipeline_summary_pdf({})
+
+    assert with_charts.startswith(b"%PDF")
+    assert len(with_charts) > len(without_charts) + len(chart) // 2
+    assert pdf_rendering.report_styles() is pdf_rendering.report_styles()
+    assert pdf_rendering.table_style(total_row=True) is pdf_rendering.table_style(total_row=True)
+    assert pdf_rendering.report_styles.cache_info().currsize == 1
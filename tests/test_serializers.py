@@ -0,0 +1,57 @@
+import json
+from datetime import datetime
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.pool import StaticPool
+
+from app.models import Client, ClientRead, Deal, DealRead, User
+from app.utils import serializers
+from app.utils.serializers import CLIENT_READ, DEAL_READ, ORJSONResponse
+
+@pytest.fixture(name="session")
+def session_fixture():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        user = User(email="test@example.com", hashed_password="", full_name="Test User")
+        session.add(user)
+        session.commit()
+        client = Client(name="Zoë \"Acme\" Ltd", notes=None, user_id=user.id,
+                        created_at=datetime(2024, 3, 1, 9, 30, 0, 250000))
+        session.add(client)
+        session.commit()
+        session.add_all([Deal(client_id=client.id, stage=stage, value=value)
+                         for stage, value in [("lead", 100), ("won", 2500000)]])
+        session.commit()
+        yield session
+
+def _legacy(session: Session, table, read_model) -> bytes:
+    # What FastAPI does for response_model=List[read_model]
+    rows = [read_model.from_orm(row) for row in session.exec(select(table)).all()]
+    return json.dumps(jsonable_encoder(rows)).encode()
+
+@pytest.mark.parametrize("has_orjson", [True, False])
+def test_row_serializer_matches_response_model(session: Session, monkeypatch, has_orjson):
+    monkeypatch.setattr(serializers, "HAS_ORJSON", has_orjson and serializers.HAS_ORJSON)
+
+    for table, read_model, serializer in [(Client, ClientRead, CLIENT_READ), (Deal, DealRead, DEAL_READ)]:
+        body = serializer.dumps(session.execute(serializer.select(select(table))).all())
+        assert json.loads(body) == json.loads(_legacy(session, table, read_model))
+
+    assert json.loads(body)[1]["value"] == 2500000
+
+def test_select_keeps_filters_and_order(session: Session):
+    statement = DEAL_READ.select(select(Deal).where(Deal.value > 50).order_by(Deal.value.desc()))
+    rows = json.loads(DEAL_READ.dumps(session.execute(statement).all()))
+
+    assert [row["stage"] for row in rows] == ["won", "lead"]
+    assert list(rows[0]) == list(DealRead.__fields__)
+
+def test_orjson_response_passes_bytes_through():
+    assert ORJSONResponse(b'[{"id":1}]').body == b'[{"id":1}]'
+    assert ORJSONResponse({"when": datetime(2024, 1, 2, 3, 4, 5)}).body == b'{"when":"2024-01-02T03:04:05"}'
+    assert ORJSONResponse([]).headers["content-type"] == "application/json"
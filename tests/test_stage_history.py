@@ -0,0 +1,115 @@
+import pytest
+from datetime import datetime, timedelta
+
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.pool import StaticPool
+
+from app.models import Client, Deal, DealStageDailyRollup, DealStageEvent, User
+from app.utils.stage_history import (
+    average_cycle_length,
+    backfill_stage_history,
+    rebuild_rollups,
+    record_stage_change,
+    stage_value_series
+)
+
+# Setup test database
+@pytest.fixture(name="session")
+def session_fixture():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        user = User(email="test@example.com", hashed_password="", full_name="Test User")
+        session.add(user)
+        session.commit()
+        client = Client(name="Acme Corp", user_id=user.id)
+        session.add(client)
+        session.commit()
+
+        yield session
+
+def rollups(session: Session):
+    rows = session.exec(
+        select(DealStageDailyRollup).order_by(DealStageDailyRollup.day, DealStageDailyRollup.stage)
+    ).all()
+    return [(r.day, r.stage, r.net_count, r.net_value) for r in rows if r.net_count or r.net_value]
+
+def test_stage_changes_roll_up_per_day(session: Session):
+    user = session.exec(select(User)).first()
+    today = datetime.utcnow().replace(hour=12)
+    two_days_ago = today - timedelta(days=2)
+
+    record_stage_change(session, user.id, 1, None, 0, "lead", 1000, at=two_days_ago)
+    record_stage_change(session, user.id, 2, None, 0, "lead", 500, at=two_days_ago)
+    record_stage_change(session, user.id, 1, "lead", 1000, "proposed", 1000, at=today)
+    record_stage_change(session, user.id, 1, "proposed", 1000, "proposed", 1500, at=today)
+    session.commit()
+
+    assert len(session.exec(select(DealStageEvent)).all()) == 4
+    dates, totals = stage_value_series(session, two_days_ago.date() - timedelta(days=1), user_id=user.id)
+
+    assert len(dates) == 4
+    assert totals[0].tolist() == [0, 1500, 1500, 500]
+    assert totals[1].tolist() == [0, 0, 0, 1500]
+    assert totals[2].tolist() == [0, 0, 0, 0]
+
+def test_unchanged_deal_records_nothing(session: Session):
+    user = session.exec(select(User)).first()
+
+    assert record_stage_change(session, user.id, 1, "lead", 1000, "lead", 1000) is None
+    session.commit()
+
+    assert session.exec(select(DealStageEvent)).all() == []
+    assert rollups(session) == []
+
+def test_series_carries_opening_balance(session: Session):
+    user = session.exec(select(User)).first()
+    long_ago = datetime.utcnow() - timedelta(days=100)
+    record_stage_change(session, user.id, 1, None, 0, "won", 2500, at=long_ago)
+    session.commit()
+
+    dates, totals = stage_value_series(session, datetime.utcnow().date() - timedelta(days=6), user_id=user.id)
+
+    assert totals[2].tolist() == [2500] * 7
+    # Other users do not see this pipeline
+    _, other = stage_value_series(session, dates[0].item(), user_id=user.id + 1)
+    assert not other.any()
+
+def test_backfill_matches_incremental_rollups(session: Session):
+    client = session.exec(select(Client)).first()
+    created = datetime.utcnow() - timedelta(days=10)
+    session.add(Deal(client_id=client.id, stage="lead", value=1000, created_at=created))
+    session.add(Deal(client_id=client.id, stage="won", value=3000, created_at=created))
+    session.commit()
+
+    assert backfill_stage_history(session) == 2
+    session.commit()
+    assert backfill_stage_history(session) == 0
+    backfilled = rollups(session)
+    assert backfilled == [
+        (created.date(), "lead", 1, 1000),
+        (created.date(), "won", 1, 3000),
+    ]
+
+    # Incremental upserts and a full rebuild agree
+    deal = session.exec(select(Deal).where(Deal.stage == "lead")).first()
+    record_stage_change(session, client.user_id, deal.id, "lead", 1000, "won", 1000)
+    session.commit()
+    incremental = rollups(session)
+    rebuild_rollups(session)
+    session.commit()
+    assert rollups(session) == incremental
+
+def test_average_cycle_length(session: Session):
+    user = session.exec(select(User)).first()
+    now = datetime.utcnow()
+    record_stage_change(session, user.id, 1, None, 0, "lead", 1000, at=now - timedelta(days=12))
+    record_stage_change(session, user.id, 1, "lead", 1000, "won", 1000, at=now - timedelta(days=2))
+    record_stage_change(session, user.id, 2, None, 0, "lead", 1000, at=now - timedelta(days=5))
+    record_stage_change(session, user.id, 2, "lead", 1000, "won", 1000, at=now - timedelta(days=1))
+    session.commit()
+
+    assert average_cycle_length(session, since=now - timedelta(days=30)) == pytest.approx(7)
+    assert average_cycle_length(session, since=now - timedelta(days=30), user_id=user.id + 1) is None
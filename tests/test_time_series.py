@@ -0,0 +1,25 @@
+from datetime import date
+
+import numpy as np
+
+from app.utils.time_series import STAGES, cumulative_stage_values, format_dates, stage_codes
+
+def test_cumulative_values_match_per_day_sums():
+    rng = np.random.default_rng(0)
+    start_date = date(2024, 1, 1)
+    end_date = date(2024, 1, 31)
+    days = np.datetime64(start_date, "D") + rng.integers(-5, 40, 500)
+    stages = rng.choice(np.array(STAGES + ("lost",), dtype=object), 500)
+    values = rng.integers(100, 10000, 500).astype(float)
+
+    dates, totals = cumulative_stage_values(
+        days, stage_codes(stages), values, start_date, end_date
+    )
+
+    assert format_dates(dates)[0] == "2024-01-01"
+    assert totals.shape == (len(STAGES), 31)
+    # Reference: deals inside the range on or before each day
+    for i, day in enumerate(dates):
+        in_range = (days >= dates[0]) & (days <= day)
+        for s, stage in enumerate(STAGES):
+            assert totals[s, i] == values[in_range & (stages == stage)].sum()
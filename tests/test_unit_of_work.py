@@ -0,0 +1,103 @@
+import pytest
+from fastapi import BackgroundTasks
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, SQLModel, create_engine, select
+from sqlmodel.pool import StaticPool
+
+from app.main import app
+from app.auth import get_current_user
+from app.database import get_session
+from app.models import Client, Deal, Notification, User
+from app.utils.unit_of_work import UnitOfWork
+
+# Setup test database
+@pytest.fixture(name="session")
+def session_fixture():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        user = User(email="test@example.com", hashed_password="", full_name="Test User")
+        session.add(user)
+        session.commit()
+        client = Client(name="Acme Corp", user_id=user.id)
+        session.add(client)
+        session.commit()
+        session.add(Deal(client_id=client.id, stage="lead", value=10000))
+        session.commit()
+
+        yield session
+
+@pytest.fixture(name="commits")
+def commits_fixture(session: Session):
+    commits = []
+
+    def on_commit(session):
+        commits.append(session)
+
+    event.listen(session, "after_commit", on_commit)
+    yield commits
+    event.remove(session, "after_commit", on_commit)
+
+def test_request_writes_in_one_commit(session: Session, commits):
+    user = session.exec(select(User)).one()
+    app.dependency_overrides[get_session] = lambda: session
+    app.dependency_overrides[get_current_user] = lambda: user
+    try:
+        response = TestClient(app).patch("/api/deals/1/move", json={"new_stage": "won"})
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    # Deal, stage history, notification and its counter all in one commit
+    assert len(commits) == 1
+    assert session.exec(select(Notification)).one().entity_id == 1
+    # The request's session is handed back with its own setting
+    assert session.expire_on_commit is True
+
+def test_side_effects_scheduled_only_after_commit(session: Session, commits):
+    calls = []
+    background_tasks = BackgroundTasks()
+    with UnitOfWork(session, background_tasks) as uow:
+        user = session.exec(select(User)).one()
+        uow.add(Client(name="Globex", user_id=user.id))
+        uow.add_after_commit(calls.append, "sent")
+        assert background_tasks.tasks == []
+
+        uow.commit()
+
+    assert len(commits) == 1
+    assert [task.args for task in background_tasks.tasks] == [("sent",)]
+    assert calls == []  # Queued, not run inline
+
+def test_failed_commit_rolls_back_and_drops_side_effects(session: Session):
+    background_tasks = BackgroundTasks()
+    with UnitOfWork(session, background_tasks) as uow:
+        uow.add(Client(name="Globex", user_id=1))
+        uow.add(Client(name=None, user_id=1))  # Violates NOT NULL
+        uow.add_after_commit(print, "never")
+
+        with pytest.raises(IntegrityError):
+            uow.commit()
+
+    assert background_tasks.tasks == []
+    assert session.exec(select(Client.name)).all() == ["Acme Corp"]
+
+def test_rollback_discards_staged_changes(session: Session):
+    background_tasks = BackgroundTasks()
+    with UnitOfWork(session, background_tasks) as uow:
+        uow.add(Client(name="Globex", user_id=1))
+        uow.add_after_commit(print, "never")
+        uow.rollback()
+        uow.commit()
+
+    assert background_tasks.tasks == []
+    assert session.exec(select(Client.name)).all() == ["Acme Corp"]
+
+def test_expire_on_commit_restored_on_close(session: Session):
+    with UnitOfWork(session, BackgroundTasks()):
+        assert session.expire_on_commit is False
+    assert session.expire_on_commit is True